@@ -0,0 +1,281 @@
+"""
+Microbenchmarks of the CPU-bound path (parse, then classify) for every
+active canton, on synthetic answers in the canton's info_format at a small
+and a large FEATURE_COUNT, plus the recorded tests/data fixtures.
+
+Records ops/s and peak allocation per call (tracemalloc) and compares them
+with a stored baseline; exits with status 1 when a case is slower or
+allocates more than the threshold allows.
+
+    uv run python benchmarks/bench_hot_path.py                  # compare
+    uv run python benchmarks/bench_hot_path.py --save-baseline  # record
+
+Timings depend on the machine and Python version: record the baseline where
+the comparison runs. Allocations are comparable across machines.
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import corpus
+
+from drillapi.cantons_configuration.compiled import COMPILED_CANTONS  # noqa: E402
+from drillapi.services.processing import (  # noqa: E402
+    parse_esri_identify,
+    parse_esri_query,
+    parse_wms_getfeatureinfo,
+    process_ground_category,
+)
+
+BASELINE = Path(__file__).resolve().parent / "baselines/hot_path.json"
+# Allocation growth below this is noise (interned strings, dict resizes)
+ALLOC_TOLERANCE_KB = 1.0
+
+
+def format_label(info_format: str) -> str:
+    return info_format.lower().removeprefix("application/").replace("/", "-")
+
+
+def _case(name: str, parse, compiled, size: int) -> dict:
+    features = parse()
+    return {
+        "name": name,
+        "size": size,
+        "parse": parse,
+        "classify": lambda: process_ground_category(features, compiled),
+    }
+
+
+def build_cases(large: int, cantons: set | None = None) -> list:
+    cases = []
+    for code, config in corpus.active_cantons().items():
+        if cantons and code not in cantons:
+            continue
+        compiled = COMPILED_CANTONS[code]
+        info_format = config["info_format"]
+        label = format_label(info_format)
+        x, y = config["ground_control_point"][0][:2]
+
+        for size, count in (("small", 1), ("large", large)):
+            picks = corpus.pick_features(config, count, rng=random.Random(code))
+            if corpus.format_family(info_format) == "arcgis":
+                layer_id = config["layers"][0]["id"]
+                body = corpus.render_esri_query(picks, layer_id)
+                parse = lambda body=body, layer_id=layer_id: parse_esri_query(
+                    body, layer_id
+                )
+            else:
+                _, body = corpus.render(config, picks, x, y)
+                parse = lambda body=body, config=config: parse_wms_getfeatureinfo(
+                    body, config["info_format"], config
+                )
+            cases.append(_case(f"{code}/{label}/{size}", parse, compiled, len(body)))
+
+    # Recorded answers
+    configs = corpus.CANTONS["cantons_configurations"]
+    for code, path in corpus.WMS_FIXTURES.items():
+        if cantons and code not in cantons:
+            continue
+        body = path.read_bytes()
+        config = configs[code]
+        parse = lambda body=body, config=config: parse_wms_getfeatureinfo(
+            body, config["info_format"], config
+        )
+        name = f"{code}/{format_label(config['info_format'])}/recorded"
+        cases.append(_case(name, parse, COMPILED_CANTONS[code], len(body)))
+    for code, path in corpus.ESRI_IDENTIFY_FIXTURES.items():
+        if cantons and code not in cantons:
+            continue
+        body = path.read_bytes()
+        parse = lambda body=body: parse_esri_identify(body)
+        name = f"{code}/arcgis-json-identify/recorded"
+        cases.append(_case(name, parse, COMPILED_CANTONS[code], len(body)))
+    return cases
+
+
+def ops_per_second(fn, min_time: float, repeat: int) -> float:
+    """
+    Best of `repeat` runs, each looping for at least `min_time` seconds.
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2
+
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return 1 / best
+
+
+_REFERENCE_PAYLOAD = json.dumps(
+    [{"name": f"feature {i}", "value": i, "tags": ["a", "b"]} for i in range(50)]
+)
+
+
+def reference_workload():
+    """
+    Fixed mix of JSON decoding and dict/str work, used to express results
+    relative to the current speed of the machine.
+    """
+    data = json.loads(_REFERENCE_PAYLOAD)
+    return sorted((item["name"].upper(), item["value"]) for item in data)
+
+
+def allocated_kb(fn) -> float:
+    """
+    Peak memory allocated during one call, in KiB.
+    """
+    fn()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return (peak - before) / 1024
+
+
+def run(cases: list, min_time: float, repeat: int, only: set = None) -> dict:
+    """
+    ops/s, ops relative to the reference workload measured just before
+    (compared against the baseline, so machine speed drift cancels out)
+    and peak allocation of every case and stage (or of the `only` names).
+    """
+    results = {}
+    for case in cases:
+        for stage in ("parse", "classify"):
+            if only is not None and f"{case['name']}/{stage}" not in only:
+                continue
+            fn = case[stage]
+            reference = ops_per_second(reference_workload, min_time, repeat)
+            ops = ops_per_second(fn, min_time, repeat)
+            results[f"{case['name']}/{stage}"] = {
+                "ops": round(ops, 1),
+                "relative": round(ops / reference, 5),
+                "alloc_kb": round(allocated_kb(fn), 2),
+                "bytes": case["size"],
+            }
+    return results
+
+
+def compare(
+    results: dict, baseline: dict, threshold: float, verbose: bool = True
+) -> list:
+    """
+    Compare each case with the baseline (printing it when `verbose`) and
+    return the regressions.
+    """
+    regressions = []
+    output = print if verbose else (lambda *args: None)
+    output(f"{'case':48} {'ops/s':>11} {'Δ ops':>8} {'alloc KiB':>10} {'Δ alloc':>8}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            output(
+                f"{name:48} {result['ops']:>11.0f} {'new':>8} {result['alloc_kb']:>10.1f}"
+            )
+            continue
+        ops_delta = result["relative"] / base["relative"] - 1
+        alloc_delta = (
+            result["alloc_kb"] / base["alloc_kb"] - 1 if base["alloc_kb"] else 0.0
+        )
+        slower = ops_delta < -threshold
+        heavier = (
+            alloc_delta > threshold
+            and result["alloc_kb"] - base["alloc_kb"] > ALLOC_TOLERANCE_KB
+        )
+        flag = "  REGRESSION" if slower or heavier else ""
+        output(
+            f"{name:48} {result['ops']:>11.0f} {ops_delta:>+8.0%} "
+            f"{result['alloc_kb']:>10.1f} {alloc_delta:>+8.0%}{flag}"
+        )
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "platform": platform.platform(terse=True),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--large", type=int, default=50, help="large FEATURE_COUNT")
+    parser.add_argument("--cantons", help="comma separated codes (default: active)")
+    parser.add_argument("--threshold", type=float, default=0.3, help="e.g. 0.3")
+    parser.add_argument("--min-time", type=float, default=0.05, help="s per run")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--retries", type=int, default=3, help="re-measure suspected regressions"
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    cantons = (
+        {code.strip().upper() for code in args.cantons.split(",")}
+        if args.cantons
+        else None
+    )
+    cases = build_cases(args.large, cantons)
+    results = run(cases, args.min_time, args.repeat)
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"environment": environment(), "cases": results}
+        args.baseline.write_text(json.dumps(payload, indent=2) + "\n")
+        print(f"Baseline of {len(results)} cases written to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}, run with --save-baseline first")
+        return 1
+
+    stored = json.loads(args.baseline.read_text())
+    if stored["environment"] != environment():
+        print(f"Note: baseline recorded on {stored['environment']}")
+
+    # Timing noise: keep the best of a few runs of the suspected regressions
+    suspects = compare(results, stored["cases"], args.threshold, verbose=False)
+    for _ in range(args.retries):
+        if not suspects:
+            break
+        rerun = run(cases, args.min_time, args.repeat, only=set(suspects))
+        for name, result in rerun.items():
+            if result["relative"] > results[name]["relative"]:
+                results[name].update(ops=result["ops"], relative=result["relative"])
+        suspects = compare(results, stored["cases"], args.threshold, verbose=False)
+
+    regressions = compare(results, stored["cases"], args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} case(s) regressed beyond {args.threshold:.0%}")
+        return 1
+    print(f"\nNo regression beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
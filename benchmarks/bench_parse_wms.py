@@ -0,0 +1,110 @@
+"""
+Benchmark the single-pass GML parser against the previous full-tree parser
+on the tests/data/wms fixtures.
+
+    uv run python benchmarks/bench_parse_wms.py [--number 200]
+"""
+
+import argparse
+import re
+import sys
+import timeit
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from lxml import etree
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from drillapi.cantons_configuration.cantons import CANTONS  # noqa: E402
+from drillapi.services.processing import parse_wms_getfeatureinfo  # noqa: E402
+
+FIXTURES = {
+    "getfeatureinfo_ju.gml": "JU",
+    "getfeatureinfo_featuremember.gml": "ZH",
+    "getfeatureinfo_zh_name.gml": "ZH",
+}
+
+
+def legacy_parse_wms_getfeatureinfo(content: bytes, info_format: str, config: dict):
+    """
+    The GML branch of the parser before the single-pass rewrite.
+    """
+    text = content.decode("utf-8", errors="ignore")
+    try:
+        root = etree.fromstring(text.encode("utf-8"))
+    except Exception:
+        root = ET.fromstring(text)
+
+    features = []
+    ns = {"gml": "http://www.opengis.net/gml"}
+
+    for fm in root.findall(".//gml:featureMember", ns):
+        fdict = {}
+        for el in fm.iter():
+            tag = el.tag.split("}", 1)[-1]
+            if tag.lower() in ("boundedby", "geometry", "polygon", "multipolygon"):
+                continue
+            if el.text and el.text.strip():
+                fdict[tag] = el.text.strip()
+        if fdict:
+            features.append(fdict)
+
+    for elem in root.iter():
+        if re.search(r"_feature$", elem.tag):
+            fdict = {}
+            for child in elem:
+                tag = child.tag.split("}", 1)[-1]
+                if tag.lower() in ("boundedby", "geometry"):
+                    continue
+                val = child.text.strip() if child.text else None
+                if val:
+                    fdict[tag] = val
+            if fdict:
+                features.append(fdict)
+
+    if not features and config["name"] == "ZH":
+        name_elem = root.find(".//gml:name", ns)
+        if name_elem is not None and name_elem.text and name_elem.text.strip():
+            features.append({"name": name_elem.text.strip()})
+    return features
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    configs = CANTONS["cantons_configurations"]
+    print(
+        f"{'fixture':40} {'size':>9} {'legacy ops/s':>13} {'new ops/s':>11} {'speedup':>8}"
+    )
+
+    for fixture, code in FIXTURES.items():
+        content = (ROOT / "tests/data/wms" / fixture).read_bytes()
+        config = configs[code]
+        info_format = config["info_format"]
+        names = {layer["property_name"] for layer in config["layers"]}
+
+        legacy = legacy_parse_wms_getfeatureinfo(content, info_format, config)
+        new = parse_wms_getfeatureinfo(content, info_format, config)
+        projected = [{k: v for k, v in f.items() if k in names} for f in legacy]
+        assert new == projected, (fixture, new, projected)
+
+        legacy_time = timeit.timeit(
+            lambda: legacy_parse_wms_getfeatureinfo(content, info_format, config),
+            number=args.number,
+        )
+        new_time = timeit.timeit(
+            lambda: parse_wms_getfeatureinfo(content, info_format, config),
+            number=args.number,
+        )
+        print(
+            f"{fixture:40} {len(content):>9} {args.number / legacy_time:>13.0f} "
+            f"{args.number / new_time:>11.0f} {legacy_time / new_time:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Response corpora for the benchmarks: the recorded tests/data fixtures, and
+synthetic GetFeatureInfo / ESRI responses built from each canton's
+configuration (layer and property names, configured values) so that every
+canton and info_format can be exercised offline.
+"""
+
+import json
+import random
+import re
+import sys
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from drillapi.cantons_configuration.cantons import CANTONS  # noqa: E402
+
+DATA_DIR = ROOT / "tests/data"
+
+# Recorded cantonal responses replayed as-is
+WMS_FIXTURES = {
+    "JU": DATA_DIR / "wms/getfeatureinfo_ju.gml",
+    "ZH": DATA_DIR / "wms/getfeatureinfo_featuremember.gml",
+}
+ESRI_IDENTIFY_FIXTURES = {"FR": DATA_DIR / "esri/identify_fr.json"}
+GEOADMIN_FIXTURE = DATA_DIR / "geoadmin/canton_identify_ju.json"
+
+GML_MEDIA_TYPE = "application/vnd.ogc.gml"
+JSON_MEDIA_TYPE = "application/json"
+
+
+def active_cantons() -> dict:
+    return {
+        code: config
+        for code, config in CANTONS["cantons_configurations"].items()
+        if config.get("active")
+    }
+
+
+def format_family(info_format: str) -> str:
+    """
+    'gml', 'geojson' (geo+json and json FeatureCollections) or 'arcgis'.
+    """
+    info_format = info_format.lower()
+    if "arcgis" in info_format:
+        return "arcgis"
+    if "json" in info_format:
+        return "geojson"
+    return "gml"
+
+
+# ============================================================
+# FEATURE SELECTION
+# ============================================================
+def layer_values(config: dict) -> list:
+    """
+    (layer, source value, harmonized value) for every configured value.
+    Layers without values are matched on presence (value None).
+    """
+    choices = []
+    for layer in config["layers"]:
+        values = layer.get("property_values")
+        if values:
+            for value in values:
+                choices.append(
+                    (layer, value["name"], value.get("target_harmonized_value"))
+                )
+        else:
+            choices.append((layer, None, layer.get("target_harmonized_value")))
+    return choices
+
+
+def pick_features(
+    config: dict, feature_count: int, harmonized=None, rng: random.Random = None
+) -> list:
+    """
+    `feature_count` (layer, value) pairs, the first one yielding `harmonized`
+    when the configuration allows it. Harmonized value 4 means no feature.
+    """
+    if harmonized == 4 or feature_count <= 0:
+        return []
+    rng = rng or random.Random(0)
+    choices = layer_values(config)
+    first = next((c for c in choices if c[2] == harmonized), choices[0])
+    return [first[:2]] + [rng.choice(choices)[:2] for _ in range(feature_count - 1)]
+
+
+def _ring(x: float, y: float, vertices: int) -> list:
+    rng = random.Random(f"{x},{y},{vertices}")
+    return [
+        [round(x + rng.uniform(-50, 50), 2), round(y + rng.uniform(-50, 50), 2)]
+        for _ in range(vertices)
+    ]
+
+
+# ============================================================
+# RENDERING PER FORMAT
+# ============================================================
+def _xml_name(name: str) -> str:
+    name = re.sub(r"[^\w.-]", "_", name)
+    return name if re.match(r"[A-Za-z_]", name) else f"_{name}"
+
+
+def render_gml(picks: list, x: float, y: float, vertices: int = 32) -> bytes:
+    members = []
+    for index, (layer, value) in enumerate(picks):
+        tag = f"qgs:{_xml_name(layer['name'])}"
+        ring = _ring(x + index, y, vertices)
+        coordinates = " ".join(f"{px},{py}" for px, py in ring + ring[:1])
+        members.append(f"""  <gml:featureMember>
+    <{tag} fid="{index}">
+      <gml:boundedBy><gml:Box srsName="EPSG:2056"><gml:coordinates>{x - 50},{y - 50} {x + 50},{y + 50}</gml:coordinates></gml:Box></gml:boundedBy>
+      <qgs:geometry><gml:Polygon srsName="EPSG:2056"><gml:outerBoundaryIs><gml:LinearRing><gml:coordinates cs="," ts=" ">{coordinates}</gml:coordinates></gml:LinearRing></gml:outerBoundaryIs></gml:Polygon></qgs:geometry>
+      <qgs:objectid>{index}</qgs:objectid>
+      <qgs:{_xml_name(layer['property_name'])}>{escape(str(value))}</qgs:{_xml_name(layer['property_name'])}>
+    </{tag}>
+  </gml:featureMember>""")
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<wfs:FeatureCollection xmlns:wfs="http://www.opengis.net/wfs" '
+        'xmlns:gml="http://www.opengis.net/gml" xmlns:qgs="http://qgis.org/gml">\n'
+        + "\n".join(members)
+        + "\n</wfs:FeatureCollection>\n"
+    ).encode("utf-8")
+
+
+def render_geojson(picks: list, x: float, y: float, vertices: int = 32) -> bytes:
+    features = []
+    for index, (layer, value) in enumerate(picks):
+        properties = {"objectid": index}
+        if value is None:
+            # Presence-only layers are matched on the feature's layerName
+            layer_name = layer["property_name"]
+        else:
+            layer_name = layer["name"]
+            properties[layer["property_name"]] = value
+        ring = _ring(x + index, y, vertices)
+        features.append(
+            {
+                "type": "Feature",
+                "id": index,
+                "layerName": layer_name,
+                "properties": properties,
+                "geometry": {"type": "Polygon", "coordinates": [ring + ring[:1]]},
+            }
+        )
+    return json.dumps({"type": "FeatureCollection", "features": features}).encode()
+
+
+def render_esri_query(picks: list, layer_id) -> bytes:
+    features = [
+        {"attributes": {"OBJECTID": index, layer["property_name"]: value}}
+        for index, (layer, value) in enumerate(picks)
+        if layer.get("id") == layer_id
+    ]
+    return json.dumps({"features": features}).encode()
+
+
+def render_esri_identify(picks: list) -> bytes:
+    results = [
+        {
+            "layerId": layer.get("id"),
+            "layerName": layer["name"],
+            "attributes": {"OBJECTID": index, layer["property_name"]: value},
+        }
+        for index, (layer, value) in enumerate(picks)
+    ]
+    return json.dumps({"results": results}).encode()
+
+
+def render(config: dict, picks: list, x: float, y: float, vertices: int = 32):
+    """
+    (media type, body) of a GetFeatureInfo answer in the canton's format.
+    ESRI cantons get an /identify body (see render_esri_query for /query).
+    """
+    family = format_family(config["info_format"])
+    if family == "gml":
+        return GML_MEDIA_TYPE, render_gml(picks, x, y, vertices)
+    if family == "geojson":
+        return JSON_MEDIA_TYPE, render_geojson(picks, x, y, vertices)
+    return JSON_MEDIA_TYPE, render_esri_identify(picks)
+
+
+def fixture_response(code: str):
+    """
+    Recorded GetFeatureInfo body of a canton, or None.
+    """
+    path = WMS_FIXTURES.get(code)
+    return path.read_bytes() if path else None
+
+
+def geoadmin_identify(code: str, geometry: bool = True) -> bytes:
+    """
+    geo.admin.ch identify answer for a canton, based on the recorded one
+    (which carries the full canton geometry unless returnGeometry=false).
+    """
+    payload = json.loads(GEOADMIN_FIXTURE.read_text(encoding="utf-8"))
+    result = payload["results"][0]
+    result["attributes"]["ak"] = code
+    if not geometry:
+        result.pop("geometry", None)
+    return json.dumps({"results": [result]}).encode()
@@ -0,0 +1,209 @@
+"""
+Offline load test: drive the real app (in-process, over ASGI) against local
+stand-ins for geo.admin.ch and every active cantonal service, and report
+throughput and latency percentiles.
+
+    uv run python benchmarks/loadtest.py --concurrency 50 --duration 30 \\
+        --latency 80 --jitter 30 --failure-rate 0.01 --json results.json
+
+Each canton gets its own stand-in server (its own host:port), so per-host
+connection limits and circuit breakers behave as in production. Recorded
+tests/data fixtures are replayed where a canton has one (--no-replay to
+synthesize every answer). Requests cycle through the cantons' ground control
+points. The result cache is off unless --cache is given.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+
+import httpx
+
+import corpus
+import standins
+
+from drillapi.app import app  # noqa: E402
+from drillapi.config import settings  # noqa: E402
+from drillapi.services import circuit_breaker, http_client, stats  # noqa: E402
+from drillapi.services.security import limiter  # noqa: E402
+
+
+def control_points(cantons: dict) -> dict:
+    """
+    (x, y) -> (canton code, expected harmonized value)
+    """
+    points = {}
+    for code, config in cantons.items():
+        for point in config.get("ground_control_point", []):
+            points[(round(point[0]), round(point[1]))] = (code, point[2])
+    return points
+
+
+async def start_standins(args, cantons: dict, points: dict):
+    """
+    Start the stand-in servers and point the app at them.
+    """
+    geoadmin = await standins.StandInServer(
+        standins.geoadmin_handler(points),
+        latency=args.geoadmin_latency / 1000,
+        jitter=args.jitter / 1000,
+        seed=args.seed,
+    ).start()
+    settings.GEOADMIN_IDENTIFY_URL = (
+        f"{geoadmin.url}/rest/services/ech/MapServer/identify"
+    )
+
+    servers = {"geo.admin.ch": geoadmin}
+    for index, (code, config) in enumerate(cantons.items()):
+        server = await standins.StandInServer(
+            standins.canton_handler(code, config, points, replay=args.replay),
+            latency=args.latency / 1000,
+            jitter=args.jitter / 1000,
+            failure_rate=args.failure_rate,
+            seed=args.seed + index + 1,
+        ).start()
+        suffix = (
+            "/rest"
+            if corpus.format_family(config["info_format"]) == "arcgis"
+            else "/wms"
+        )
+        config["query_url"] = f"{server.url}{suffix}"
+        servers[code] = server
+    return servers
+
+
+async def run_load(client, points: list, args):
+    rng = random.Random(args.seed)
+    latencies = []
+    per_canton = defaultdict(list)
+    statuses = Counter()
+    sent = 0
+    deadline = time.perf_counter() + args.duration
+
+    async def worker(record: bool, budget: int):
+        nonlocal sent
+        while sent < budget and time.perf_counter() < deadline:
+            sent += 1
+            x, y, code = rng.choice(points)
+            start = time.perf_counter()
+            try:
+                resp = await client.get(f"/v1/drill-category/{x}/{y}")
+                status = resp.status_code
+            except httpx.HTTPError:
+                status = "error"
+            elapsed = (time.perf_counter() - start) * 1000
+            if record:
+                latencies.append(elapsed)
+                per_canton[code].append(elapsed)
+                statuses[status] += 1
+
+    # Warm-up: open upstream connections, fill latency trackers
+    await asyncio.gather(*(worker(False, args.warmup) for _ in range(args.concurrency)))
+    sent = 0
+    deadline = time.perf_counter() + args.duration
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(worker(True, args.requests) for _ in range(args.concurrency))
+    )
+    elapsed = time.perf_counter() - started
+    return latencies, per_canton, statuses, elapsed
+
+
+def _round(summary: dict) -> dict:
+    return {k: round(v, 2) if isinstance(v, float) else v for k, v in summary.items()}
+
+
+async def main_async(args):
+    cantons = corpus.active_cantons()
+    if args.cantons:
+        wanted = {code.strip().upper() for code in args.cantons.split(",")}
+        cantons = {code: config for code, config in cantons.items() if code in wanted}
+    points = control_points(cantons)
+
+    settings.CACHE_ENABLED = args.cache
+    settings.CANTON_LOOKUP = "remote"
+    limiter.enabled = False
+    circuit_breaker.reset()
+    http_client.reset_stats()
+
+    servers = await start_standins(args, cantons, points)
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://drillapi", timeout=60
+        ) as client:
+            latencies, per_canton, statuses, elapsed = await run_load(
+                client, [(x, y, code) for (x, y), (code, _) in points.items()], args
+            )
+    finally:
+        await http_client.shutdown()
+        for server in servers.values():
+            await server.stop()
+
+    report = {
+        "requests": len(latencies),
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "statuses": {str(k): v for k, v in sorted(statuses.items(), key=str)},
+        "latency_ms": _round(stats.summarize(latencies)),
+        "cantons": {
+            code: _round(stats.summarize(values))
+            for code, values in sorted(per_canton.items())
+        },
+        "upstream": http_client.upstream_stats(),
+        "circuit_breakers": circuit_breaker.snapshot(),
+        "options": vars(args),
+    }
+    return report
+
+
+def print_report(report: dict):
+    latency = report["latency_ms"]
+    print(
+        f"{report['requests']} requests in {report['duration_s']} s "
+        f"-> {report['throughput_rps']} req/s  statuses {report['statuses']}"
+    )
+    print(
+        f"latency ms  p50 {latency['p50']}  p95 {latency['p95']}  "
+        f"p99 {latency['p99']}  max {latency['max']}"
+    )
+    print(f"\n{'canton':8} {'count':>6} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for code, summary in report["cantons"].items():
+        print(
+            f"{code:8} {summary['count']:>6} {summary['p50']:>9} "
+            f"{summary['p95']:>9} {summary['p99']:>9}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--requests", type=int, default=10**9, help="request cap")
+    parser.add_argument("--warmup", type=int, default=50, help="requests")
+    parser.add_argument("--latency", type=float, default=50.0, help="cantonal ms")
+    parser.add_argument("--geoadmin-latency", type=float, default=20.0, help="ms")
+    parser.add_argument("--jitter", type=float, default=10.0, help="ms")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--cantons", help="comma separated codes (default: active)")
+    parser.add_argument("--cache", action="store_true", help="enable result cache")
+    parser.add_argument("--no-replay", dest="replay", action="store_false")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
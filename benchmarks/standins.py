@@ -0,0 +1,164 @@
+"""
+Local stand-ins for geo.admin.ch identify and the cantonal WMS / ESRI
+services, serving the benchmark corpus over plain HTTP/1.1 (keep-alive)
+with configurable latency, jitter and failure rate.
+"""
+
+import asyncio
+import random
+from urllib.parse import parse_qsl, urlsplit
+
+import corpus
+
+REASONS = {200: "OK", 404: "Not Found", 503: "Service Unavailable"}
+# Client went away mid-request
+DISCONNECTS = (ConnectionError, asyncio.IncompleteReadError)
+
+
+class StandInServer:
+    """
+    Minimal asyncio HTTP server: `handler(path, params)` returns
+    (status, media type, body). Each answer is delayed by a normal draw of
+    `latency` ± `jitter` seconds and fails with 503 at `failure_rate`.
+    """
+
+    def __init__(self, handler, latency=0.0, jitter=0.0, failure_rate=0.0, seed=0):
+        self.handler = handler
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.failures = 0
+        self._server = None
+        self.url = ""
+
+    async def start(self, host: str = "127.0.0.1"):
+        self._server = await asyncio.start_server(self._serve, host, 0)
+        port = self._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{port}"
+        return self
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def _delay(self) -> float:
+        if not self.latency and not self.jitter:
+            return 0.0
+        return max(0.0, self.rng.gauss(self.latency, self.jitter))
+
+    async def _serve(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                _, target, _ = request_line.decode("latin-1").split(" ", 2)
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+
+                self.requests += 1
+                await asyncio.sleep(self._delay())
+                if self.rng.random() < self.failure_rate:
+                    self.failures += 1
+                    status, media_type, body = 503, "text/plain", b"unavailable"
+                else:
+                    url = urlsplit(target)
+                    status, media_type, body = self.handler(
+                        url.path, dict(parse_qsl(url.query))
+                    )
+
+                writer.write(
+                    (
+                        f"HTTP/1.1 {status} {REASONS.get(status, 'OK')}\r\n"
+                        f"Content-Type: {media_type}\r\n"
+                        f"Content-Length: {len(body)}\r\n"
+                        "Connection: keep-alive\r\n\r\n"
+                    ).encode("latin-1")
+                    + body
+                )
+                await writer.drain()
+        except DISCONNECTS:
+            pass
+        finally:
+            writer.close()
+
+
+def _point(value: str):
+    x, y = value.split(",")[:2]
+    return round(float(x)), round(float(y))
+
+
+def _bbox_center(value: str):
+    minx, miny, maxx, maxy = (float(v) for v in value.split(","))
+    return round((minx + maxx) / 2), round((miny + maxy) / 2)
+
+
+# ============================================================
+# HANDLERS
+# ============================================================
+def geoadmin_handler(points: dict):
+    """
+    geo.admin.ch identify: the canton of a known control point.
+    `points` maps (x, y) to (canton code, harmonized value).
+    """
+    codes = {code for code, _ in points.values()}
+    bodies = {
+        geometry: {code: corpus.geoadmin_identify(code, geometry) for code in codes}
+        for geometry in (True, False)
+    }
+    empty = b'{"results": []}'
+
+    def handle(path, params):
+        match = points.get(_point(params.get("geometry", "0,0")))
+        geometry = params.get("returnGeometry", "true").lower() != "false"
+        body = bodies[geometry][match[0]] if match else empty
+        return 200, corpus.JSON_MEDIA_TYPE, body
+
+    return handle
+
+
+def canton_handler(code: str, config: dict, points: dict, replay: bool = True):
+    """
+    WMS GetFeatureInfo or ESRI /query and /identify of one canton. Recorded
+    fixtures are replayed when available; otherwise the answer is synthesized
+    to yield the control point's harmonized value.
+    """
+    fixture = corpus.fixture_response(code) if replay else None
+    identify_path = corpus.ESRI_IDENTIFY_FIXTURES.get(code) if replay else None
+    identify_fixture = identify_path.read_bytes() if identify_path else None
+    picks = {
+        point: corpus.pick_features(config, 1, harmonized)
+        for point, (point_code, harmonized) in points.items()
+        if point_code == code
+    }
+    default_picks = corpus.pick_features(config, 1)
+    family = corpus.format_family(config["info_format"])
+
+    def handle(path, params):
+        if family == "arcgis":
+            point = _point(params.get("geometry", "0,0"))
+            chosen = picks.get(point, default_picks)
+            if path.endswith("/identify"):
+                if identify_fixture:
+                    return 200, corpus.JSON_MEDIA_TYPE, identify_fixture
+                return 200, corpus.JSON_MEDIA_TYPE, corpus.render_esri_identify(chosen)
+            layer_id = path.rstrip("/").split("/")[-2]
+            layer_id = int(layer_id) if layer_id.isdigit() else layer_id
+            return (
+                200,
+                corpus.JSON_MEDIA_TYPE,
+                corpus.render_esri_query(chosen, layer_id),
+            )
+
+        if fixture is not None:
+            return 200, corpus.GML_MEDIA_TYPE, fixture
+        point = _bbox_center(params.get("BBOX", "0,0,0,0"))
+        media_type, body = corpus.render(
+            config, picks.get(point, default_picks), *point
+        )
+        return 200, media_type, body
+
+    return handle
@@ -1,36 +1,97 @@
-from pathlib import Path
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
-from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
-from .routes import drill_category, cantons, checker
+from .routes import (
+    drill_category,
+    cantons,
+    grid,
+    jobs as jobs_route,
+    readiness,
+    metrics as metrics_route,
+)
 from .services.security import limiter, rate_limit_handler, RateLimitExceeded
+from .services import cache, http_client, metrics
 from .config import settings
+from . import jobs, warmup
 
-app = FastAPI()
 
-# CORS configuration
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.ALLOWED_ORIGINS,
-    allow_credentials=True,
-    allow_methods=["GET"],
-    allow_headers=["*"],
-)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pooled upstream client shared by all requests
+    await http_client.startup()
+    # Cache warming in the background; /ready reports when it is done
+    warmup.start()
+    # Bulk jobs left unfinished by the previous run resume
+    jobs.start()
+    yield
+    await jobs.stop()
+    await warmup.stop()
+    await http_client.shutdown()
+    cache.close_shared_client()
+
+
+def add_html_routes(app: FastAPI):
+    """
+    Index page and checker. Jinja2 and the checker are imported here only,
+    keeping them off the import path of apps built without HTML routes.
+    """
+    from fastapi.templating import Jinja2Templates
+    from .routes import checker
+
+    app.include_router(checker.router)
 
-# Routers
-app.include_router(drill_category.router)
-app.include_router(cantons.router)
-app.include_router(checker.router)
+    templates = Jinja2Templates(directory=str(settings.TEMPLATES_DIR))
 
-# Limiter
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, rate_limit_handler)
+    @app.get("/")
+    async def root(request: Request):
+        return templates.TemplateResponse(
+            "index.html",
+            {"request": request, "docs_url": "/docs", "redoc_url": "/redoc"},
+        )
 
-templates = Jinja2Templates(directory=str(settings.TEMPLATES_DIR))
 
+def create_app(include_html: bool = True, include_jobs: bool = True) -> FastAPI:
+    """
+    Build the API. `include_html=False` leaves out the index page and the
+    checker (used by the Lambda handler to cut cold-start imports).
+    `include_jobs=False` leaves out bulk jobs, which need a long-running
+    server to run in the background and resume on restart.
+    """
+    app = FastAPI(lifespan=lifespan)
 
-@app.get("/")
-async def root(request: Request):
-    return templates.TemplateResponse(
-        "index.html", {"request": request, "docs_url": "/docs", "redoc_url": "/redoc"}
+    # CORS configuration
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.ALLOWED_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["GET", "POST"],
+        allow_headers=["*"],
     )
+
+    # Request counts, durations and response sizes per route
+    app.add_middleware(metrics.MetricsMiddleware)
+
+    # Routers
+    app.include_router(drill_category.router)
+    app.include_router(grid.router)
+    if include_jobs:
+        app.include_router(jobs_route.router)
+    app.include_router(cantons.router)
+    app.include_router(metrics_route.router)
+    app.include_router(readiness.router)
+    if include_html:
+        add_html_routes(app)
+
+    # Limiter
+    app.state.limiter = limiter
+    app.add_exception_handler(RateLimitExceeded, rate_limit_handler)
+    return app
+
+
+def __getattr__(name: str):
+    # The full app is built on first access to `drillapi.app.app`, so that
+    # importing create_app alone does not build (and import) the HTML routes
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -882,6 +882,11 @@ CANTONS = {
             "cantonal_energy_service_url": "https://www.ge.ch/gestion-du-sous-sol",
             "wms_url": "https://app2.ge.ch/tergeoservices/rest/services/Hosted/GOL_EXPLOITATION_GEOTHERMIE/MapServer/WmsServer",
             "query_url": "https://app2.ge.ch/tergeoservices/rest/services/Hosted/GOL_EXPLOITATION_GEOTHERMIE/FeatureServer",
+            # Grids fetch the layers over their extent from the same /query endpoint
+            "area_fetch": {
+                "format": "esri",
+                "url": "https://app2.ge.ch/tergeoservices/rest/services/Hosted/GOL_EXPLOITATION_GEOTHERMIE/FeatureServer",
+            },
             "legend_url": "",
             "style": "",
             "thematic_geoportal_url": "https://map.sitg.ge.ch/app/?mapresources=GEOTHERMIE",
@@ -928,6 +933,11 @@ CANTONS = {
             "cantonal_energy_service_url": "https://www.fr.ch/energie-agriculture-et-environnement/energie",
             "wms_url": "https://map.geo.fr.ch/arcgis/services/PortailCarto/Theme_environnement/MapServer/WmsServer",
             "query_url": "https://map.geo.fr.ch/arcgis/rest/services/PortailCarto/Theme_environnement/MapServer",
+            # Grids fetch the layers over their extent from the same /query endpoint
+            "area_fetch": {
+                "format": "esri",
+                "url": "https://map.geo.fr.ch/arcgis/rest/services/PortailCarto/Theme_environnement/MapServer",
+            },
             "legend_url": "https://map.geo.fr.ch/arcgis/services/PortailCarto/Theme_environnement/MapServer/WmsServer?SERVICE=WMS&VERSION=1.1.3&REQUEST=GetLegendGraphic&FORMAT=image/png&LAYER=Admissibilite_des_sondes_geothermiques_SGV37370",
             "thematic_geoportal_url": "https://map.geo.fr.ch/?share=a526a596-5cde-491e-b22d-6d692e78f25b",
             "info_format": "arcgis/json",
@@ -0,0 +1,89 @@
+import hashlib
+import json
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping
+
+from .cantons import CANTONS
+from ..services.text import normalized_variants
+
+# ============================================================
+# COMPILED CANTON CONFIGURATIONS
+# ============================================================
+# The CANTONS dict is compiled once at import into immutable lookup tables
+# used by processing.process_ground_category. Configuration errors are
+# raised here, at startup, instead of in the middle of a request.
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledLayer:
+    name: str
+    property_name: str
+    # Raw attribute value → ((target_harmonized_value, desc), ...).
+    # None for layers matched on presence (layerName == property_name).
+    values: Mapping[str, tuple] | None
+    target_harmonized_value: int | None
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledCanton:
+    code: str
+    layers: tuple
+    # Version id of the source configuration (changes whenever it is edited)
+    config_version: str
+
+
+def config_version(config) -> str:
+    payload = json.dumps(config, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:12]
+
+
+def _compile_layer(layer: dict, where: str) -> CompiledLayer:
+    name = layer.get("name")
+    property_name = layer.get("property_name")
+    if not name or not property_name:
+        raise ValueError(f"{where}: layer needs 'name' and 'property_name'")
+
+    property_values = layer.get("property_values")
+    if not property_values:
+        target = layer.get("target_harmonized_value")
+        if not isinstance(target, int):
+            raise ValueError(
+                f"{where}: layer '{name}' without property_values needs an integer "
+                "'target_harmonized_value'"
+            )
+        return CompiledLayer(name, property_name, None, target)
+
+    values = {}
+    for item in property_values:
+        item_name = item.get("name")
+        target = item.get("target_harmonized_value")
+        if not isinstance(item_name, str) or not isinstance(target, int):
+            raise ValueError(
+                f"{where}: layer '{name}' has an invalid property value {item!r}"
+            )
+        # Duplicate names accumulate, as every matching entry counts
+        for raw in normalized_variants(item_name):
+            values[raw] = values.get(raw, ()) + ((target, item.get("desc")),)
+
+    return CompiledLayer(name, property_name, MappingProxyType(values), None)
+
+
+def compile_layers(layers: list, code: str = "") -> tuple:
+    return tuple(_compile_layer(layer, f"Canton {code}") for layer in layers or [])
+
+
+def compile_canton(code: str, config: dict) -> CompiledCanton:
+    return CompiledCanton(
+        code, compile_layers(config.get("layers"), code), config_version(config)
+    )
+
+
+def compile_cantons(configurations: dict) -> Mapping[str, CompiledCanton]:
+    return MappingProxyType(
+        {code: compile_canton(code, config) for code, config in configurations.items()}
+    )
+
+
+COMPILED_CANTONS = compile_cantons(CANTONS["cantons_configurations"])
+CANTONS_VERSION = config_version(CANTONS["cantons_configurations"])
@@ -1,3 +1,4 @@
+import tempfile
 from pathlib import Path
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import List
@@ -13,6 +14,132 @@ class Settings(BaseSettings):
     RATE_LIMIT: str = "1000/minute"
     ALLOWED_ORIGINS: List[str] = ["http://localhost:5173"]
     ENVIRONMENT: str = "production"
+    # Serve the index page and checker from the Lambda handler too
+    LAMBDA_HTML_ROUTES: bool = False
+
+    # Shared upstream HTTP client (geo.admin.ch and cantonal geoservices)
+    UPSTREAM_TIMEOUT: float = 20.0
+    UPSTREAM_MAX_CONNECTIONS: int = 100
+    UPSTREAM_MAX_KEEPALIVE_CONNECTIONS: int = 50
+    UPSTREAM_MAX_CONNECTIONS_PER_HOST: int = 10
+    UPSTREAM_KEEPALIVE_EXPIRY: float = 60.0
+    UPSTREAM_HTTP2: bool = True
+    # Adaptive timeouts (p99 x multiplier) and hedging (past p95)
+    UPSTREAM_LATENCY_SAMPLES: int = 200
+    UPSTREAM_LATENCY_MIN_SAMPLES: int = 20
+    UPSTREAM_TIMEOUT_MULTIPLIER: float = 3.0
+    UPSTREAM_TIMEOUT_MIN: float = 1.0
+    UPSTREAM_HEDGING: bool = True
+    UPSTREAM_HEDGE_MIN_DELAY: float = 0.05
+    # Retries of idempotent GETs, bounded by a global retry budget
+    UPSTREAM_MAX_RETRIES: int = 1
+    UPSTREAM_RETRY_BACKOFF: float = 0.1
+    UPSTREAM_RETRY_BUDGET_RATIO: float = 0.1
+    UPSTREAM_RETRY_BUDGET_MIN: int = 10
+    UPSTREAM_RETRY_BUDGET_MAX: int = 100
+
+    # Circuit breaker per cantonal query_url host
+    BREAKER_ENABLED: bool = True
+    BREAKER_WINDOW: float = 60.0
+    BREAKER_MIN_CALLS: int = 5
+    BREAKER_FAILURE_RATE: float = 0.5
+    BREAKER_SLOW_CALL_SECONDS: float = 10.0
+    BREAKER_OPEN_SECONDS: float = 30.0
+
+    # Canton lookup: "remote" (geo.admin.ch identify) or "local" (boundary index)
+    CANTON_LOOKUP: str = "remote"
+    CANTON_BOUNDARIES_FILE: Path = (
+        BASE_DIR / "drillapi/cantons_configuration/canton_boundaries.geojson"
+    )
+    # Points closer than this to a canton border (metres) are resolved remotely
+    CANTON_BORDER_BUFFER: float = 50.0
+    # geo.admin.ch identify service used by the remote canton lookup
+    GEOADMIN_IDENTIFY_URL: str = (
+        "https://api3.geo.admin.ch/rest/services/ech/MapServer/identify"
+    )
+
+    # Drill categories: "live" (cantonal services) or "harvest" (local store
+    # written by `python -m drillapi.harvest`, live for cantons not harvested)
+    DRILL_CATEGORY_SOURCE: str = "live"
+    HARVEST_DIR: Path = BASE_DIR / "drillapi/cantons_configuration/harvest"
+    HARVEST_PAGE_SIZE: int = 1000
+    HARVEST_TIMEOUT: float = 120.0
+
+    # Cache warming on startup, then every WARMUP_INTERVAL seconds (0: once):
+    # ground control points, WARMUP_COORDINATES ([[x, y], ...]) and the
+    # WARMUP_HOT_KEYS most recently used cached coordinates, kept across
+    # restarts in WARMUP_HOT_FILE. /ready answers 503 until a run warmed the
+    # upstream connections and resolved points; failed runs are retried every
+    # WARMUP_RETRY_INTERVAL seconds.
+    WARMUP_ENABLED: bool = False
+    WARMUP_INTERVAL: float = 0.0
+    WARMUP_RETRY_INTERVAL: float = 10.0
+    WARMUP_TIMEOUT: float = 120.0
+    WARMUP_COORDINATES: List[List[float]] = []
+    WARMUP_HOT_KEYS: int = 500
+    WARMUP_HOT_FILE: Path | None = None
+
+    # Cache-Control max-age (seconds) of the /v1/cantons endpoints
+    CANTONS_CACHE_MAX_AGE: int = 3600
+
+    # POST /v1/drill-category/batch
+    BATCH_MAX_SIZE: int = 5000
+    BATCH_CONCURRENCY: int = 50
+
+    # Bulk jobs (POST /v1/jobs): state and results under JOBS_DIR, resumed on
+    # restart. JOBS_MAX_RUNNING jobs run at once, each in chunks of
+    # JOBS_CHUNK_SIZE points with up to JOBS_CONCURRENCY lookups in flight;
+    # new jobs are refused beyond JOBS_MAX_QUEUED unfinished ones. Finished
+    # jobs are deleted after JOBS_RETENTION seconds (checked every
+    # JOBS_CLEANUP_INTERVAL seconds). Uploads are limited to
+    # JOBS_MAX_UPLOAD_BYTES and JOBS_MAX_POINTS points.
+    JOBS_DIR: Path = Path(tempfile.gettempdir()) / "drillapi-jobs"
+    JOBS_MAX_UPLOAD_BYTES: int = 64 * 1024 * 1024
+    JOBS_MAX_POINTS: int = 1_000_000
+    JOBS_MAX_QUEUED: int = 20
+    JOBS_MAX_RUNNING: int = 2
+    JOBS_CONCURRENCY: int = 50
+    JOBS_CHUNK_SIZE: int = 1000
+    JOBS_RETENTION: float = 7 * 86400.0
+    JOBS_CLEANUP_INTERVAL: float = 3600.0
+    # Seconds between progress checks when following the results of a job
+    JOBS_POLL_INTERVAL: float = 0.5
+
+    # GET /v1/drill-category/grid: size limit, and whether the layers of cantons
+    # with an 'area_fetch' service are fetched once per grid instead of point
+    # by point (own timeout, never hedged)
+    GRID_MAX_CELLS: int = 40000
+    GRID_AREA_FETCH: bool = True
+    GRID_AREA_TIMEOUT: float = 60.0
+
+    # /checker concurrency (global and per canton)
+    CHECKER_CONCURRENCY: int = 20
+    CHECKER_CANTON_CONCURRENCY: int = 3
+
+    # In-process result cache (TTL in seconds, per canton via 'cache_ttl')
+    CACHE_ENABLED: bool = True
+    CACHE_TTL: float = 86400.0
+    CACHE_MAX_ENTRIES: int = 100000
+    CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    CACHE_CANTON_TTL: float = 7 * 86400.0
+    # Expired drill categories are served stale (seconds past their TTL): at
+    # once with a background refresh, then only if the cantonal service fails
+    CACHE_STALE_WHILE_REVALIDATE: float = 86400.0
+    CACHE_STALE_IF_ERROR: float = 7 * 86400.0
+    # Grid (metres) used to snap coordinates for the canton lookup cache
+    CACHE_CANTON_RESOLUTION: float = 1.0
+    # Optional persistent tier under both caches (SQLite file, e.g.
+    # /tmp/drillapi-cache.sqlite3 on Lambda or a mounted volume in Docker)
+    CACHE_PERSISTENT_PATH: Path | None = None
+    CACHE_PERSISTENT_MAX_BYTES: int = 512 * 1024 * 1024
+    # Optional tier shared by workers and replicas, on a Redis-protocol store,
+    # e.g. redis://:password@redis:6379/0
+    CACHE_SHARED_URL: str | None = None
+    CACHE_SHARED_PREFIX: str = "drillapi"
+    CACHE_SHARED_TIMEOUT: float = 0.1
+    CACHE_SHARED_MAX_CONNECTIONS: int = 20
+    # Seconds to stay on the local tiers after a shared tier failure
+    CACHE_SHARED_RETRY_AFTER: float = 5.0
 
 
 settings = Settings()
@@ -0,0 +1,300 @@
+"""
+Harvest the cantonal suitability layers into the local polygon store
+(HARVEST_DIR), one GeoJSON file per canton:
+
+    python -m drillapi.harvest                  # every active canton
+    python -m drillapi.harvest --cantons JU,ZH
+
+Each layer is fetched over the canton's extent (canton boundary index, or
+the whole country without it):
+  - ESRI REST cantons (info_format 'arcgis/json'): the layer's /query
+    endpoint as GeoJSON, paged with resultOffset
+  - WMS cantons: WFS GetFeature with GeoJSON output on the same endpoint,
+    paged with STARTINDEX
+  - or a GeoJSON export, set by a 'harvest' entry in the canton
+    configuration: {"format": "geojson", "url": "https://.../{layer}.json"}
+
+A 'harvest' entry can also override the WFS/ESRI 'url' and map layer names
+to WFS 'typenames'. Harmonized values are precomputed from the compiled
+`property_values`; answers are served from the store with
+DRILL_CATEGORY_SOURCE=harvest.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from datetime import datetime, timezone
+
+from .cantons_configuration import cantons
+from .cantons_configuration.compiled import COMPILED_CANTONS, CompiledLayer
+from .config import settings
+from .services import canton_index, http_client
+from .services.harvest_store import store_path
+
+logger = logging.getLogger(__name__)
+
+# EPSG:2056 extent of Switzerland, used without a canton boundary index
+SWISS_EXTENT = (2485000.0, 1075000.0, 2834000.0, 1296000.0)
+
+
+def harvest_format(config: dict) -> str:
+    """
+    'esri', 'wfs' or 'geojson'.
+    """
+    harvest = config.get("harvest") or {}
+    if harvest.get("format"):
+        return harvest["format"]
+    return "esri" if config.get("info_format") == "arcgis/json" else "wfs"
+
+
+def harvest_extent(code: str) -> tuple:
+    index = canton_index.get_index()
+    if index is not None and code in index.bboxes:
+        return index.bboxes[code]
+    return SWISS_EXTENT
+
+
+# ============================================================
+# FETCH PER FORMAT
+# ============================================================
+async def _get_json(
+    url: str, params: dict | None = None, timeout: float | None = None
+) -> dict:
+    # Layer queries are far heavier than point queries: not adaptive
+    resp = await http_client.get(
+        url,
+        params=params,
+        timeout=settings.HARVEST_TIMEOUT if timeout is None else timeout,
+        adaptive=False,
+    )
+    resp.raise_for_status()
+    return json.loads(resp.content)
+
+
+async def fetch_esri_layer(
+    url: str, layer: dict, extent: tuple, timeout: float | None = None
+) -> list:
+    features = []
+    while True:
+        data = await _get_json(
+            f"{url.rstrip('/')}/{layer['id']}/query",
+            {
+                "where": "1=1",
+                "geometry": ",".join(str(v) for v in extent),
+                "geometryType": "esriGeometryEnvelope",
+                "inSR": "2056",
+                "spatialRel": "esriSpatialRelIntersects",
+                "outFields": layer["property_name"],
+                "returnGeometry": "true",
+                "outSR": "2056",
+                "resultOffset": str(len(features)),
+                "resultRecordCount": str(settings.HARVEST_PAGE_SIZE),
+                "f": "geojson",
+            },
+            timeout,
+        )
+        page = data.get("features") or []
+        features.extend(page)
+        more = data.get("exceededTransferLimit") or (data.get("properties") or {}).get(
+            "exceededTransferLimit"
+        )
+        if not page or not more:
+            return features
+
+
+async def fetch_wfs_layer(
+    url: str, typename: str, extent: tuple, timeout: float | None = None
+) -> list:
+    features = []
+    while True:
+        data = await _get_json(
+            url,
+            {
+                "SERVICE": "WFS",
+                "VERSION": "2.0.0",
+                "REQUEST": "GetFeature",
+                "TYPENAMES": typename,
+                "OUTPUTFORMAT": "application/json",
+                "SRSNAME": "urn:ogc:def:crs:EPSG::2056",
+                "BBOX": ",".join(str(v) for v in extent)
+                + ",urn:ogc:def:crs:EPSG::2056",
+                "COUNT": str(settings.HARVEST_PAGE_SIZE),
+                "STARTINDEX": str(len(features)),
+            },
+            timeout,
+        )
+        page = data.get("features") or []
+        features.extend(page)
+        if len(page) < settings.HARVEST_PAGE_SIZE:
+            return features
+
+
+async def fetch_layer(
+    config: dict,
+    layer: dict,
+    extent: tuple,
+    source: dict | None = None,
+    timeout: float | None = None,
+) -> list:
+    """
+    GeoJSON features of one configured layer over the extent, from `source`
+    (same keys as the 'harvest' entry, which is the default).
+    """
+    harvest = (config.get("harvest") or {}) if source is None else source
+    url = harvest.get("url") or config["query_url"]
+    fmt = harvest.get("format") or harvest_format(config)
+
+    if fmt == "esri":
+        return await fetch_esri_layer(url, layer, extent, timeout)
+    if fmt == "wfs":
+        typename = (harvest.get("typenames") or {}).get(layer["name"], layer["name"])
+        return await fetch_wfs_layer(url, typename, extent, timeout)
+    if fmt == "geojson":
+        data = await _get_json(url.format(layer=layer["name"]), timeout=timeout)
+        return data.get("features") or []
+    raise ValueError(f"Unknown harvest format {fmt!r}")
+
+
+# ============================================================
+# HARMONIZATION AND STORE FILES
+# ============================================================
+def harvest_feature(feature: dict, layer: CompiledLayer) -> dict | None:
+    """
+    Store feature: the polygon with its layer, source value and precomputed
+    (harmonized value, description) matches. None for non-polygon features.
+    """
+    geometry = feature.get("geometry") or {}
+    if geometry.get("type") not in ("Polygon", "MultiPolygon"):
+        return None
+
+    value = (feature.get("properties") or {}).get(layer.property_name)
+    if layer.values is None:
+        # Presence-only layer: any feature counts
+        matches = [[layer.target_harmonized_value, None]]
+    else:
+        try:
+            matches = [list(match) for match in layer.values.get(value) or ()]
+        except TypeError:
+            matches = []
+
+    return {
+        "type": "Feature",
+        "geometry": geometry,
+        "properties": {"layer": layer.name, "value": value, "matches": matches},
+    }
+
+
+def check_layer(layer: CompiledLayer, records: list):
+    """
+    Fail when the harvested polygons of a layer cannot be classified: none
+    carries the configured property (e.g. a property read from gml:name in
+    GetFeatureInfo answers, absent from WFS output), or none of its values
+    is configured. Serving such a store would answer category 4 everywhere.
+    """
+    if layer.values is None or not records:
+        if not records:
+            logger.warning("Layer %s harvested no polygons", layer.name)
+        return
+    values = [record["properties"]["value"] for record in records]
+    if all(value is None for value in values):
+        raise ValueError(
+            f"Layer {layer.name}: no harvested feature has the property "
+            f"{layer.property_name!r}"
+        )
+    if not any(record["properties"]["matches"] for record in records):
+        raise ValueError(
+            f"Layer {layer.name}: none of the harvested values of "
+            f"{layer.property_name!r} is configured"
+        )
+
+
+async def harvest_canton(code: str, config: dict) -> dict:
+    """
+    FeatureCollection of all harvested layers of a canton.
+    """
+    compiled = COMPILED_CANTONS[code]
+    extent = harvest_extent(code)
+    fetched = await asyncio.gather(
+        *(fetch_layer(config, layer, extent) for layer in config["layers"])
+    )
+
+    features = []
+    for layer, layer_features in zip(compiled.layers, fetched):
+        records = [
+            record
+            for record in (harvest_feature(f, layer) for f in layer_features)
+            if record is not None
+        ]
+        check_layer(layer, records)
+        features.extend(records)
+
+    return {
+        "type": "FeatureCollection",
+        "drillapi": {
+            "canton": code,
+            "config_version": compiled.config_version,
+            "harvested_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "format": harvest_format(config),
+        },
+        "features": features,
+    }
+
+
+def write_store(code: str, collection: dict):
+    path = store_path(code)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write then rename, so a running server never reads a partial file
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(collection, ensure_ascii=False), encoding="utf-8")
+    tmp.replace(path)
+
+
+async def harvest(codes: list | None = None) -> dict:
+    """
+    Harvest the given (default: active) cantons.
+    Returns {code: feature count, or the error message}.
+    """
+    configs = cantons.CANTONS["cantons_configurations"]
+    if codes is None:
+        codes = [code for code, config in configs.items() if config.get("active")]
+
+    summary = {}
+    await http_client.startup()
+    try:
+        for code in codes:
+            try:
+                collection = await harvest_canton(code, configs[code])
+                write_store(code, collection)
+                summary[code] = len(collection["features"])
+                logger.info("Harvested %d polygons for %s", summary[code], code)
+            except Exception as e:
+                logger.warning("Harvest of %s failed: %s", code, e)
+                summary[code] = f"error: {e}"
+    finally:
+        await http_client.shutdown()
+    return summary
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--cantons", help="comma separated codes (default: active)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    codes = (
+        [code.strip().upper() for code in args.cantons.split(",")]
+        if args.cantons
+        else None
+    )
+    summary = asyncio.run(harvest(codes))
+    for code, result in summary.items():
+        print(f"{code:4} {result}")
+    return 1 if any(isinstance(r, str) for r in summary.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
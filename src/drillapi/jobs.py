@@ -0,0 +1,513 @@
+import asyncio
+import csv
+import io
+import itertools
+import json
+import logging
+import os
+import re
+import shutil
+import time
+import uuid
+from pathlib import Path
+
+from pydantic import ValidationError
+
+from .config import settings
+from .services.ground_category import Coordinate, batch_results
+
+try:
+    import fcntl
+except ImportError:  # optional, jobs are not claimed across processes without it
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+# Statuses of jobs that will not progress any more
+FINISHED = ("completed", "failed")
+
+# Column names accepted in CSV uploads (case-insensitive)
+X_COLUMNS = ("coord_x", "x", "e", "easting")
+Y_COLUMNS = ("coord_y", "y", "n", "northing")
+ID_COLUMNS = ("id",)
+
+# Errors of a missing or damaged job.json
+UNREADABLE = (OSError, ValueError)
+
+# Bytes of results read per streamed block
+STREAM_BLOCK_SIZE = 256 * 1024
+
+
+# ============================================================
+# BULK JOBS
+# ============================================================
+# A job is a directory of JOBS_DIR holding its state (job.json), its input
+# points (points.ndjson, one [x, y, id] line per point) and its results
+# (results.ndjson, one line per point in input order). Points are read and
+# processed chunk by chunk through the batch pipeline; a chunk is committed
+# by appending its lines and recording the new results size in job.json.
+# After a restart, running and queued jobs resume from their last committed
+# chunk.
+#
+# Only one process works on a job: it holds an flock on the job's lock file,
+# released when the process exits.
+
+
+class JobInputError(ValueError):
+    """
+    Upload that cannot be read as points.
+    """
+
+
+# ============================================================
+# INPUT
+# ============================================================
+def _point(x, y, point_id, where: str) -> list:
+    try:
+        coordinate = Coordinate(coord_x=x, coord_y=y)
+    except ValidationError as e:
+        error = e.errors()[0]
+        raise JobInputError(f"{where}: {error['loc'][0]} {error['msg']}")
+    return [coordinate.coord_x, coordinate.coord_y, point_id]
+
+
+def parse_csv(text: str) -> list:
+    """
+    Points of a CSV with a header row: coordinate columns (e.g. coord_x and
+    coord_y, in EPSG:2056) and an optional id column. Separated by commas,
+    semicolons or tabs.
+    """
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.DictReader(io.StringIO(text), dialect=dialect)
+    columns = {name.strip().lower(): name for name in reader.fieldnames or []}
+
+    def column(names):
+        return next((columns[name] for name in names if name in columns), None)
+
+    x_column, y_column, id_column = (
+        column(X_COLUMNS),
+        column(Y_COLUMNS),
+        column(ID_COLUMNS),
+    )
+    if x_column is None or y_column is None:
+        raise JobInputError(
+            "CSV needs coordinate columns, e.g. 'coord_x' and 'coord_y'"
+        )
+
+    return [
+        _point(
+            row[x_column],
+            row[y_column],
+            row[id_column] if id_column else None,
+            f"Row {number}",
+        )
+        for number, row in enumerate(reader, start=2)
+    ]
+
+
+def parse_geojson(data: dict) -> list:
+    """
+    Points of a GeoJSON FeatureCollection (or Feature) of Point geometries in
+    EPSG:2056. Feature ids (or an 'id' property) are kept.
+    """
+    if not isinstance(data, dict):
+        raise JobInputError("GeoJSON must be a FeatureCollection")
+    if data.get("type") == "FeatureCollection":
+        features = data.get("features") or []
+    elif data.get("type") == "Feature":
+        features = [data]
+    else:
+        raise JobInputError("GeoJSON must be a FeatureCollection")
+
+    points = []
+    for number, feature in enumerate(features):
+        geometry = (feature or {}).get("geometry") or {}
+        coordinates = geometry.get("coordinates") or []
+        if geometry.get("type") != "Point" or len(coordinates) < 2:
+            raise JobInputError(f"Feature {number}: geometry must be a Point")
+        point_id = feature.get("id", (feature.get("properties") or {}).get("id"))
+        points.append(
+            _point(coordinates[0], coordinates[1], point_id, f"Feature {number}")
+        )
+    return points
+
+
+def parse_points(body: bytes, fmt: str) -> list:
+    """
+    [x, y, id] of every point of an upload ('csv' or 'geojson').
+    """
+    try:
+        text = body.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise JobInputError("Upload must be UTF-8 encoded")
+
+    if fmt == "csv":
+        points = parse_csv(text)
+    else:
+        try:
+            points = parse_geojson(json.loads(text))
+        except json.JSONDecodeError as e:
+            raise JobInputError(f"Invalid JSON: {e}")
+    if not points:
+        raise JobInputError("No points in upload")
+    return points
+
+
+# ============================================================
+# JOB FILES
+# ============================================================
+class Job:
+    def __init__(self, path: Path, state: dict):
+        self.path = path
+        self.state = state
+        self._lock_fd = None
+
+    @property
+    def id(self) -> str:
+        return self.state["id"]
+
+    @property
+    def results_path(self) -> Path:
+        return self.path / "results.ndjson"
+
+    @classmethod
+    def create(cls, points: list, source: str) -> "Job":
+        job_id = uuid.uuid4().hex
+        path = Path(settings.JOBS_DIR) / job_id
+        path.mkdir(parents=True)
+        with open(path / "points.ndjson", "w") as f:
+            f.writelines(json.dumps(point) + "\n" for point in points)
+        (path / "results.ndjson").touch()
+        job = cls(
+            path,
+            {
+                "id": job_id,
+                "status": "queued",
+                "source": source,
+                "total": len(points),
+                "done": 0,
+                "errors": 0,
+                "results_bytes": 0,
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "error": None,
+            },
+        )
+        job.save()
+        return job
+
+    @classmethod
+    def load(cls, job_id: str) -> "Job | None":
+        path = Path(settings.JOBS_DIR) / job_id
+        try:
+            state = json.loads((path / "job.json").read_text())
+        except UNREADABLE:
+            return None
+        return cls(path, state)
+
+    def save(self):
+        self.state["updated_at"] = time.time()
+        # Write then rename, so readers never see a partial state
+        tmp = self.path / "job.json.tmp"
+        tmp.write_text(json.dumps(self.state))
+        tmp.replace(self.path / "job.json")
+
+    def chunks(self, start: int, size: int):
+        """
+        Lists of up to `size` points, read lazily from index `start` on.
+        """
+        with open(self.path / "points.ndjson", "rb") as f:
+            lines = itertools.islice(f, start, None)
+            while chunk := [json.loads(line) for line in itertools.islice(lines, size)]:
+                yield chunk
+
+    def lock(self) -> bool:
+        """
+        Claim the job for this process; False if another process holds it.
+        """
+        if fcntl is None:
+            return True
+        fd = os.open(self.path / "lock", os.O_CREAT | os.O_RDWR)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    def unlock(self):
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+
+# ============================================================
+# PROCESSING
+# ============================================================
+_active: dict = {}  # job id -> (Job, Task), jobs queued or running here
+_slots: asyncio.Semaphore | None = None
+_slots_loop = None
+
+
+def _running_slots() -> asyncio.Semaphore:
+    """
+    Semaphore of JOBS_MAX_RUNNING, bound to the running event loop.
+    """
+    global _slots, _slots_loop
+
+    loop = asyncio.get_running_loop()
+    if _slots is None or _slots_loop is not loop:
+        _slots = asyncio.Semaphore(settings.JOBS_MAX_RUNNING)
+        _slots_loop = loop
+    return _slots
+
+
+def _is_error(result: dict) -> bool:
+    return result["status"] != "success" or bool(result["result_detail"].get("detail"))
+
+
+def _result_line(index: int, point: list, result: dict) -> bytes:
+    line = {"index": index, "id": point[2], **result}
+    return (json.dumps(line, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+async def process(job: Job):
+    """
+    Run a job from its last committed chunk to the end.
+
+    Points are read one chunk at a time and one chunk is in flight at a
+    time, so memory stays bounded whatever the job size and upstream lookups
+    never exceed JOBS_CONCURRENCY per job.
+    """
+    semaphore = asyncio.Semaphore(settings.JOBS_CONCURRENCY)
+    job.state["status"] = "running"
+    job.state["started_at"] = job.state["started_at"] or time.time()
+    job.save()
+
+    with open(job.results_path, "ab") as f:
+        # Lines of a chunk not committed before a restart are computed again
+        f.truncate(job.state["results_bytes"])
+        for chunk in job.chunks(job.state["done"], settings.JOBS_CHUNK_SIZE):
+            start = job.state["done"]
+            unique = list(dict.fromkeys((x, y) for x, y, _ in chunk))
+            results, _ = await batch_results(unique, semaphore)
+
+            chunk_results = [results[(x, y)] for x, y, _ in chunk]
+            data = b"".join(
+                _result_line(start + i, point, result)
+                for i, (point, result) in enumerate(zip(chunk, chunk_results))
+            )
+            f.write(data)
+            f.flush()
+            job.state["done"] += len(chunk)
+            job.state["errors"] += sum(_is_error(result) for result in chunk_results)
+            job.state["results_bytes"] += len(data)
+            job.save()
+
+    job.state["status"] = "completed"
+    job.state["finished_at"] = time.time()
+    job.save()
+    logger.info(
+        "Job %s completed: %d points, %d errors",
+        job.id,
+        job.state["total"],
+        job.state["errors"],
+    )
+
+
+async def run(job: Job):
+    try:
+        async with _running_slots():
+            await process(job)
+    except asyncio.CancelledError:
+        # Shutdown: the job stays queued or running on disk and resumes on
+        # the next start
+        raise
+    except Exception as e:
+        logger.exception("Job %s failed", job.id)
+        job.state["status"] = "failed"
+        job.state["error"] = str(e)
+        job.state["finished_at"] = time.time()
+        job.save()
+    finally:
+        job.unlock()
+        _active.pop(job.id, None)
+
+
+def _schedule(job: Job):
+    _active[job.id] = (job, asyncio.create_task(run(job)))
+
+
+def submit(points: list, source: str) -> Job:
+    job = Job.create(points, source)
+    job.lock()
+    _schedule(job)
+    return job
+
+
+def active_count() -> int:
+    return len(_active)
+
+
+def get_state(job_id: str) -> dict | None:
+    """
+    State of a job: live for jobs run here, from job.json for the others.
+    """
+    if job_id in _active:
+        return _active[job_id][0].state
+    job = Job.load(job_id)
+    return job.state if job is not None else None
+
+
+# ============================================================
+# RESULTS
+# ============================================================
+def _feature(line: bytes) -> dict:
+    properties = json.loads(line)
+    point_id = properties.pop("id")
+    feature = {
+        "type": "Feature",
+        "geometry": {
+            "type": "Point",
+            "coordinates": [properties["coord_x"], properties["coord_y"]],
+        },
+        "properties": properties,
+    }
+    if point_id is not None:
+        feature["id"] = point_id
+    return feature
+
+
+async def stream_results(job_id: str, fmt: str, follow: bool = False):
+    """
+    Committed results of a job as NDJSON lines or a GeoJSON FeatureCollection.
+    With `follow`, the stream stays open until the job is finished.
+    """
+    path = Path(settings.JOBS_DIR) / job_id / "results.ndjson"
+    offset = 0
+    first = True
+    if fmt == "geojson":
+        yield b'{"type":"FeatureCollection","features":['
+
+    with open(path, "rb") as f:
+        while True:
+            state = get_state(job_id)
+            if state is None:
+                break
+            committed = state["results_bytes"]
+            if offset < committed:
+                f.seek(offset)
+                lines = []
+                for line in f.readlines(min(STREAM_BLOCK_SIZE, committed - offset)):
+                    if offset + len(line) > committed:
+                        break
+                    offset += len(line)
+                    lines.append(line)
+                if lines and fmt == "geojson":
+                    block = b",".join(
+                        json.dumps(_feature(line), ensure_ascii=False).encode("utf-8")
+                        for line in lines
+                    )
+                    yield block if first else b"," + block
+                    first = False
+                    continue
+                if lines:
+                    yield b"".join(lines)
+                    continue
+            if not follow or state["status"] in FINISHED:
+                break
+            await asyncio.sleep(settings.JOBS_POLL_INTERVAL)
+
+    if fmt == "geojson":
+        yield b"]}"
+
+
+# ============================================================
+# LIFECYCLE
+# ============================================================
+_cleanup_task: asyncio.Task | None = None
+
+
+def _stored_jobs() -> list:
+    root = Path(settings.JOBS_DIR)
+    if not root.is_dir():
+        return []
+    jobs = []
+    for path in root.iterdir():
+        if not JOB_ID.match(path.name) or path.name in _active:
+            continue
+        job = Job.load(path.name)
+        if job is not None:
+            jobs.append(job)
+    return jobs
+
+
+def cleanup() -> int:
+    """
+    Delete the finished jobs past JOBS_RETENTION; returns how many.
+    """
+    expired = [
+        job
+        for job in _stored_jobs()
+        if job.state["status"] in FINISHED
+        and time.time() - job.state["finished_at"] > settings.JOBS_RETENTION
+    ]
+    for job in expired:
+        shutil.rmtree(job.path, ignore_errors=True)
+    return len(expired)
+
+
+async def _cleanup_loop():
+    while True:
+        try:
+            deleted = await asyncio.to_thread(cleanup)
+            if deleted:
+                logger.info("Deleted %d expired jobs", deleted)
+        except Exception as e:
+            logger.warning("Job cleanup failed: %s", e)
+        await asyncio.sleep(settings.JOBS_CLEANUP_INTERVAL)
+
+
+def start():
+    """
+    Resume the unfinished jobs of JOBS_DIR (FastAPI lifespan), oldest first,
+    and delete the finished ones past JOBS_RETENTION, now and every
+    JOBS_CLEANUP_INTERVAL seconds.
+    """
+    global _cleanup_task
+
+    if _cleanup_task is None:
+        _cleanup_task = asyncio.create_task(_cleanup_loop())
+
+    pending = [job for job in _stored_jobs() if job.state["status"] not in FINISHED]
+
+    for job in sorted(pending, key=lambda job: job.state["created_at"]):
+        if job.lock():
+            logger.info(
+                "Resuming job %s at %d/%d points",
+                job.id,
+                job.state["done"],
+                job.state["total"],
+            )
+            _schedule(job)
+
+
+async def stop():
+    """
+    Cancel the jobs of this process; they resume on the next start.
+    """
+    global _cleanup_task
+
+    tasks = [task for _, task in _active.values()]
+    if _cleanup_task is not None:
+        tasks.append(_cleanup_task)
+        _cleanup_task = None
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
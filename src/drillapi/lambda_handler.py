@@ -1,5 +1,14 @@
-from .app import app
 from mangum import Mangum
+from .app import create_app
+from .config import settings
 
 # Lambda entrypoint
-handler = Mangum(app)
+# The API is built without the HTML routes (index page, checker) unless
+# LAMBDA_HTML_ROUTES is set: Jinja2 and the checker then stay off the
+# cold-start import path.
+# Mangum would run the lifespan (and close the pooled upstream client) on every
+# invocation; with lifespan off the client is created lazily and reused while
+# the execution environment stays warm. Bulk jobs are left out: they run in
+# the background between requests and are resumed by the lifespan.
+app = create_app(include_html=settings.LAMBDA_HTML_ROUTES, include_jobs=False)
+handler = Mangum(app, lifespan="off")
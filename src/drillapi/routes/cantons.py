@@ -1,5 +1,7 @@
 from fastapi import APIRouter, Request, Path, HTTPException
 from drillapi.cantons_configuration import cantons
+from drillapi.cantons_configuration.compiled import CANTONS_VERSION
+from ..services import precomputed
 from ..services.security import limiter
 from ..config import settings
 
@@ -32,10 +34,15 @@ async def get_all_cantons(request: Request):
 
     **Rate limit:** Respects global `RATE_LIMIT` setting.
 
+    Responses are pre-serialized (gzip/brotli) with a strong `ETag`;
+    `If-None-Match` returns `304 Not Modified`.
+
     **Returns:**
     - `dict[str, dict]`: All cantons configurations
     """
-    return get_cantons_data()
+    return precomputed.get_response(
+        "cantons", CANTONS_VERSION, get_cantons_data
+    ).respond(request)
 
 
 @router.get(
@@ -63,7 +70,9 @@ async def get_canton_by_code(
     data = get_cantons_data()
     if code not in data:
         raise HTTPException(404, f"Canton '{code}' not found")
-    return {code: data[code]}
+    return precomputed.get_response(
+        f"cantons/{code}", CANTONS_VERSION, lambda: {code: data[code]}
+    ).respond(request)
 
 
 @router.get(
@@ -82,6 +91,8 @@ async def get_available_cantons(request: Request):
 
     """
 
-    data = list(filter_active_cantons(get_cantons_data()).keys())
-
-    return data
+    return precomputed.get_response(
+        "avalaible-cantons",
+        CANTONS_VERSION,
+        lambda: list(filter_active_cantons(get_cantons_data()).keys()),
+    ).respond(request)
@@ -1,86 +1,186 @@
-from fastapi import APIRouter, Request
-from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
-from ..services import security
+import asyncio
+import time
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+from jinja2 import Environment, FileSystemLoader
+from ..services import circuit_breaker, security, stats
 from ..routes.cantons import get_cantons_data, filter_active_cantons
 from ..config import settings
 
-from ..routes.drill_category import get_drill_category
+from ..services import ground_category
 
 router = APIRouter()
-templates = Jinja2Templates(directory=str(settings.TEMPLATES_DIR))
+
+# Async environment so that results are streamed while the checks run
+templates_env = Environment(
+    loader=FileSystemLoader(str(settings.TEMPLATES_DIR)),
+    autoescape=True,
+    enable_async=True,
+)
+
+
+async def run_check(
+    canton_code: str,
+    location: list,
+    semaphore: asyncio.Semaphore,
+    canton_semaphore: asyncio.Semaphore,
+):
+    """
+    Query one ground control point (bypassing the result cache) and compare
+    the harmonized value with the expected control value.
+    """
+    x = location[0]
+    y = location[1]
+    control_harmonized_value = location[2]
+
+    url = f"/v1/drill-category/{x}/{y}"
+    result = {"canton": canton_code, "url": url}
+
+    async with canton_semaphore, semaphore:
+        start = time.perf_counter()
+        try:
+            code_canton, canton_config = await ground_category.resolve_canton(x, y)
+            resp_json = await ground_category.compute_ground_category(
+                x, y, code_canton, canton_config, use_cache=False
+            )
+
+            result["status"] = 200
+            result["success"] = resp_json.get("status") == "success"
+            result["content"] = resp_json
+
+            calculated = None
+            if resp_json.get("ground_category"):
+                calculated = resp_json["ground_category"].get("harmonized_value")
+
+            if calculated == control_harmonized_value:
+                result["control_harmonized_values"] = "success"
+                result["control_harmonized_values_message"] = (
+                    "Harmonized value matches control value."
+                )
+            else:
+                result["control_harmonized_values"] = "error"
+                result["control_harmonized_values_message"] = (
+                    f"❌ Harmonized value mismatch at coordinates ({x},{y}): "
+                    f"expected '{control_harmonized_value}', got '{calculated}'"
+                )
+
+        except Exception as e:
+            result["error"] = str(e)
+
+        result["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+    return result
+
+
+async def iter_checks(config: dict, results: list):
+    """
+    Run all ground control point checks concurrently (bounded globally and per
+    canton) and yield each result as soon as it completes.
+    Completed results are also appended to `results`.
+    """
+    semaphore = asyncio.Semaphore(settings.CHECKER_CONCURRENCY)
+    tasks = []
+    for canton_code, data in config.items():
+        canton_semaphore = asyncio.Semaphore(settings.CHECKER_CANTON_CONCURRENCY)
+        for location in data["ground_control_point"]:
+            tasks.append(
+                asyncio.ensure_future(
+                    run_check(canton_code, location, semaphore, canton_semaphore)
+                )
+            )
+
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            results.append(result)
+            yield result
+    finally:
+        # Client went away: stop the remaining checks
+        for task in tasks:
+            task.cancel()
+
+
+def is_failure(result: dict) -> bool:
+    return (not result.get("success")) or (
+        result.get("control_harmonized_values") == "error"
+    )
+
+
+def summarize_results(results: list) -> dict:
+    """
+    Per-canton check count, failures and latency percentiles (ms).
+    """
+    per_canton = {}
+    for result in results:
+        per_canton.setdefault(result["canton"], []).append(result)
+
+    summary = {}
+    for canton_code in sorted(per_canton):
+        items = per_canton[canton_code]
+        summary[canton_code] = {
+            **stats.summarize([r["duration_ms"] for r in items]),
+            "failures": sum(1 for r in items if is_failure(r)),
+        }
+    return summary
 
 
 @router.get("/checker/", response_class=HTMLResponse)
 @security.limiter.limit(settings.RATE_LIMIT)
 @router.get("/checker/{canton}", response_class=HTMLResponse)
-async def checker_page(request: Request, canton: str | None = None):
+async def checker_page(
+    request: Request,
+    canton: str | None = None,
+    format: str = Query("html", pattern="^(html|json)$"),
+):
     """
     Perform checks for all or a single canton and render HTML with results.
+
+    Checks run concurrently; the HTML page is streamed as checks complete.
+    Use `?format=json` to get the full report as JSON instead.
     """
     canton = canton.upper().strip() if canton else ""
 
     full_config = get_cantons_data()
     active_config = filter_active_cantons(full_config)
 
+    error_msg = None
     if canton:
         if canton not in active_config:
             error_msg = f"Canton '{canton}' not found or inactive."
-            return templates.TemplateResponse(
-                "checker.html",
-                {
-                    "request": request,
-                    "canton": canton,
-                    "results": [],
-                    "error_msg": error_msg,
-                },
-            )
-        config = {canton: active_config[canton]}
+            config = {}
+        else:
+            config = {canton: active_config[canton]}
     else:
         config = active_config
 
     results = []
-
-    for canton_code, data in config.items():
-        for location in data["ground_control_point"]:
-            x = location[0]
-            y = location[1]
-            control_harmonized_value = location[2]
-
-            url = f"/v1/drill-category/{x}/{y}"
-            result = {"canton": canton_code, "url": url}
-
-            try:
-                resp_json = await get_drill_category(
-                    request=request, coord_x=x, coord_y=y
-                )
-
-                result["status"] = 200
-                result["success"] = resp_json.get("status") == "success"
-                result["content"] = resp_json
-
-                calculated = None
-                if resp_json.get("ground_category"):
-                    calculated = resp_json["ground_category"].get("harmonized_value")
-
-                if calculated == control_harmonized_value:
-                    result["control_harmonized_values"] = "success"
-                    result["control_harmonized_values_message"] = (
-                        "Harmonized value matches control value."
-                    )
-                else:
-                    result["control_harmonized_values"] = "error"
-                    result["control_harmonized_values_message"] = (
-                        f"❌ Harmonized value mismatch at coordinates ({x},{y}): "
-                        f"expected '{control_harmonized_value}', got '{calculated}'"
-                    )
-
-            except Exception as e:
-                result["error"] = str(e)
-
-            results.append(result)
-
-    return templates.TemplateResponse(
-        "checker.html",
-        {"request": request, "canton": canton, "results": results, "error_msg": None},
+    start = time.perf_counter()
+
+    if format == "json":
+        async for _ in iter_checks(config, results):
+            pass
+        return JSONResponse(
+            {
+                "canton": canton,
+                "error_msg": error_msg,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+                "summary": summarize_results(results),
+                "circuit_breakers": circuit_breaker.snapshot(),
+                "results": results,
+            }
+        )
+
+    template = templates_env.get_template("checker.html")
+    context = {
+        "request": request,
+        "canton": canton,
+        "results": iter_checks(config, results),
+        "error_msg": error_msg,
+        "is_failure": is_failure,
+        "summary": lambda: summarize_results(results),
+        "circuit_breakers": circuit_breaker.snapshot,
+        "elapsed_ms": lambda: round((time.perf_counter() - start) * 1000, 1),
+    }
+    return StreamingResponse(
+        template.generate_async(context), media_type="text/html; charset=utf-8"
     )
@@ -1,6 +1,16 @@
-from fastapi import APIRouter, Request, Path, HTTPException
-from drillapi.cantons_configuration import cantons
-from ..services import processing, security
+import asyncio
+import time
+from fastapi import APIRouter, Request, Response, Path, Query, HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+from drillapi.cantons_configuration.compiled import COMPILED_CANTONS
+from ..services import security, timing
+from ..services.ground_category import (
+    Coordinate,
+    batch_results,
+    compute_ground_category,
+    resolve_canton,
+)
 from ..services.error_handler import handle_errors  # your decorator
 from ..config import settings
 import logging
@@ -8,48 +18,132 @@ import logging
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+COMPACT_MEDIA_TYPE = "application/vnd.drillapi.compact+json"
+
+
+class BatchRequest(BaseModel):
+    coordinates: list[Coordinate] = Field(..., min_length=1)
+
+
+def compact_response(response: dict) -> dict:
+    """
+    Slim profile: the answer without the embedded canton configuration.
+    The configuration can be fetched once from /v1/cantons/{code}.
+    """
+    ground_category = response["ground_category"] or {}
+    return {
+        "coord_x": response["coord_x"],
+        "coord_y": response["coord_y"],
+        "canton": response["canton"],
+        "harmonized_value": ground_category.get("harmonized_value"),
+        "source_values": ground_category.get("source_values", ""),
+        "config_version": COMPILED_CANTONS[response["canton"]].config_version,
+        "status": response["status"],
+    }
+
+
+def project_fields(response: dict, fields: str) -> dict:
+    """
+    Keep only the requested top-level fields (comma separated).
+    """
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in response]
+    if unknown:
+        raise HTTPException(
+            400,
+            detail=f"Unknown field(s): {', '.join(unknown)}. "
+            f"Available: {', '.join(response)}",
+        )
+    return {name: response[name] for name in names}
+
 
 @router.get("/v1/drill-category/{coord_x}/{coord_y}")
 @security.limiter.limit(settings.RATE_LIMIT)
 @handle_errors
 async def get_drill_category(
     request: Request,
+    response: Response,
     coord_x: float = Path(..., gt=2400000, le=2900000),
     coord_y: float = Path(..., gt=1070000, le=1300000),
+    profile: str | None = Query(None, pattern="^(full|compact)$"),
+    fields: str | None = Query(None),
+    debug: str | None = Query(None, pattern="^timing$"),
 ):
-    """Return ground category at a given coordinate using WMS GetFeatureInfo or ESRI REST feature service."""
+    """
+    Return ground category at a given coordinate using WMS GetFeatureInfo or ESRI REST feature service.
+
+    The `Server-Timing` response header breaks the request down into
+    canton-lookup, upstream-fetch, parse and classify durations (ms);
+    stages answered from cache carry `desc="cache"`.
+
+    **Query Parameters:**
+    - `profile` (str): `full` (default, embeds `canton_config`) or `compact`
+      (canton, harmonized value, source values and config version only).
+      `Accept: application/vnd.drillapi.compact+json` also selects `compact`.
+    - `fields` (str): Comma separated top-level fields to return, e.g. `canton,harmonized_value`
+    - `debug` (str): `timing` adds the stage breakdown to `result_detail.timing`
+    """
+    start = time.perf_counter()
+    timings = timing.start()
 
     # --- Determine canton from coordinates ---
-    canton_result = await processing.get_canton_from_coordinates(coord_x, coord_y)
-    if not canton_result:
-        raise HTTPException(404, detail="No canton found for these coordinates")
+    code_canton, canton_config = await resolve_canton(coord_x, coord_y)
 
-    code_canton = canton_result[0]["attributes"]["ak"]
-    canton_config = cantons.CANTONS["cantons_configurations"].get(code_canton)
-    if not canton_config:
+    result = await compute_ground_category(coord_x, coord_y, code_canton, canton_config)
+
+    total = time.perf_counter() - start
+    if debug == "timing":
+        # Copy: result_detail may be shared with the result cache
+        result["result_detail"] = {
+            **result["result_detail"],
+            "timing": timing.breakdown(timings, total),
+        }
+
+    headers = {"Server-Timing": timing.server_timing(timings, total)}
+    retry_after = result["result_detail"].get("retry_after")
+    if retry_after:
+        headers["Retry-After"] = str(retry_after)
+    response.headers.update(headers)
+
+    if profile is None:
+        compact = COMPACT_MEDIA_TYPE in request.headers.get("accept", "")
+    else:
+        compact = profile == "compact"
+
+    if compact:
+        result = compact_response(result)
+    if fields:
+        result = project_fields(result, fields)
+    if compact and profile is None:
+        return JSONResponse(result, media_type=COMPACT_MEDIA_TYPE, headers=headers)
+    return result
+
+
+@router.post("/v1/drill-category/batch")
+@security.limiter.limit(settings.RATE_LIMIT)
+@handle_errors
+async def get_drill_category_batch(request: Request, batch: BatchRequest):
+    """
+    Return ground categories for a list of coordinates, in input order.
+
+    Identical points are computed once. Points are grouped by canton and
+    fetched concurrently (bounded by `BATCH_CONCURRENCY` and the per-host
+    upstream connection limit). Canton configurations are returned once in
+    `canton_configs` instead of in every result.
+
+    **Raises:**
+    - `HTTPException 413`: If more than `BATCH_MAX_SIZE` coordinates are sent
+    """
+    if len(batch.coordinates) > settings.BATCH_MAX_SIZE:
         raise HTTPException(
-            404, detail=f"Configuration for canton {code_canton} not found!"
+            413, detail=f"Batch size is limited to {settings.BATCH_MAX_SIZE} points"
         )
 
-    # --- Fetch features (WMS or ESRI REST) ---
-    result = await processing.fetch_features_for_point(coord_x, coord_y, canton_config)
-    features = result["features"]
-
-    status = "success"
-    result_detail = {
-        "message": "Success",
-        "full_url": result["full_url"],
-        "detail": result["error"],
-    }
-    # --- Process features into ground category ---
-    features = processing.process_ground_category(features, canton_config["layers"])
+    points = list(dict.fromkeys((c.coord_x, c.coord_y) for c in batch.coordinates))
+    semaphore = asyncio.Semaphore(settings.BATCH_CONCURRENCY)
+    results, canton_configs = await batch_results(points, semaphore)
 
     return {
-        "coord_x": coord_x,
-        "coord_y": coord_y,
-        "canton": code_canton,
-        "canton_config": canton_config,
-        "ground_category": features,
-        "status": status,
-        "result_detail": result_detail,
+        "results": [results[(c.coord_x, c.coord_y)] for c in batch.coordinates],
+        "canton_configs": canton_configs,
     }
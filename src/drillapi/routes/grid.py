@@ -0,0 +1,393 @@
+import asyncio
+import base64
+import logging
+import math
+import time
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from drillapi.cantons_configuration import cantons
+from drillapi.cantons_configuration.compiled import COMPILED_CANTONS
+from .. import harvest
+from ..config import settings
+from ..services import (
+    cache,
+    circuit_breaker,
+    geometry,
+    harvest_store,
+    metrics,
+    processing,
+    security,
+)
+from ..services.error_handler import handle_errors
+from ..services.ground_category import compute_ground_category, revalidate
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Grid value of cells without a category (outside Switzerland, canton not
+# configured or upstream error); categories are 1 to 4
+NODATA = 0
+
+# result_detail of cached area answers, shaped like the point answers they
+# share the cache with
+AREA_RESULT_DETAIL = {"message": "Success", "full_url": None, "detail": None}
+
+# LV95 range accepted for points (see ground_category.Coordinate)
+X_RANGE = (2400000, 2900000)
+Y_RANGE = (1070000, 1300000)
+
+
+def parse_bbox(bbox: str) -> tuple:
+    try:
+        minx, miny, maxx, maxy = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(400, detail="bbox must be 'minx,miny,maxx,maxy'")
+    if not (minx < maxx and miny < maxy):
+        raise HTTPException(400, detail="bbox must have minx < maxx and miny < maxy")
+    if not (
+        X_RANGE[0] <= minx
+        and maxx <= X_RANGE[1]
+        and Y_RANGE[0] <= miny
+        and maxy <= Y_RANGE[1]
+    ):
+        raise HTTPException(400, detail="bbox must be within the LV95 extent")
+    return minx, miny, maxx, maxy
+
+
+def cell_centres(bbox: tuple, resolution: float) -> tuple:
+    """
+    (width, height, centres) of the grid, row-major from the north-west corner.
+    """
+    minx, miny, maxx, maxy = bbox
+    width = math.ceil((maxx - minx) / resolution)
+    height = math.ceil((maxy - miny) / resolution)
+    centres = [
+        (minx + (col + 0.5) * resolution, maxy - (row + 0.5) * resolution)
+        for row in range(height)
+        for col in range(width)
+    ]
+    return width, height, centres
+
+
+# ============================================================
+# CANTON PER CELL
+# ============================================================
+def _canton_rings(results: list):
+    shape = (results[0].get("geometry") or {}) if results else {}
+    return shape.get("rings")
+
+
+def _assign_cantons(points: list, pending: list, outlines: list, edges: dict):
+    """
+    {index: canton code} of the pending points inside one of the outlines
+    ({code: rings}). Outline edges are indexed once per canton, in `edges`,
+    so each point only touches the edges of its row band.
+    """
+    assigned = {}
+    for code, rings in outlines.items():
+        if code not in edges:
+            edges[code] = geometry.EdgeIndex(rings)
+        outline = edges[code]
+        for i in pending:
+            if i not in assigned and outline.contains(*points[i]):
+                assigned[i] = code
+    return assigned
+
+
+async def locate_cantons(points: list) -> list:
+    """
+    Canton code (or None) of every point.
+
+    The offline boundary index answers first when CANTON_LOOKUP is "local".
+    The remaining points are resolved by rounds of seed lookups: each
+    geo.admin.ch answer carries the canton geometry, which then assigns
+    every other pending point inside it, so a grid costs about one remote
+    lookup per canton it covers. Points are tested against the outlines in
+    a worker thread, off the event loop.
+    """
+    codes = [None] * len(points)
+    pending = list(range(len(points)))
+
+    if settings.CANTON_LOOKUP.lower() == "local":
+        remaining = []
+        for i in pending:
+            results = processing.get_canton_from_index(*points[i])
+            if results:
+                codes[i] = results[0]["attributes"]["ak"]
+            else:
+                remaining.append(i)
+        pending = remaining
+
+    edges = {}
+    seeds_per_round = 1
+    while pending:
+        # Seeds spread over the pending points, more of them every round
+        step = max(1, len(pending) // seeds_per_round)
+        seeds = pending[::step][:seeds_per_round]
+        answers = await asyncio.gather(
+            *(
+                processing.get_canton_from_geoadmin(*points[i], geometry=True)
+                for i in seeds
+            ),
+            return_exceptions=True,
+        )
+
+        # Failed lookups stay without canton (no data)
+        outlines = {}
+        for seed, results in zip(seeds, answers):
+            if isinstance(results, BaseException) or not results:
+                continue
+            code = results[0]["attributes"]["ak"]
+            codes[seed] = code
+            rings = _canton_rings(results)
+            if rings:
+                outlines[code] = rings
+
+        seeded = set(seeds)
+        pending = [i for i in pending if i not in seeded]
+        if outlines and pending:
+            assigned = await asyncio.to_thread(
+                _assign_cantons, points, pending, outlines, edges
+            )
+            for i, code in assigned.items():
+                codes[i] = code
+            pending = [i for i in pending if i not in assigned]
+        seeds_per_round = min(seeds_per_round * 2, settings.BATCH_CONCURRENCY)
+    return codes
+
+
+# ============================================================
+# CATEGORY PER CELL, PER CANTON
+# ============================================================
+def area_source(canton_config: dict):
+    """
+    The canton's 'area_fetch' entry, if it names a service that can answer
+    by extent: an ESRI /query url, or a WFS url with the feature type of
+    every layer. None otherwise (the grid then samples points).
+    """
+    source = canton_config.get("area_fetch")
+    if not source or not source.get("url"):
+        return None
+    if source.get("format") == "esri":
+        return source
+    if source.get("format") == "wfs":
+        typenames = source.get("typenames") or {}
+        if all(layer["name"] in typenames for layer in canton_config["layers"]):
+            return source
+    return None
+
+
+async def _fetch_area_layers(source: dict, canton_config: dict, extent: tuple):
+    """
+    Features of every layer over the extent, through the circuit breaker of
+    the area service, within GRID_AREA_TIMEOUT.
+    """
+    breaker = circuit_breaker.for_url(source["url"])
+    token = breaker.allow() if settings.BREAKER_ENABLED else circuit_breaker.CALL
+    if token is None:
+        raise RuntimeError(f"Circuit open for {breaker.name}")
+
+    start = time.perf_counter()
+    failed = None
+    try:
+        fetched = await asyncio.gather(
+            *(
+                harvest.fetch_layer(
+                    canton_config, layer, extent, source, settings.GRID_AREA_TIMEOUT
+                )
+                for layer in canton_config["layers"]
+            )
+        )
+        failed = False
+    except Exception as e:
+        failed = circuit_breaker.is_service_failure(e)
+        raise
+    finally:
+        # Cancelled: the trial call, if any, is given back
+        if failed is None:
+            breaker.release(token)
+        else:
+            breaker.record(time.perf_counter() - start, failed, token)
+    return fetched
+
+
+async def _area_store(code: str, canton_config: dict, points: list):
+    """
+    Polygons of every layer over the points' extent, fetched in one request
+    per layer from the canton's 'area_fetch' service and indexed in memory.
+
+    Raises if a layer has no features or lacks its classification property,
+    so the grid falls back to points rather than answering category 4.
+    """
+    source = area_source(canton_config)
+    extent = geometry.ring_bbox(points)
+    compiled = COMPILED_CANTONS[code]
+    fetched = await _fetch_area_layers(source, canton_config, extent)
+
+    features = []
+    for layer, layer_features in zip(compiled.layers, fetched):
+        if not layer_features:
+            raise ValueError(f"Layer {layer.name} has no features in the extent")
+        records = [harvest.harvest_feature(f, layer) for f in layer_features]
+        records = [record for record in records if record is not None]
+        harvest.check_layer(layer, records)
+        features.extend(records)
+    return harvest_store.HarvestStore(features, {"canton": code})
+
+
+async def sample_canton(code: str, points: list, semaphore: asyncio.Semaphore):
+    """
+    Harmonized values of the points of one canton, and how they were obtained.
+
+    Cached answers are reused, expired ones only within
+    CACHE_STALE_WHILE_REVALIDATE (refreshed in the background). Other cells
+    are answered by the harvested store when serving from harvest, then by
+    one area request per layer for cantons with an 'area_fetch' service,
+    and otherwise by one cached and coalesced lookup per point.
+    """
+    canton_config = cantons.CANTONS["cantons_configurations"].get(code)
+    if not canton_config or code not in COMPILED_CANTONS:
+        return [NODATA] * len(points), {"source": "unconfigured"}
+    compiled = COMPILED_CANTONS[code]
+
+    values = [NODATA] * len(points)
+    missing = []
+    stale = 0
+    keys = [cache.drill_category_key(code, canton_config, *point) for point in points]
+    cached = (
+        await cache.drill_categories.aget_many(keys) if settings.CACHE_ENABLED else {}
+    )
+    now = time.time()
+    for i, key in enumerate(keys):
+        state, _ = cache.freshness(cached.get(key), now)
+        if state not in ("fresh", "revalidate"):
+            missing.append(i)
+            continue
+        values[i] = cached[key][0]["harmonized_value"]
+        if state == "revalidate":
+            stale += 1
+            revalidate(key, *points[i], code, canton_config)
+    if stale:
+        metrics.STALE_RESPONSES.labels(code, "revalidating").inc(stale)
+    info = {"source": "cache", "cached": len(points) - len(missing), "stale": stale}
+    if not missing:
+        return values, info
+
+    store = None
+    if settings.DRILL_CATEGORY_SOURCE == "harvest":
+        store = harvest_store.get_store(code)
+        info["source"] = "harvest"
+    if store is None and settings.GRID_AREA_FETCH and area_source(canton_config):
+        try:
+            store = await _area_store(code, canton_config, [points[i] for i in missing])
+            info["source"] = "area"
+        except Exception as e:
+            logger.info("Area fetch failed for %s, sampling points: %s", code, e)
+
+    if store is not None:
+        ttl = cache.drill_category_ttl(canton_config)
+        for i in missing:
+            features = harvest_store.classify(store.lookup(*points[i]), compiled)
+            values[i] = features["harmonized_value"]
+            # Area answers are cached like point answers
+            if settings.CACHE_ENABLED and info["source"] == "area":
+                await cache.drill_categories.aset(
+                    keys[i],
+                    (features, dict(AREA_RESULT_DETAIL), time.time() + ttl),
+                    ttl + cache.stale_retention(),
+                )
+        return values, info
+
+    info["source"] = "points"
+    errors = 0
+
+    async def sample(i):
+        nonlocal errors
+        async with semaphore:
+            try:
+                result = await compute_ground_category(*points[i], code, canton_config)
+            except Exception as e:
+                logger.warning("Grid cell failed for %s: %s", points[i], e)
+                errors += 1
+                return
+            if result["status"] == "success" and not result["result_detail"]["detail"]:
+                values[i] = result["ground_category"]["harmonized_value"]
+            else:
+                errors += 1
+
+    await asyncio.gather(*(sample(i) for i in missing))
+    info["errors"] = errors
+    return values, info
+
+
+@router.get("/v1/drill-category/grid")
+@security.limiter.limit(settings.RATE_LIMIT)
+@handle_errors
+async def get_drill_category_grid(
+    request: Request,
+    bbox: str = Query(..., description="minx,miny,maxx,maxy in EPSG:2056"),
+    resolution: float = Query(..., gt=0, description="Cell size in metres"),
+):
+    """
+    Sample the harmonized ground category on a regular grid over a bounding box.
+
+    Cells are sampled at their centre. Cantons covered by the grid are
+    processed concurrently; within a canton, cached answers are reused and
+    the remaining cells are answered from the harvested store, from one area
+    request per layer, or point by point as a last resort.
+
+    **Returns:** the grid as base64-encoded `uint8` values (row-major, from
+    the north-west corner; `0` = no data), its `width`, `height` and GDAL
+    style affine `transform` in EPSG:2056, and per canton the cell count and
+    how the cells were answered.
+
+    **Raises:**
+    - `HTTPException 400`: Invalid bbox
+    - `HTTPException 413`: If the grid has more than `GRID_MAX_CELLS` cells
+    """
+    minx, miny, maxx, maxy = parse_bbox(bbox)
+    width = math.ceil((maxx - minx) / resolution)
+    height = math.ceil((maxy - miny) / resolution)
+    if width * height > settings.GRID_MAX_CELLS:
+        raise HTTPException(
+            413,
+            detail=f"Grid of {width}x{height} cells exceeds "
+            f"{settings.GRID_MAX_CELLS} cells, use a coarser resolution",
+        )
+
+    width, height, points = cell_centres((minx, miny, maxx, maxy), resolution)
+    codes = await locate_cantons(points)
+
+    groups = {}
+    for i, code in enumerate(codes):
+        if code is not None:
+            groups.setdefault(code, []).append(i)
+
+    semaphore = asyncio.Semaphore(settings.BATCH_CONCURRENCY)
+    answers = await asyncio.gather(
+        *(
+            sample_canton(code, [points[i] for i in indices], semaphore)
+            for code, indices in groups.items()
+        )
+    )
+
+    grid = bytearray(width * height)
+    summary = {}
+    for (code, indices), (values, info) in zip(groups.items(), answers):
+        for i, value in zip(indices, values):
+            grid[i] = value
+        summary[code] = {"cells": len(indices), **info}
+
+    return {
+        "bbox": [minx, miny, maxx, maxy],
+        "resolution": resolution,
+        "crs": "EPSG:2056",
+        "width": width,
+        "height": height,
+        "transform": [resolution, 0.0, minx, 0.0, -resolution, maxy],
+        "dtype": "uint8",
+        "nodata": NODATA,
+        "encoding": "base64",
+        "data": base64.b64encode(grid).decode("ascii"),
+        "cantons": summary,
+    }
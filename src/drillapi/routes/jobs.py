@@ -0,0 +1,150 @@
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from .. import jobs
+from ..config import settings
+from ..services import security
+from ..services.error_handler import handle_errors
+
+router = APIRouter()
+
+# Upload formats by Content-Type
+UPLOAD_FORMATS = {
+    "text/csv": "csv",
+    "application/geo+json": "geojson",
+    "application/json": "geojson",
+}
+RESULT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "geojson": "application/geo+json",
+}
+
+
+async def _read_upload(request: Request) -> bytes:
+    """
+    Request body, refused with 413 beyond JOBS_MAX_UPLOAD_BYTES (announced
+    by Content-Length, or counted while reading).
+    """
+    limit = settings.JOBS_MAX_UPLOAD_BYTES
+    too_large = HTTPException(413, detail=f"Uploads are limited to {limit} bytes")
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > limit:
+        raise too_large
+
+    body = bytearray()
+    async for block in request.stream():
+        body += block
+        if len(body) > limit:
+            raise too_large
+    return bytes(body)
+
+
+def _job_state(job_id: str) -> dict:
+    state = jobs.get_state(job_id) if jobs.JOB_ID.match(job_id) else None
+    if state is None:
+        raise HTTPException(404, detail=f"Job {job_id} not found")
+    return state
+
+
+def _progress(request: Request, state: dict) -> dict:
+    return {
+        "id": state["id"],
+        "status": state["status"],
+        "total": state["total"],
+        "done": state["done"],
+        "errors": state["errors"],
+        "progress": round(state["done"] / state["total"], 4),
+        "created_at": state["created_at"],
+        "started_at": state["started_at"],
+        "finished_at": state["finished_at"],
+        "error": state["error"],
+        "results_url": str(request.url_for("get_job_results", job_id=state["id"])),
+    }
+
+
+@router.post("/v1/jobs", status_code=202)
+@security.limiter.limit(settings.RATE_LIMIT)
+@handle_errors
+async def create_job(request: Request):
+    """
+    Submit a bulk job: the request body is a CSV (`text/csv`, header row with
+    `coord_x`, `coord_y` and an optional `id` column) or a GeoJSON
+    FeatureCollection of points (`application/geo+json`), in EPSG:2056.
+
+    Points are processed in the background, in chunks of `JOBS_CHUNK_SIZE`
+    through the batch pipeline. Poll the returned job for progress and read
+    its results while it runs.
+
+    **Raises:**
+    - `HTTPException 400`: If the upload cannot be read as points
+    - `HTTPException 413`: If it is larger than `JOBS_MAX_UPLOAD_BYTES` or
+      has more than `JOBS_MAX_POINTS` points
+    - `HTTPException 415`: Unsupported Content-Type
+    - `HTTPException 503`: If `JOBS_MAX_QUEUED` jobs are already in progress
+    """
+    media_type = request.headers.get("content-type", "").split(";")[0].strip()
+    fmt = UPLOAD_FORMATS.get(media_type.lower())
+    if fmt is None:
+        raise HTTPException(
+            415, detail="Send the points as text/csv or application/geo+json"
+        )
+    if jobs.active_count() >= settings.JOBS_MAX_QUEUED:
+        raise HTTPException(
+            503,
+            detail="Too many jobs in progress, retry later",
+            headers={"Retry-After": "60"},
+        )
+
+    body = await _read_upload(request)
+    try:
+        # Large uploads take a while to parse: keep the event loop free
+        points = await asyncio.to_thread(jobs.parse_points, body, fmt)
+    except jobs.JobInputError as e:
+        raise HTTPException(400, detail=str(e))
+    if len(points) > settings.JOBS_MAX_POINTS:
+        raise HTTPException(
+            413, detail=f"Jobs are limited to {settings.JOBS_MAX_POINTS} points"
+        )
+
+    job = jobs.submit(points, fmt)
+    progress = _progress(request, job.state)
+    return JSONResponse(
+        progress,
+        status_code=202,
+        headers={"Location": str(request.url_for("get_job", job_id=job.id))},
+    )
+
+
+@router.get("/v1/jobs/{job_id}")
+@security.limiter.limit(settings.RATE_LIMIT)
+@handle_errors
+async def get_job(request: Request, job_id: str):
+    """
+    Progress of a job: `status` (queued, running, completed or failed),
+    points `done` of `total`, and the number of points with `errors`.
+    """
+    return _progress(request, _job_state(job_id))
+
+
+@router.get("/v1/jobs/{job_id}/results")
+@security.limiter.limit(settings.RATE_LIMIT)
+@handle_errors
+async def get_job_results(
+    request: Request,
+    job_id: str,
+    format: str = Query("ndjson", pattern="^(ndjson|geojson)$"),
+    follow: bool = Query(False, description="Keep streaming until the job is finished"),
+):
+    """
+    Stream the results computed so far, in input order: NDJSON (one batch
+    result per line, with the point's `index` and `id`) or a GeoJSON
+    FeatureCollection. With `follow=true` the response stays open and
+    delivers new results until the job is finished.
+    """
+    state = _job_state(job_id)
+    return StreamingResponse(
+        jobs.stream_results(job_id, format, follow),
+        media_type=RESULT_MEDIA_TYPES[format],
+        headers={"X-Job-Status": state["status"], "X-Job-Done": str(state["done"])},
+    )
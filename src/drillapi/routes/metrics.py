@@ -0,0 +1,102 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+from ..services import cache, circuit_breaker, http_client, metrics
+from ..services.singleflight import flights
+
+router = APIRouter()
+
+BREAKER_STATES = {
+    circuit_breaker.CLOSED: 0,
+    circuit_breaker.HALF_OPEN: 1,
+    circuit_breaker.OPEN: 2,
+}
+
+
+def collect_cache() -> list:
+    caches = cache.stats()
+    lines = []
+    for field, kind, documentation in (
+        ("hits", "counter", "Cache hits"),
+        ("misses", "counter", "Cache misses"),
+        ("persistent_hits", "counter", "Cache misses answered by the persistent tier"),
+        ("shared_hits", "counter", "Cache misses answered by the shared tier"),
+        ("shared_errors", "counter", "Shared cache tier errors"),
+        ("evictions", "counter", "Cache evictions"),
+        ("hit_ratio", "gauge", "Cache hit ratio since start"),
+        ("entries", "gauge", "Cached entries"),
+        ("bytes", "gauge", "Estimated cache size in bytes"),
+    ):
+        suffix = "_total" if kind == "counter" else ""
+        lines.extend(
+            metrics.sample_lines(
+                f"drillapi_cache_{field}{suffix}",
+                documentation,
+                kind,
+                "cache",
+                {name: values[field] for name, values in caches.items()},
+            )
+        )
+    return lines
+
+
+def collect_upstream() -> list:
+    upstream = http_client.upstream_stats()
+    hosts = upstream["hosts"]
+    lines = []
+    for field, documentation in (
+        ("retries", "Upstream retries"),
+        ("hedges", "Hedged upstream requests"),
+        ("hedge_wins", "Hedged upstream requests answering first"),
+    ):
+        lines.extend(
+            metrics.sample_lines(
+                f"drillapi_upstream_{field}_total",
+                documentation,
+                "counter",
+                "host",
+                {host: values[field] for host, values in hosts.items()},
+            )
+        )
+    lines.extend(
+        metrics.sample_lines(
+            "drillapi_upstream_retry_budget_tokens",
+            "Tokens left in the retry budget",
+            "gauge",
+            "budget",
+            {"global": upstream["retry_budget"]["tokens"]},
+        )
+    )
+    lines.extend(
+        metrics.sample_lines(
+            "drillapi_upstream_in_flight",
+            "Distinct upstream lookups in flight",
+            "gauge",
+            "kind",
+            {"coalesced": len(flights)},
+        )
+    )
+    return lines
+
+
+def collect_breakers() -> list:
+    return metrics.sample_lines(
+        "drillapi_circuit_breaker_state",
+        "Circuit state per host (0 closed, 1 half-open, 2 open)",
+        "gauge",
+        "host",
+        {
+            host: BREAKER_STATES[values["state"]]
+            for host, values in circuit_breaker.snapshot().items()
+        },
+    )
+
+
+metrics.collectors.extend((collect_cache, collect_upstream, collect_breakers))
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """
+    Prometheus text exposition of the service metrics.
+    """
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from .. import warmup
+
+router = APIRouter()
+
+
+@router.get("/ready", include_in_schema=False)
+async def ready():
+    """
+    Readiness probe: 503 until a cache warm-up run succeeded, with the
+    reason of the last failure in `last_error` (always ready when
+    WARMUP_ENABLED is off).
+    """
+    state = warmup.snapshot()
+    return JSONResponse(state, status_code=200 if state["ready"] else 503)
@@ -0,0 +1,407 @@
+import asyncio
+import json
+import math
+import time
+import logging
+from collections import OrderedDict
+
+from .persistent_cache import SQLiteStore
+from .redis_client import RedisClient, RedisError
+from ..cantons_configuration.compiled import COMPILED_CANTONS
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# GetFeatureInfo requests use a 101 x 101 pixel image around the point
+WMS_GRID_SIZE = 101
+
+
+# ============================================================
+# IN-PROCESS TTL + LRU CACHE
+# ============================================================
+class TTLCache:
+    """
+    Memory-bounded cache with per-entry TTL and LRU eviction.
+
+    Bounded both by number of entries and by an estimate of the serialized
+    size of the stored values.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: OrderedDict = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        entry = self._data.get(key)
+        return entry is not None and entry[1] > time.monotonic()
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        value, expires_at, size = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl: float, size: int | None = None):
+        if ttl <= 0:
+            return
+        if size is None:
+            size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+
+        if key in self._data:
+            self._remove(key)
+        self._data[key] = (value, time.monotonic() + ttl, size)
+        self.bytes += size
+
+        while len(self._data) > self.max_entries or self.bytes > self.max_bytes:
+            oldest = next(iter(self._data))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def recent_keys(self, count: int) -> list:
+        """
+        Up to `count` keys, most recently used first.
+        """
+        keys = []
+        for key in reversed(self._data):
+            if len(keys) >= count:
+                break
+            keys.append(key)
+        return keys
+
+    def _remove(self, key):
+        _, _, size = self._data.pop(key)
+        self.bytes -= size
+
+    def clear(self):
+        self._data.clear()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_MISSING = object()
+
+
+class TieredCache(TTLCache):
+    """
+    TTLCache (L1) in front of the optional persistent tier
+    (CACHE_PERSISTENT_PATH) and shared tier (CACHE_SHARED_URL).
+
+    `get`/`set` use the local tiers only; the async `aget`, `aget_many` and
+    `aset` also go to the shared tier. Values must be JSON-serializable;
+    tuples come back from the lower tiers as lists. Lower-tier hits are
+    copied into memory for their remaining lifetime.
+    """
+
+    def __init__(self, namespace: str, max_entries: int, max_bytes: int):
+        super().__init__(max_entries, max_bytes)
+        self.namespace = namespace
+        self.persistent_hits = 0
+        self.shared_hits = 0
+        self.shared_errors = 0
+
+    def get(self, key, default=None):
+        value = super().get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        store = persistent_store()
+        found = store.get(self.namespace, key) if store is not None else None
+        if found is None:
+            return default
+        value, expires_at = found
+        self.persistent_hits += 1
+        super().set(key, value, expires_at - time.time())
+        return value
+
+    def set(self, key, value, ttl: float, size: int | None = None):
+        store = persistent_store()
+        if store is None:
+            super().set(key, value, ttl, size)
+            return
+        body = json.dumps(value, default=str, separators=(",", ":")).encode("utf-8")
+        super().set(key, value, ttl, len(body) if size is None else size)
+        store.set(self.namespace, key, body, ttl)
+
+    def _shared_key(self, key) -> str:
+        return f"{settings.CACHE_SHARED_PREFIX}:{self.namespace}:" + json.dumps(
+            key, separators=(",", ":")
+        )
+
+    async def aget(self, key, default=None):
+        found = await self.aget_many([key])
+        return found.get(key, default)
+
+    async def aget_many(self, keys: list) -> dict:
+        """
+        {key: value} of the keys found. Keys missing locally are read from
+        the shared tier in one pipelined round trip.
+        """
+        found = {}
+        missing = []
+        for key in keys:
+            value = self.get(key, _MISSING)
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+
+        client = shared_client() if missing else None
+        if client is None:
+            return found
+        try:
+            bodies = await client.mget([self._shared_key(key) for key in missing])
+        except SHARED_ERRORS as e:
+            self._shared_failed(e)
+            return found
+
+        now = time.time()
+        for key, body in zip(missing, bodies):
+            if body is None:
+                continue
+            expires_at, value = json.loads(body)
+            if expires_at > now:
+                self.shared_hits += 1
+                TTLCache.set(self, key, value, expires_at - now, len(body))
+                found[key] = value
+        return found
+
+    async def aset(self, key, value, ttl: float):
+        self.set(key, value, ttl)
+        client = shared_client() if ttl > 0 else None
+        if client is None:
+            return
+        # The expiry travels with the value, so readers keep the remaining TTL
+        body = json.dumps([time.time() + ttl, value], default=str).encode("utf-8")
+        try:
+            await client.set(self._shared_key(key), body, ttl)
+        except SHARED_ERRORS as e:
+            self._shared_failed(e)
+
+    def _shared_failed(self, error: Exception):
+        global _shared_down_until
+
+        self.shared_errors += 1
+        _shared_down_until = time.monotonic() + settings.CACHE_SHARED_RETRY_AFTER
+        logger.warning(
+            "Shared cache unavailable, retrying in %.0f s: %r",
+            settings.CACHE_SHARED_RETRY_AFTER,
+            error,
+        )
+
+    def clear(self):
+        super().clear()
+        self.persistent_hits = 0
+        self.shared_hits = 0
+        self.shared_errors = 0
+        store = persistent_store()
+        if store is not None:
+            store.clear(self.namespace)
+
+    def stats(self) -> dict:
+        return {
+            **super().stats(),
+            "persistent_hits": self.persistent_hits,
+            "shared_hits": self.shared_hits,
+            "shared_errors": self.shared_errors,
+        }
+
+
+_store: SQLiteStore | None = None
+_store_opened = False
+
+
+def persistent_store() -> SQLiteStore | None:
+    """
+    The persistent tier, opened on first use. None when CACHE_PERSISTENT_PATH
+    is not set or the file cannot be opened (memory only then).
+    """
+    global _store, _store_opened
+
+    if not _store_opened:
+        _store_opened = True
+        path = settings.CACHE_PERSISTENT_PATH
+        if path:
+            try:
+                _store = SQLiteStore(path, settings.CACHE_PERSISTENT_MAX_BYTES)
+                logger.info("Persistent cache at %s (%d bytes)", path, _store.bytes)
+            except Exception as e:
+                logger.warning("Persistent cache unavailable (%s): %s", path, e)
+                _store = None
+    return _store
+
+
+def close_persistent_store():
+    global _store, _store_opened
+
+    if _store is not None:
+        _store.close()
+    _store = None
+    _store_opened = False
+
+
+# Shared tier failures: the cache falls back to the local tiers for
+# CACHE_SHARED_RETRY_AFTER seconds instead of failing the request
+SHARED_ERRORS = (OSError, EOFError, RedisError)
+
+_shared: RedisClient | None = None
+_shared_loop: asyncio.AbstractEventLoop | None = None
+_shared_down_until = 0.0
+
+
+def shared_client() -> RedisClient | None:
+    """
+    The shared tier client, or None when CACHE_SHARED_URL is not set or the
+    server failed recently. Bound to the running event loop, like the
+    upstream HTTP client.
+    """
+    global _shared, _shared_loop
+
+    if not settings.CACHE_SHARED_URL or time.monotonic() < _shared_down_until:
+        return None
+    loop = asyncio.get_running_loop()
+    if _shared is None or _shared_loop is not loop:
+        if _shared is not None:
+            _shared.close()
+        _shared = RedisClient(
+            settings.CACHE_SHARED_URL,
+            max_connections=settings.CACHE_SHARED_MAX_CONNECTIONS,
+            timeout=settings.CACHE_SHARED_TIMEOUT,
+        )
+        _shared_loop = loop
+    return _shared
+
+
+def close_shared_client():
+    global _shared, _shared_loop, _shared_down_until
+
+    if _shared is not None:
+        _shared.close()
+    _shared = None
+    _shared_loop = None
+    _shared_down_until = 0.0
+
+
+def estimate_size(value) -> int:
+    """
+    Approximate memory footprint by the length of the JSON serialization.
+    """
+    return len(json.dumps(value, default=str, separators=(",", ":")))
+
+
+# ============================================================
+# CACHE KEYS
+# ============================================================
+def pixel_size(canton_config: dict) -> float:
+    """
+    Ground size of one GetFeatureInfo pixel for this canton configuration.
+    """
+    return 2 * canton_config["bbox_delta"] / WMS_GRID_SIZE
+
+
+def snap(value: float, resolution: float) -> int:
+    return math.floor(value / resolution)
+
+
+def drill_category_key(
+    code_canton: str, canton_config: dict, coord_x: float, coord_y: float
+) -> tuple:
+    """
+    Canton code and configuration version, plus the coordinate snapped to
+    the effective GetFeatureInfo pixel.
+    """
+    resolution = pixel_size(canton_config)
+    compiled = COMPILED_CANTONS.get(code_canton)
+    return (
+        code_canton,
+        compiled.config_version if compiled else None,
+        snap(coord_x, resolution),
+        snap(coord_y, resolution),
+    )
+
+
+def canton_key(coord_x: float, coord_y: float) -> tuple:
+    resolution = settings.CACHE_CANTON_RESOLUTION
+    return (snap(coord_x, resolution), snap(coord_y, resolution))
+
+
+def stale_retention() -> float:
+    """
+    Seconds drill categories are kept past their TTL to be served stale.
+    """
+    return max(settings.CACHE_STALE_WHILE_REVALIDATE, settings.CACHE_STALE_IF_ERROR)
+
+
+def freshness(entry, now: float | None = None) -> tuple:
+    """
+    (state, staleness) of a cached drill category entry, staleness being the
+    seconds past its fresh_until: "fresh", "revalidate" within
+    CACHE_STALE_WHILE_REVALIDATE, then "expired"; "missing" without entry.
+    """
+    if entry is None:
+        return "missing", None
+    staleness = (time.time() if now is None else now) - entry[2]
+    if staleness <= 0:
+        return "fresh", staleness
+    if staleness <= settings.CACHE_STALE_WHILE_REVALIDATE:
+        return "revalidate", staleness
+    return "expired", staleness
+
+
+def drill_category_ttl(canton_config: dict) -> float:
+    """
+    Per-canton TTL ('cache_ttl' in the canton configuration) or the global default.
+    """
+    return canton_config.get("cache_ttl", settings.CACHE_TTL)
+
+
+drill_categories = TieredCache(
+    "drill_category", settings.CACHE_MAX_ENTRIES, settings.CACHE_MAX_BYTES
+)
+canton_lookups = TieredCache(
+    "canton_lookup", settings.CACHE_MAX_ENTRIES, settings.CACHE_MAX_BYTES // 8
+)
+
+
+def clear():
+    drill_categories.clear()
+    canton_lookups.clear()
+
+
+def stats() -> dict:
+    return {
+        "drill_category": drill_categories.stats(),
+        "canton_lookup": canton_lookups.stats(),
+    }
@@ -0,0 +1,123 @@
+import json
+import logging
+import math
+from pathlib import Path
+
+from . import geometry
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# swissBOUNDARIES3D identifies cantons by their federal number (KANTONSNUM)
+CANTON_NUMBERS = {
+    1: "ZH",
+    2: "BE",
+    3: "LU",
+    4: "UR",
+    5: "SZ",
+    6: "OW",
+    7: "NW",
+    8: "GL",
+    9: "ZG",
+    10: "FR",
+    11: "SO",
+    12: "BS",
+    13: "BL",
+    14: "SH",
+    15: "AR",
+    16: "AI",
+    17: "SG",
+    18: "GR",
+    19: "AG",
+    20: "TG",
+    21: "TI",
+    22: "VD",
+    23: "VS",
+    24: "NE",
+    25: "GE",
+    26: "JU",
+}
+
+GRID_CELL_SIZE = 10000.0
+
+
+def _canton_code(properties: dict):
+    """
+    Read the canton code from 'ak', or map the swissBOUNDARIES3D canton number.
+    """
+    for key in ("ak", "AK"):
+        if properties.get(key):
+            return str(properties[key]).upper()
+    for key in ("kantonsnummer", "KANTONSNUM", "kantonsnum"):
+        if properties.get(key) is not None:
+            return CANTON_NUMBERS.get(int(properties[key]))
+    return None
+
+
+class CantonIndex:
+    """
+    Offline canton boundaries: bounding-box grid prefilter, then
+    point-in-polygon and border distance on the edges near the point.
+    """
+
+    def __init__(self, features: list):
+        self.grid = geometry.GridIndex(GRID_CELL_SIZE)
+        self.bboxes: dict[str, tuple] = {}
+        self.size = 0
+
+        for feature in features:
+            code = _canton_code(feature.get("properties") or {})
+            if not code:
+                continue
+            for rings in geometry.polygons_from_geojson(feature.get("geometry")):
+                bbox = geometry.ring_bbox(rings[0])
+                self.grid.insert(bbox, (code, bbox, geometry.EdgeIndex(rings)))
+                self.bboxes[code] = geometry.bbox_union(self.bboxes.get(code), bbox)
+                self.size += 1
+
+    @classmethod
+    def from_file(cls, path: Path) -> "CantonIndex":
+        with open(path, "rb") as f:
+            data = json.load(f)
+        return cls(data.get("features", []))
+
+    def locate(self, coord_x: float, coord_y: float, within: float = math.inf):
+        """
+        Return (canton code, distance to the canton border in metres, exact
+        below `within`), or (None, None) if no polygon contains the point.
+        """
+        for code, bbox, edges in self.grid.candidates(coord_x, coord_y):
+            if not geometry.bbox_contains(bbox, coord_x, coord_y):
+                continue
+            if edges.contains(coord_x, coord_y):
+                return code, edges.distance(coord_x, coord_y, within)
+        return None, None
+
+
+_index: CantonIndex | None = None
+_index_loaded = False
+
+
+def get_index() -> CantonIndex | None:
+    """
+    Load the bundled boundary index once. Returns None if the file is missing or invalid.
+    """
+    global _index, _index_loaded
+
+    if not _index_loaded:
+        _index_loaded = True
+        path = Path(settings.CANTON_BOUNDARIES_FILE)
+        try:
+            _index = CantonIndex.from_file(path)
+            logger.info("Loaded %d canton boundary polygons from %s", _index.size, path)
+        except Exception as e:
+            logger.warning("Canton boundary index unavailable (%s): %s", path, e)
+            _index = None
+    return _index
+
+
+def reset_index():
+    global _index, _index_loaded
+
+    _index = None
+    _index_loaded = False
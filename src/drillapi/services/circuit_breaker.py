@@ -0,0 +1,162 @@
+import logging
+import math
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+import httpx
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Token of calls let through outside of a half-open trial
+CALL = object()
+
+
+# ============================================================
+# PER-HOST CIRCUIT BREAKER
+# ============================================================
+class CircuitBreaker:
+    """
+    Closed → open when the failure rate (errors and calls slower than
+    BREAKER_SLOW_CALL_SECONDS) over a rolling window exceeds the threshold.
+    Open → half-open after BREAKER_OPEN_SECONDS, letting one trial call
+    through: success closes the circuit, failure opens it again.
+
+    `allow()` returns a token that the caller passes back to `record()` or
+    `release()`; while half-open, only the trial's token decides.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.trial = None  # token of the half-open trial in flight
+        self.calls: deque = deque()  # (timestamp, failed)
+        self.open_count = 0
+
+    def _prune(self, now: float):
+        horizon = now - settings.BREAKER_WINDOW
+        while self.calls and self.calls[0][0] < horizon:
+            self.calls.popleft()
+
+    def failure_rate(self) -> float:
+        if not self.calls:
+            return 0.0
+        return sum(1 for _, failed in self.calls if failed) / len(self.calls)
+
+    def allow(self):
+        """
+        Token of a call that may go to the upstream service now, or None.
+        """
+        if self.state == CLOSED:
+            return CALL
+
+        now = time.monotonic()
+        if self.state == OPEN and now - self.opened_at >= settings.BREAKER_OPEN_SECONDS:
+            self.state = HALF_OPEN
+            self.trial = None
+            logger.info("Circuit %s half-open", self.name)
+
+        if self.state == HALF_OPEN and self.trial is None:
+            self.trial = object()
+            return self.trial
+        return None
+
+    def record(self, duration: float, failed: bool, token=CALL):
+        now = time.monotonic()
+        failed = failed or duration > settings.BREAKER_SLOW_CALL_SECONDS
+
+        if self.state == HALF_OPEN:
+            # Calls let through before the circuit opened do not decide
+            if token is not self.trial:
+                return
+            self.trial = None
+            if failed:
+                self._open(now)
+            else:
+                self.state = CLOSED
+                self.calls.clear()
+                logger.info("Circuit %s closed", self.name)
+            return
+
+        self.calls.append((now, failed))
+        self._prune(now)
+        if (
+            self.state == CLOSED
+            and len(self.calls) >= settings.BREAKER_MIN_CALLS
+            and self.failure_rate() >= settings.BREAKER_FAILURE_RATE
+        ):
+            self._open(now)
+
+    def release(self, token=CALL):
+        """
+        End a call that was cancelled: neither a success nor a failure of the
+        service, it only frees the half-open trial slot if it was the trial.
+        """
+        if token is self.trial:
+            self.trial = None
+
+    def _open(self, now: float):
+        self.state = OPEN
+        self.opened_at = now
+        self.open_count += 1
+        logger.warning("Circuit %s open", self.name)
+
+    def retry_after(self) -> int:
+        """
+        Seconds until the next trial call is allowed (0 if closed).
+        """
+        if self.state == CLOSED:
+            return 0
+        remaining = settings.BREAKER_OPEN_SECONDS - (time.monotonic() - self.opened_at)
+        return max(1, math.ceil(remaining))
+
+    def snapshot(self) -> dict:
+        self._prune(time.monotonic())
+        return {
+            "state": self.state,
+            "calls": len(self.calls),
+            "failure_rate": round(self.failure_rate(), 3),
+            "open_count": self.open_count,
+            "retry_after": self.retry_after(),
+        }
+
+
+def is_service_failure(error: BaseException) -> bool:
+    """
+    Transport errors, timeouts and 5xx answers count against a host. Client
+    errors (4xx) and payloads that cannot be decoded or parsed do not: one
+    malformed answer says nothing about the health of the service.
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def for_url(url: str) -> CircuitBreaker:
+    """
+    Breaker shared by every canton served from the same host.
+    """
+    host = urlsplit(url).netloc
+    breaker = _breakers.get(host)
+    if breaker is None:
+        breaker = CircuitBreaker(host)
+        _breakers[host] = breaker
+    return breaker
+
+
+def snapshot() -> dict:
+    return {host: breaker.snapshot() for host, breaker in sorted(_breakers.items())}
+
+
+def reset():
+    _breakers.clear()
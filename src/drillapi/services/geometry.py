@@ -0,0 +1,242 @@
+import math
+
+# ============================================================
+# PLANAR GEOMETRY HELPERS (EPSG:2056, metres)
+# ============================================================
+# Polygons are stored as a tuple of rings (exterior first, then holes),
+# each ring being a tuple of (x, y) tuples, as found in GeoJSON.
+
+
+def polygons_from_geojson(geometry: dict) -> list:
+    """
+    Return a list of polygons (list of rings) from a GeoJSON Polygon/MultiPolygon.
+    """
+    if not geometry:
+        return []
+
+    geom_type = geometry.get("type")
+    coordinates = geometry.get("coordinates") or []
+
+    if geom_type == "Polygon":
+        raw_polygons = [coordinates]
+    elif geom_type == "MultiPolygon":
+        raw_polygons = coordinates
+    else:
+        return []
+
+    polygons = []
+    for raw_polygon in raw_polygons:
+        rings = tuple(
+            tuple((float(pt[0]), float(pt[1])) for pt in ring)
+            for ring in raw_polygon
+            if len(ring) >= 3
+        )
+        if rings:
+            polygons.append(rings)
+    return polygons
+
+
+def ring_bbox(ring) -> tuple:
+    xs = [pt[0] for pt in ring]
+    ys = [pt[1] for pt in ring]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def bbox_contains(bbox: tuple, x: float, y: float) -> bool:
+    return bbox[0] <= x <= bbox[2] and bbox[1] <= y <= bbox[3]
+
+
+def point_in_ring(x: float, y: float, ring) -> bool:
+    """
+    Ray casting test (even-odd rule).
+    """
+    inside = False
+    n = len(ring)
+    j = n - 1
+    for i in range(n):
+        xi, yi = ring[i]
+        xj, yj = ring[j]
+        if (yi > y) != (yj > y):
+            x_cross = (xj - xi) * (y - yi) / (yj - yi) + xi
+            if x < x_cross:
+                inside = not inside
+        j = i
+    return inside
+
+
+def point_in_polygon(x: float, y: float, rings) -> bool:
+    """
+    True if the point is inside the exterior ring and outside every hole.
+    """
+    if not point_in_ring(x, y, rings[0]):
+        return False
+    for hole in rings[1:]:
+        if point_in_ring(x, y, hole):
+            return False
+    return True
+
+
+def point_in_rings(x: float, y: float, rings) -> bool:
+    """
+    Even-odd test across all rings, for ESRI JSON polygons whose outer rings
+    and holes of several parts come in one flat list.
+    """
+    inside = False
+    for ring in rings:
+        if point_in_ring(x, y, ring):
+            inside = not inside
+    return inside
+
+
+def _segment_distance2(x: float, y: float, x1, y1, x2, y2) -> float:
+    dx = x2 - x1
+    dy = y2 - y1
+    seg_len2 = dx * dx + dy * dy
+    if seg_len2 == 0:
+        t = 0.0
+    else:
+        t = max(0.0, min(1.0, ((x - x1) * dx + (y - y1) * dy) / seg_len2))
+    px = x1 + t * dx - x
+    py = y1 + t * dy - y
+    return px * px + py * py
+
+
+def distance_to_rings(x: float, y: float, rings) -> float:
+    """
+    Shortest distance from the point to any ring edge of the polygon.
+    """
+    best = math.inf
+    for ring in rings:
+        n = len(ring)
+        for i in range(n):
+            d2 = _segment_distance2(x, y, *ring[i - 1], *ring[i])
+            if d2 < best:
+                best = d2
+    return math.sqrt(best)
+
+
+def bbox_union(a: tuple | None, b: tuple) -> tuple:
+    if a is None:
+        return b
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+
+class GridIndex:
+    """
+    Uniform grid bucketing of bounding boxes, used as a prefilter before
+    exact point-in-polygon tests.
+    """
+
+    __slots__ = ("cell_size", "cells")
+
+    def __init__(self, cell_size: float):
+        self.cell_size = cell_size
+        self.cells: dict[tuple, list] = {}
+
+    def _cell(self, x: float, y: float) -> tuple:
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def insert(self, bbox: tuple, item):
+        cx0, cy0 = self._cell(bbox[0], bbox[1])
+        cx1, cy1 = self._cell(bbox[2], bbox[3])
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                self.cells.setdefault((cx, cy), []).append(item)
+
+    def candidates(self, x: float, y: float) -> list:
+        return self.cells.get(self._cell(x, y), [])
+
+
+class EdgeIndex:
+    """
+    Ring edges bucketed by grid cell, so that point tests only touch the
+    edges near the point: the even-odd test scans the row band of the
+    point, distances the cells around it. Rings are taken as one even-odd
+    set (exterior rings and holes alike), which also covers ESRI polygons.
+    """
+
+    __slots__ = ("cell_size", "bbox", "rows", "cells", "span")
+
+    def __init__(self, rings, cell_size: float | None = None):
+        edges = [(*ring[i - 1], *ring[i]) for ring in rings for i in range(len(ring))]
+        self.bbox = ring_bbox([pt for ring in rings for pt in ring])
+        if cell_size is None:
+            # About sqrt(n) rows of about sqrt(n) edges each
+            extent = max(self.bbox[2] - self.bbox[0], self.bbox[3] - self.bbox[1])
+            cell_size = max(1.0, extent / max(1, math.isqrt(len(edges))))
+        self.cell_size = cell_size
+        self.rows: dict[int, list] = {}
+        self.cells: dict[tuple, list] = {}
+
+        for edge in edges:
+            x1, y1, x2, y2 = edge
+            col0, col1 = self._index(min(x1, x2)), self._index(max(x1, x2))
+            for row in range(self._index(min(y1, y2)), self._index(max(y1, y2)) + 1):
+                self.rows.setdefault(row, []).append(edge)
+                for col in range(col0, col1 + 1):
+                    self.cells.setdefault((col, row), []).append(edge)
+        self.span = (
+            self._index(self.bbox[0]),
+            self._index(self.bbox[1]),
+            self._index(self.bbox[2]),
+            self._index(self.bbox[3]),
+        )
+
+    def _index(self, value: float) -> int:
+        return math.floor(value / self.cell_size)
+
+    def contains(self, x: float, y: float) -> bool:
+        """
+        Ray casting test (even-odd rule) over the edges of the point's row.
+        """
+        if not bbox_contains(self.bbox, x, y):
+            return False
+        inside = False
+        for xi, yi, xj, yj in self.rows.get(self._index(y), ()):
+            if (yi > y) != (yj > y):
+                if x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+                    inside = not inside
+        return inside
+
+    def distance(self, x: float, y: float, limit: float = math.inf) -> float:
+        """
+        Shortest distance from the point to an edge, exact when below `limit`
+        (at least `limit` otherwise). Cells are searched in growing squares
+        around the point until no unvisited edge can be closer.
+        """
+        col, row = self._index(x), self._index(y)
+        min_col, min_row, max_col, max_row = self.span
+        best = math.inf
+        ring = 0
+        while True:
+            for cell in self._square(col, row, ring):
+                for edge in self.cells.get(cell, ()):
+                    d2 = _segment_distance2(x, y, *edge)
+                    if d2 < best:
+                        best = d2
+            # Edges of the next squares are at least this far
+            reach = ring * self.cell_size
+            exhausted = (
+                col - ring <= min_col
+                and row - ring <= min_row
+                and col + ring >= max_col
+                and row + ring >= max_row
+            )
+            if best <= reach * reach or reach >= limit or exhausted:
+                return math.sqrt(best)
+            ring += 1
+
+    @staticmethod
+    def _square(col: int, row: int, ring: int):
+        """
+        Cells at Chebyshev distance `ring` from (col, row).
+        """
+        if ring == 0:
+            yield col, row
+            return
+        for c in range(col - ring, col + ring + 1):
+            yield c, row - ring
+            yield c, row + ring
+        for r in range(row - ring + 1, row + ring):
+            yield col - ring, r
+            yield col + ring, r
@@ -0,0 +1,308 @@
+import asyncio
+import logging
+import time
+
+from fastapi import HTTPException
+from pydantic import BaseModel, Field
+
+from ..cantons_configuration import cantons
+from ..cantons_configuration.compiled import COMPILED_CANTONS
+from ..config import settings
+from . import cache, harvest_store, metrics, processing, timing
+from .singleflight import flights
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# GROUND CATEGORY OF A POINT
+# ============================================================
+# Shared by the drill-category routes, the grid, bulk jobs, warm-up and the
+# checker: canton resolution, cached and coalesced lookups served stale
+# while revalidating, and batches grouped by canton.
+
+
+class Coordinate(BaseModel):
+    coord_x: float = Field(..., gt=2400000, le=2900000)
+    coord_y: float = Field(..., gt=1070000, le=1300000)
+
+
+async def resolve_canton(coord_x: float, coord_y: float):
+    """
+    Return (canton code, canton configuration) for EPSG:2056 coordinates.
+    """
+    start = time.perf_counter()
+    canton_result = await processing.get_canton_from_coordinates(coord_x, coord_y)
+    code_canton = canton_result[0]["attributes"]["ak"] if canton_result else "none"
+    timing.observe(code_canton, "canton_lookup", time.perf_counter() - start)
+    if not canton_result:
+        raise HTTPException(404, detail="No canton found for these coordinates")
+
+    canton_config = cantons.CANTONS["cantons_configurations"].get(code_canton)
+    if not canton_config:
+        raise HTTPException(
+            404, detail=f"Configuration for canton {code_canton} not found!"
+        )
+    return code_canton, canton_config
+
+
+async def fetch_ground_category(
+    coord_x: float, coord_y: float, code_canton: str, canton_config: dict
+):
+    """
+    Fetch and reclass the cantonal features at a coordinate.
+    Returns: (ground_category, result_detail, error)
+    """
+    if settings.DRILL_CATEGORY_SOURCE == "harvest":
+        store = harvest_store.get_store(code_canton)
+        if store is not None:
+            return harvested_ground_category(coord_x, coord_y, code_canton, store)
+
+    # --- Fetch features (WMS or ESRI REST) ---
+    result = await processing.fetch_features_for_point(coord_x, coord_y, canton_config)
+    features = result["features"]
+
+    result_detail = {
+        "message": "Success",
+        "full_url": result["full_url"],
+        "detail": result["error"],
+    }
+    if result.get("retry_after"):
+        # Circuit open for this cantonal service: fast-fail
+        result_detail["message"] = "Service unavailable"
+        result_detail["retry_after"] = result["retry_after"]
+    # --- Process features into ground category ---
+    start = time.perf_counter()
+    features = processing.process_ground_category(
+        features, COMPILED_CANTONS[code_canton]
+    )
+    timing.observe(code_canton, "classify", time.perf_counter() - start)
+    return features, result_detail, result["error"]
+
+
+def harvested_ground_category(coord_x: float, coord_y: float, code_canton: str, store):
+    """
+    Ground category from the harvested polygons of the canton (no upstream call).
+    Returns: (ground_category, result_detail, error)
+    """
+    start = time.perf_counter()
+    features = harvest_store.classify(
+        store.lookup(coord_x, coord_y), COMPILED_CANTONS[code_canton]
+    )
+    timing.observe(code_canton, "classify", time.perf_counter() - start)
+    result_detail = {
+        "message": "Success",
+        "full_url": None,
+        "detail": None,
+        "source": "harvest",
+        "harvested_at": store.harvested_at,
+    }
+    return features, result_detail, None
+
+
+async def fetch_and_cache(
+    key, coord_x: float, coord_y: float, code_canton: str, canton_config: dict
+):
+    """
+    Fetch the ground category (one upstream request per pixel in flight) and
+    cache successful answers with the time they stay fresh until.
+    Returns: (ground_category, result_detail, error)
+    """
+    features, result_detail, error = await flights.do(
+        ("drill_category", key),
+        lambda: fetch_ground_category(coord_x, coord_y, code_canton, canton_config),
+    )
+
+    # Upstream errors are not cached
+    if settings.CACHE_ENABLED and not error:
+        ttl = cache.drill_category_ttl(canton_config)
+        await cache.drill_categories.aset(
+            key,
+            (features, result_detail, time.time() + ttl),
+            ttl + cache.stale_retention(),
+        )
+    return features, result_detail, error
+
+
+# Background refreshes of stale answers, by cache key
+_revalidations: dict = {}
+
+
+def revalidate(
+    key, coord_x: float, coord_y: float, code_canton: str, canton_config: dict
+):
+    """
+    Refresh a stale answer in the background, once per key at a time.
+    """
+    if key in _revalidations:
+        return
+
+    async def run():
+        try:
+            await fetch_and_cache(key, coord_x, coord_y, code_canton, canton_config)
+        except Exception as e:
+            logger.warning("Background refresh of %s failed: %s", key, e)
+        finally:
+            del _revalidations[key]
+
+    _revalidations[key] = asyncio.create_task(run())
+
+
+def stale_detail(result_detail: dict, staleness: float, reason: str) -> dict:
+    return {
+        **result_detail,
+        "stale": True,
+        "stale_seconds": round(staleness, 1),
+        "stale_reason": reason,
+    }
+
+
+async def compute_ground_category(
+    coord_x: float,
+    coord_y: float,
+    code_canton: str,
+    canton_config: dict,
+    use_cache: bool = True,
+):
+    """
+    Fetch, parse and reclass the cantonal features at a coordinate.
+    Successful answers are cached per canton and GetFeatureInfo pixel, and
+    concurrent lookups of the same pixel share one upstream request.
+
+    Expired answers are still served, marked `stale` in `result_detail`:
+    at once with a background refresh for CACHE_STALE_WHILE_REVALIDATE
+    seconds past their TTL, then only if the cantonal service fails, for
+    CACHE_STALE_IF_ERROR seconds.
+    """
+    start = time.perf_counter()
+    use_cache = use_cache and settings.CACHE_ENABLED
+    key = cache.drill_category_key(code_canton, canton_config, coord_x, coord_y)
+    cached = await cache.drill_categories.aget(key) if use_cache else None
+    state, staleness = cache.freshness(cached)
+
+    if state == "fresh":
+        features, result_detail = cached[0], cached[1]
+        timing.mark_cached("upstream_fetch", "parse", "classify")
+    elif state == "revalidate":
+        features = cached[0]
+        result_detail = stale_detail(cached[1], staleness, "revalidating")
+        timing.mark_cached("upstream_fetch", "parse", "classify")
+        metrics.STALE_RESPONSES.labels(code_canton, "revalidating").inc()
+        revalidate(key, coord_x, coord_y, code_canton, canton_config)
+    else:
+        stale_if_error = (
+            state == "expired" and staleness <= settings.CACHE_STALE_IF_ERROR
+        )
+        try:
+            features, result_detail, error = await fetch_and_cache(
+                key, coord_x, coord_y, code_canton, canton_config
+            )
+        except Exception as e:
+            if not stale_if_error:
+                raise
+            logger.warning("Serving stale answer for %s: %s", key, e)
+            error = str(e)
+
+        if error and stale_if_error:
+            features = cached[0]
+            result_detail = stale_detail(cached[1], staleness, "upstream_error")
+            metrics.STALE_RESPONSES.labels(code_canton, "upstream_error").inc()
+
+    status = "unavailable" if result_detail.get("retry_after") else "success"
+    metrics.DRILL_CATEGORY_DURATION.labels(code_canton).observe(
+        time.perf_counter() - start
+    )
+
+    return {
+        "coord_x": coord_x,
+        "coord_y": coord_y,
+        "canton": code_canton,
+        "canton_config": canton_config,
+        "ground_category": features,
+        "status": status,
+        "result_detail": result_detail,
+    }
+
+
+def _batch_error(coord_x: float, coord_y: float, error: Exception):
+    if isinstance(error, HTTPException):
+        message = error.detail
+    elif settings.ENVIRONMENT.upper() == "DEV":
+        message = str(error)
+    else:
+        message = "An internal error occurred. Please contact support."
+
+    return {
+        "coord_x": coord_x,
+        "coord_y": coord_y,
+        "canton": None,
+        "ground_category": None,
+        "status": "error",
+        "result_detail": {"message": message},
+    }
+
+
+async def batch_results(points: list, semaphore: asyncio.Semaphore) -> tuple:
+    """
+    Ground categories of unique points, as ({point: result}, {canton: config}).
+
+    Points are grouped by canton and fetched concurrently (bounded by the
+    semaphore and the per-host upstream connection limit); failed points get
+    an error result.
+    """
+    results = {}
+
+    # --- Load cached canton lookups at once (one shared tier round trip) ---
+    if settings.CACHE_ENABLED and settings.CANTON_LOOKUP.lower() != "local":
+        await cache.canton_lookups.aget_many([cache.canton_key(*p) for p in points])
+
+    # --- Determine canton for every unique point ---
+    async def locate(point):
+        async with semaphore:
+            try:
+                return point, await resolve_canton(*point)
+            except Exception as e:
+                logger.warning("Batch canton lookup failed for %s: %s", point, e)
+                results[point] = _batch_error(*point, e)
+                return point, None
+
+    groups = {}
+    for point, located in await asyncio.gather(*(locate(p) for p in points)):
+        if located is not None:
+            code_canton, canton_config = located
+            groups.setdefault(code_canton, (canton_config, []))[1].append(point)
+
+    # --- Load cached answers of all points at once (one shared tier round trip) ---
+    if settings.CACHE_ENABLED:
+        await cache.drill_categories.aget_many(
+            [
+                cache.drill_category_key(code_canton, canton_config, *point)
+                for code_canton, (canton_config, group) in groups.items()
+                for point in group
+            ]
+        )
+
+    # --- Fetch and reclass, grouped by canton ---
+    async def compute(point, code_canton, canton_config):
+        async with semaphore:
+            try:
+                result = await compute_ground_category(
+                    *point, code_canton, canton_config
+                )
+                del result["canton_config"]
+                results[point] = result
+            except Exception as e:
+                logger.warning("Batch drill category failed for %s: %s", point, e)
+                results[point] = _batch_error(*point, e)
+
+    await asyncio.gather(
+        *(
+            compute(point, code_canton, canton_config)
+            for code_canton, (canton_config, group) in groups.items()
+            for point in group
+        )
+    )
+
+    return results, {
+        code_canton: canton_config for code_canton, (canton_config, _) in groups.items()
+    }
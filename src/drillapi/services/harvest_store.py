@@ -0,0 +1,144 @@
+import json
+import logging
+from pathlib import Path
+
+from . import geometry
+from .text import normalize_string
+from ..cantons_configuration.compiled import COMPILED_CANTONS, CompiledCanton
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+GRID_CELL_SIZE = 2000.0
+
+
+# ============================================================
+# HARVESTED CANTONAL LAYERS (local polygon store)
+# ============================================================
+# One GeoJSON FeatureCollection per canton (see drillapi.harvest). Every
+# feature carries the layer it came from, its source value and the
+# (harmonized value, description) pairs precomputed from `property_values`;
+# the top-level "drillapi" member records the canton, the configuration
+# version it was harvested with and the harvest time.
+
+
+def store_path(code: str) -> Path:
+    return Path(settings.HARVEST_DIR) / f"{code}.geojson"
+
+
+class HarvestStore:
+    """
+    Harvested polygons of one canton: bounding-box grid prefilter, then
+    point-in-polygon.
+    """
+
+    def __init__(self, features: list, metadata: dict):
+        self.canton = metadata.get("canton")
+        self.config_version = metadata.get("config_version")
+        self.harvested_at = metadata.get("harvested_at")
+        self.grid = geometry.GridIndex(GRID_CELL_SIZE)
+        self.size = 0
+
+        for feature in features:
+            properties = feature.get("properties") or {}
+            record = (
+                properties.get("layer"),
+                properties.get("value"),
+                tuple(tuple(match) for match in properties.get("matches") or ()),
+            )
+            for rings in geometry.polygons_from_geojson(feature.get("geometry")):
+                bbox = geometry.ring_bbox(rings[0])
+                self.grid.insert(bbox, (bbox, rings, record))
+                self.size += 1
+
+    @classmethod
+    def from_file(cls, path: Path) -> "HarvestStore":
+        with open(path, "rb") as f:
+            data = json.load(f)
+        return cls(data.get("features", []), data.get("drillapi") or {})
+
+    def lookup(self, coord_x: float, coord_y: float) -> list:
+        """
+        (layer, value, matches) of every harvested polygon containing the point.
+        """
+        records = []
+        for bbox, rings, record in self.grid.candidates(coord_x, coord_y):
+            if geometry.bbox_contains(bbox, coord_x, coord_y):
+                if geometry.point_in_polygon(coord_x, coord_y, rings):
+                    records.append(record)
+        return records
+
+
+def classify(records: list, compiled: CompiledCanton) -> dict:
+    """
+    Ground category from harvested records, in the shape returned by
+    processing.process_ground_category.
+    """
+    if not records:
+        return {"layer_results": [], "harmonized_value": 4}
+
+    layer_results = []
+    for layer in compiled.layers:
+        value = next((r[1] for r in records if r[0] == layer.name), None)
+        layer_results.append(
+            {
+                "layer": layer.name,
+                "property_name": layer.property_name,
+                "value": normalize_string(value),
+            }
+        )
+
+    mapped_values = [target for _, _, matches in records for target, _ in matches]
+    source_values = [
+        desc for _, _, matches in records for _, desc in matches if desc is not None
+    ]
+    return {
+        "layer_results": layer_results,
+        "harmonized_value": max(mapped_values) if mapped_values else 4,
+        "source_values": ",".join(str(v) for v in source_values),
+    }
+
+
+_stores: dict = {}  # code -> (file mtime or None, store or None)
+
+
+def get_store(code: str) -> HarvestStore | None:
+    """
+    The harvested store of a canton, loaded again only when its file
+    changes. None when the canton was not harvested, or was harvested with
+    another configuration version (its precomputed values may be stale):
+    the live service is used then. A store written by a harvest while the
+    server runs is picked up on the next lookup.
+    """
+    path = store_path(code)
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        mtime = None
+    cached = _stores.get(code)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    store = None
+    if mtime is not None:
+        try:
+            store = HarvestStore.from_file(path)
+            logger.info("Loaded %d harvested polygons for %s", store.size, code)
+        except Exception as e:
+            logger.warning("Harvest store %s unusable: %s", path, e)
+    compiled = COMPILED_CANTONS.get(code)
+    if store is not None and (
+        compiled is None or store.config_version != compiled.config_version
+    ):
+        logger.warning(
+            "Harvest store %s was built for configuration %s, ignoring it",
+            path,
+            store.config_version,
+        )
+        store = None
+    _stores[code] = (mtime, store)
+    return store
+
+
+def reset():
+    _stores.clear()
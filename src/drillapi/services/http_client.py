@@ -0,0 +1,337 @@
+import asyncio
+import importlib.util
+import logging
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+import httpx
+
+from . import metrics, stats
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# SHARED UPSTREAM CLIENT
+# ============================================================
+# One pooled AsyncClient is shared by every service function so that
+# connections (TCP + TLS) to geo.admin.ch and the cantonal geoservices
+# are kept alive between requests. The FastAPI lifespan opens and closes
+# it; outside of the lifespan (Lambda warm invocations, plain TestClient)
+# it is created lazily on first use and kept at module level.
+
+_client: httpx.AsyncClient | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+_host_semaphores: dict[str, asyncio.Semaphore] = {}
+
+
+def http2_available() -> bool:
+    """
+    HTTP/2 needs the optional 'h2' package; without it httpx refuses http2=True.
+    """
+    return importlib.util.find_spec("h2") is not None
+
+
+def _build_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.UPSTREAM_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.UPSTREAM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.UPSTREAM_KEEPALIVE_EXPIRY,
+    )
+    http2 = settings.UPSTREAM_HTTP2 and http2_available()
+    if settings.UPSTREAM_HTTP2 and not http2:
+        logger.info("HTTP/2 requested but 'h2' is not installed, using HTTP/1.1")
+
+    return httpx.AsyncClient(
+        limits=limits,
+        http2=http2,
+        timeout=settings.UPSTREAM_TIMEOUT,
+        headers={"Accept-Encoding": "gzip, deflate"},
+        follow_redirects=True,
+    )
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Return the shared upstream client, creating it if needed.
+
+    A pooled client is bound to the event loop it was first used on, so a new
+    one is built if the running loop changed (e.g. TestClient without lifespan).
+    """
+    global _client, _client_loop
+
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = _build_client()
+        _client_loop = loop
+        _host_semaphores.clear()
+    return _client
+
+
+def _host_semaphore(url: str) -> asyncio.Semaphore:
+    host = urlsplit(url).netloc
+    semaphore = _host_semaphores.get(host)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(settings.UPSTREAM_MAX_CONNECTIONS_PER_HOST)
+        _host_semaphores[host] = semaphore
+    return semaphore
+
+
+# ============================================================
+# ADAPTIVE TIMEOUTS, HEDGING AND RETRY BUDGET
+# ============================================================
+RETRYABLE_STATUS = frozenset((502, 503, 504))
+
+
+class LatencyTracker:
+    """
+    Recent response times of one upstream host.
+    """
+
+    __slots__ = ("samples", "requests", "retries", "hedges", "hedge_wins")
+
+    def __init__(self):
+        self.samples: deque = deque(maxlen=settings.UPSTREAM_LATENCY_SAMPLES)
+        self.requests = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def observe(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, q: float):
+        if len(self.samples) < settings.UPSTREAM_LATENCY_MIN_SAMPLES:
+            return None
+        return stats.percentile(self.samples, q)
+
+    def timeout(self, default: float) -> float:
+        """
+        p99 times UPSTREAM_TIMEOUT_MULTIPLIER, never above the configured timeout.
+        """
+        p99 = self.percentile(99)
+        if p99 is None:
+            return default
+        adaptive = p99 * settings.UPSTREAM_TIMEOUT_MULTIPLIER
+        return min(default, max(settings.UPSTREAM_TIMEOUT_MIN, adaptive))
+
+    def hedge_delay(self):
+        """
+        Send a hedged duplicate once the primary request exceeds ~p95.
+        """
+        if not settings.UPSTREAM_HEDGING:
+            return None
+        p95 = self.percentile(95)
+        if p95 is None:
+            return None
+        return max(settings.UPSTREAM_HEDGE_MIN_DELAY, p95)
+
+    def snapshot(self) -> dict:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+class RetryBudget:
+    """
+    Global token bucket shared by retries and hedged requests: every request
+    deposits UPSTREAM_RETRY_BUDGET_RATIO tokens, every retry or hedge spends
+    one, so extra load stays a bounded fraction of normal traffic.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.tokens = float(settings.UPSTREAM_RETRY_BUDGET_MIN)
+        self.exhausted = 0
+
+    def deposit(self):
+        self.tokens = min(
+            settings.UPSTREAM_RETRY_BUDGET_MAX,
+            self.tokens + settings.UPSTREAM_RETRY_BUDGET_RATIO,
+        )
+
+    def withdraw(self) -> bool:
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        self.exhausted += 1
+        return False
+
+
+_latency: dict[str, LatencyTracker] = {}
+retry_budget = RetryBudget()
+
+
+def _tracker(host: str) -> LatencyTracker:
+    tracker = _latency.get(host)
+    if tracker is None:
+        tracker = LatencyTracker()
+        _latency[host] = tracker
+    return tracker
+
+
+async def _attempt(url: str, params, timeout: float, tracker: LatencyTracker | None):
+    client = get_client()
+    async with _host_semaphore(url):
+        host = urlsplit(url).netloc
+        start = time.perf_counter()
+        try:
+            resp = await client.get(url, params=params, timeout=timeout)
+        except httpx.TimeoutException as e:
+            if tracker is not None:
+                tracker.observe(timeout)
+            metrics.UPSTREAM_ERRORS.labels(host, type(e).__name__).inc()
+            raise
+        except httpx.TransportError as e:
+            metrics.UPSTREAM_ERRORS.labels(host, type(e).__name__).inc()
+            raise
+        if tracker is not None:
+            tracker.observe(time.perf_counter() - start)
+        metrics.UPSTREAM_RESPONSES.labels(host, resp.status_code).inc()
+        return resp
+
+
+async def _hedged(url: str, params, timeout: float, tracker: LatencyTracker):
+    """
+    Run the request; if it is still pending after the hedge delay, send a
+    duplicate and return whichever succeeds first.
+    """
+    primary = asyncio.ensure_future(_attempt(url, params, timeout, tracker))
+    tasks = [primary]
+    try:
+        delay = tracker.hedge_delay()
+        if delay is not None:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if not done and retry_budget.withdraw():
+                tracker.hedges += 1
+                tasks.append(
+                    asyncio.ensure_future(_attempt(url, params, timeout, tracker))
+                )
+
+        pending = set(tasks)
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    if task is not primary:
+                        tracker.hedge_wins += 1
+                    return task.result()
+                error = error or task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+async def get(
+    url: str,
+    params: dict | None = None,
+    timeout: float | None = None,
+    adaptive: bool = True,
+):
+    """
+    GET an upstream URL through the shared client, limited per host.
+
+    The timeout adapts to the host's observed p99 (capped by `timeout`), slow
+    requests are hedged past ~p95, and transport errors or 502/503/504 are
+    retried up to UPSTREAM_MAX_RETRIES times within the global retry budget.
+
+    Without `adaptive` (area and harvest queries, much heavier than point
+    queries), `timeout` applies as is, nothing is hedged and the request is
+    kept out of the host's latency samples.
+    """
+    host = urlsplit(url).netloc
+    timeout = timeout if timeout is not None else settings.UPSTREAM_TIMEOUT
+    tracker = _tracker(host) if adaptive else None
+    if tracker is not None:
+        tracker.requests += 1
+        timeout = tracker.timeout(timeout)
+    retry_budget.deposit()
+
+    attempt = 0
+    while True:
+        try:
+            if tracker is None:
+                resp = await _attempt(url, params, timeout, None)
+            else:
+                resp = await _hedged(url, params, timeout, tracker)
+        except httpx.TransportError:
+            if attempt >= settings.UPSTREAM_MAX_RETRIES or not retry_budget.withdraw():
+                raise
+        else:
+            if (
+                resp.status_code not in RETRYABLE_STATUS
+                or attempt >= settings.UPSTREAM_MAX_RETRIES
+                or not retry_budget.withdraw()
+            ):
+                return resp
+
+        attempt += 1
+        if tracker is not None:
+            tracker.retries += 1
+        logger.info("Retrying upstream GET %s (attempt %d)", host, attempt + 1)
+        await asyncio.sleep(settings.UPSTREAM_RETRY_BACKOFF * attempt)
+
+
+def upstream_stats() -> dict:
+    return {
+        "hosts": {
+            host: tracker.snapshot() for host, tracker in sorted(_latency.items())
+        },
+        "retry_budget": {
+            "tokens": round(retry_budget.tokens, 2),
+            "exhausted": retry_budget.exhausted,
+        },
+    }
+
+
+def reset_stats():
+    _latency.clear()
+    retry_budget.reset()
+
+
+async def preconnect(url: str, timeout: float = 5.0) -> bool:
+    """
+    Open a pooled connection (TCP + TLS) to the URL's host ahead of traffic,
+    with a HEAD request whose status does not matter.
+    """
+    try:
+        await get_client().head(url, timeout=timeout)
+        return True
+    except Exception as e:
+        logger.info("Could not pre-connect to %s: %s", urlsplit(url).netloc, e)
+        return False
+
+
+async def startup():
+    """
+    Open the shared client (called from the FastAPI lifespan).
+    """
+    get_client()
+
+
+async def shutdown():
+    """
+    Close the shared client and release pooled connections.
+    """
+    global _client, _client_loop
+
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
+    _host_semaphores.clear()
@@ -0,0 +1,293 @@
+import bisect
+import math
+import time
+
+# ============================================================
+# PROMETHEUS-STYLE METRICS (text exposition format 0.0.4)
+# ============================================================
+# Label values are positional; each label combination is bound once to a
+# child object and reused, so recording a value does not allocate a label dict.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    20.0,
+)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict = {}
+        registry.append(self)
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            child = self._new_child()
+            self._children[values] = child
+        return child
+
+    def _header(self) -> list:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = "counter"
+    _new_child = staticmethod(_Value)
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def render(self) -> list:
+        lines = self._header()
+        for values, child in self._children.items():
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}{labels} {_format_number(child.value)}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0):
+        self.labels().dec(amount)
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple = (),
+        buckets: tuple = LATENCY_BUCKETS,
+    ):
+        self.buckets = tuple(buckets)
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def render(self) -> list:
+        lines = self._header()
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), child.counts):
+                cumulative += count
+                labels = _format_labels(
+                    self.labelnames, values, f'le="{_format_number(bound)}"'
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_number(child.sum)}")
+            lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+registry: list = []
+# Callables returning extra exposition lines, evaluated at scrape time
+collectors: list = []
+
+
+def sample_lines(
+    name: str, documentation: str, kind: str, labelname: str, samples: dict
+) -> list:
+    """
+    Exposition lines for values owned elsewhere (caches, breakers...),
+    read at scrape time: `samples` maps a label value to a number.
+    """
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    for value, number in samples.items():
+        labels = _format_labels((labelname,), (value,))
+        lines.append(f"{name}{labels} {_format_number(number)}")
+    return lines
+
+
+def render() -> str:
+    lines = []
+    for metric in registry:
+        lines.extend(metric.render())
+    for collector in collectors:
+        lines.extend(collector())
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    for metric in registry:
+        metric._children.clear()
+
+
+# ============================================================
+# DRILLAPI METRICS
+# ============================================================
+STAGE_DURATION = Histogram(
+    "drillapi_stage_duration_seconds",
+    "Duration of drill-category stages per canton",
+    ("canton", "stage"),
+)
+DRILL_CATEGORY_DURATION = Histogram(
+    "drillapi_drill_category_duration_seconds",
+    "End-to-end drill category computation per canton",
+    ("canton",),
+)
+STALE_RESPONSES = Counter(
+    "drillapi_stale_responses_total",
+    "Drill categories served stale per canton and reason",
+    ("canton", "reason"),
+)
+UPSTREAM_RESPONSES = Counter(
+    "drillapi_upstream_responses_total",
+    "Upstream HTTP responses per host and status code",
+    ("host", "status"),
+)
+UPSTREAM_ERRORS = Counter(
+    "drillapi_upstream_errors_total",
+    "Upstream requests that failed without a response, per host and error type",
+    ("host", "error"),
+)
+HTTP_REQUESTS = Counter(
+    "drillapi_http_requests_total",
+    "HTTP requests per route and status code",
+    ("route", "status"),
+)
+HTTP_DURATION = Histogram(
+    "drillapi_http_request_duration_seconds",
+    "HTTP request duration per route",
+    ("route",),
+)
+HTTP_RESPONSE_SIZE = Histogram(
+    "drillapi_http_response_size_bytes",
+    "HTTP response body size per route",
+    ("route",),
+    SIZE_BUCKETS,
+)
+HTTP_IN_FLIGHT = Gauge(
+    "drillapi_http_requests_in_flight",
+    "HTTP requests currently being served",
+)
+RATE_LIMITED = Counter(
+    "drillapi_rate_limited_total",
+    "Requests rejected by the rate limiter",
+)
+
+
+def observe_stage(canton: str, stage: str, seconds: float):
+    STAGE_DURATION.labels(canton, stage).observe(seconds)
+
+
+# ============================================================
+# ASGI MIDDLEWARE
+# ============================================================
+class MetricsMiddleware:
+    """
+    Count requests, durations, response sizes and in-flight requests per route.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = [500]
+        size = [0]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            elif message["type"] == "http.response.body":
+                size[0] += len(message.get("body", b""))
+            await send(message)
+
+        in_flight = HTTP_IN_FLIGHT.labels()
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight.dec()
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            HTTP_REQUESTS.labels(route_path, status[0]).inc()
+            HTTP_DURATION.labels(route_path).observe(time.perf_counter() - start)
+            HTTP_RESPONSE_SIZE.labels(route_path).observe(size[0])
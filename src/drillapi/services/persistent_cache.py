@@ -0,0 +1,125 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Share of max_bytes kept after an eviction pass
+EVICTION_TARGET = 0.9
+# Entries deleted per eviction statement (oldest writes first)
+EVICTION_BATCH = 500
+
+
+# ============================================================
+# PERSISTENT CACHE TIER (SQLite file)
+# ============================================================
+# Survives restarts and Lambda cold starts (file under /tmp or on a mounted
+# volume). WAL mode lets several workers share the file; reads go through
+# SQLite's memory map. Entries expire on wall-clock time, and the file is
+# kept under max_bytes by deleting the oldest writes.
+#
+# Calls are synchronous: local reads and writes take microseconds, well
+# below the upstream calls the tier saves.
+
+
+class SQLiteStore:
+    def __init__(self, path: Path, max_bytes: int):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(f"PRAGMA mmap_size={int(max_bytes)}")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                expires_at REAL NOT NULL,
+                size INTEGER NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )""")
+        self.bytes = self._total_bytes()
+        self.evictions = 0
+
+    def _total_bytes(self) -> int:
+        return self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()[0]
+
+    def get(self, namespace: str, key):
+        """
+        (value, expires_at) or None. expires_at is a time.time() timestamp.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM entries WHERE namespace = ? AND key = ?",
+                (namespace, _dumps(key)),
+            ).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, namespace: str, key, body: bytes, ttl: float):
+        """
+        Store an already JSON-serialized value.
+        """
+        if ttl <= 0 or len(body) > self.max_bytes:
+            return
+        key = _dumps(key)
+        with self._lock:
+            # A replaced row no longer counts
+            old = self._db.execute(
+                "SELECT size FROM entries WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (namespace, key, body, time.time() + ttl, len(body)),
+            )
+            self.bytes += len(body) - (old[0] if old else 0)
+            if self.bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        self._db.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+        self.bytes = self._total_bytes()
+        target = self.max_bytes * EVICTION_TARGET
+        while self.bytes > target:
+            deleted = self._db.execute(
+                "DELETE FROM entries WHERE rowid IN "
+                "(SELECT rowid FROM entries ORDER BY rowid LIMIT ?)",
+                (EVICTION_BATCH,),
+            ).rowcount
+            self.evictions += deleted
+            self.bytes = self._total_bytes()
+            if not deleted:
+                break
+
+    def clear(self, namespace: str | None = None):
+        """
+        Delete the entries of one namespace, or all of them.
+        """
+        with self._lock:
+            if namespace is None:
+                self._db.execute("DELETE FROM entries")
+                self.evictions = 0
+            else:
+                self._db.execute(
+                    "DELETE FROM entries WHERE namespace = ?", (namespace,)
+                )
+            self.bytes = self._total_bytes()
+
+    def close(self):
+        self._db.close()
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, separators=(",", ":"))
@@ -0,0 +1,97 @@
+import gzip
+import hashlib
+import json
+
+import brotli
+from fastapi import Request, Response
+
+from ..config import settings
+
+
+# ============================================================
+# PRE-SERIALIZED STATIC RESPONSES
+# ============================================================
+class PrecomputedResponse:
+    """
+    JSON payload serialized once, with gzip/brotli variants and strong ETags.
+    """
+
+    __slots__ = ("bodies", "etags")
+
+    def __init__(self, payload, version: str):
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode(
+            "utf-8"
+        )
+        digest = hashlib.sha256(body).hexdigest()[:16]
+
+        # Content-Encoding → body; strong ETags differ per encoding
+        self.bodies = {
+            "identity": body,
+            "gzip": gzip.compress(body, 9, mtime=0),
+            "br": brotli.compress(body),
+        }
+        self.etags = {
+            encoding: f'"{version}-{digest}"'
+            + ("" if encoding == "identity" else f"-{encoding}")
+            for encoding in self.bodies
+        }
+
+    def _select_encoding(self, accept_encoding: str) -> str:
+        accepted = set()
+        for item in accept_encoding.split(","):
+            coding, _, params = item.strip().partition(";")
+            coding = coding.strip().lower()
+            params = params.replace(" ", "")
+            if params.startswith("q="):
+                try:
+                    if float(params[2:]) == 0:
+                        continue
+                except ValueError:
+                    continue
+            accepted.add(coding)
+
+        for encoding in ("br", "gzip"):
+            if encoding in self.bodies and (encoding in accepted or "*" in accepted):
+                return encoding
+        return "identity"
+
+    def _not_modified(self, if_none_match: str, encoding: str) -> bool:
+        # Only the ETag of the representation being served validates: a
+        # client holding the gzip variant must not get a 304 for brotli
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or self.etags[encoding] in tags
+
+    def respond(self, request: Request) -> Response:
+        encoding = self._select_encoding(request.headers.get("accept-encoding", ""))
+        headers = {
+            "ETag": self.etags[encoding],
+            "Cache-Control": f"public, max-age={settings.CANTONS_CACHE_MAX_AGE}",
+            "Vary": "Accept-Encoding",
+        }
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and self._not_modified(if_none_match, encoding):
+            return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(
+            content=self.bodies[encoding],
+            media_type="application/json",
+            headers=headers,
+        )
+
+
+_responses: dict[tuple, PrecomputedResponse] = {}
+
+
+def get_response(key: str, version: str, build_payload) -> PrecomputedResponse:
+    """
+    Return the precomputed response for `key`, built once per config version.
+    """
+    cache_key = (key, version)
+    response = _responses.get(cache_key)
+    if response is None:
+        response = PrecomputedResponse(build_payload(), version)
+        _responses[cache_key] = response
+    return response
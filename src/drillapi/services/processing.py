@@ -1,40 +1,84 @@
-import httpx
+import asyncio
 import json
-import re
-import xml.etree.ElementTree as ET
+import time
 from fastapi import HTTPException
 import logging
-from owslib.etree import etree
+from . import http_client, canton_index, cache, circuit_breaker, timing
+from .singleflight import flights
+from .text import normalize_string
+from ..cantons_configuration.compiled import CompiledCanton, compile_layers
+from ..config import settings
 
 logger = logging.getLogger(__name__)
 
 
 # ============================================================
-# STRING NORMALIZATION
+# CANTON LOOKUP (geo.admin.ch)
 # ============================================================
-def normalize_string(value: str) -> str:
+def get_canton_from_index(coord_x: float, coord_y: float):
     """
-    Fix common double-encoding issues from WMS or ESRI JSON responses.
-    Example: 'unzul\\u00e4ssig' → 'unzulässig'
+    Resolve the canton from the offline boundary index.
+    Returns a geo.admin.ch-like "results" array, or None when the point is
+    outside the index or closer than CANTON_BORDER_BUFFER to a border.
     """
-    if not isinstance(value, str):
-        return value
-    try:
-        # Try decoding strings that were double-encoded (latin1→utf8)
-        return value.encode("latin1").decode("utf-8")
-    except Exception:
-        return value
+    index = canton_index.get_index()
+    if index is None:
+        return None
+
+    code, border_distance = index.locate(
+        coord_x, coord_y, settings.CANTON_BORDER_BUFFER
+    )
+    if code is None or border_distance < settings.CANTON_BORDER_BUFFER:
+        return None
+
+    return [{"attributes": {"ak": code}, "source": "local"}]
 
 
-# ============================================================
-# CANTON LOOKUP (geo.admin.ch)
-# ============================================================
 async def get_canton_from_coordinates(coord_x: float, coord_y: float):
+    """
+    Find the canton (AK code) for EPSG:2056 coordinates: from the canton
+    cache, then the offline boundary index when CANTON_LOOKUP is "local",
+    else geo.admin.ch.
+    Returns: list of dicts (geo.admin.ch "results" array)
+    """
+    key = cache.canton_key(coord_x, coord_y)
+    if settings.CACHE_ENABLED:
+        results = await cache.canton_lookups.aget(key)
+        if results is not None:
+            timing.mark_cached("canton_lookup")
+            return results
+
+    results = None
+    if settings.CANTON_LOOKUP.lower() == "local":
+        results = get_canton_from_index(coord_x, coord_y)
+    if results:
+        if settings.CACHE_ENABLED:
+            await cache.canton_lookups.aset(key, results, settings.CACHE_CANTON_TTL)
+        return results
+
+    # Identical lookups in flight share one geo.admin.ch call
+    results = await flights.do(
+        ("canton", key), lambda: get_canton_from_geoadmin(coord_x, coord_y)
+    )
+    # Only the attributes are used: never keep a canton outline (~0.5 MB) in
+    # the cache, even if the service sends one
+    results = [
+        {k: v for k, v in result.items() if k != "geometry"} for result in results
+    ]
+    if results and settings.CACHE_ENABLED:
+        await cache.canton_lookups.aset(key, results, settings.CACHE_CANTON_TTL)
+    return results
+
+
+async def get_canton_from_geoadmin(
+    coord_x: float, coord_y: float, geometry: bool = False
+):
     """
     Query geo.admin.ch to find the canton (AK code) for EPSG:2056 coordinates.
+    The canton outline (hundreds of KB) is only returned with `geometry`.
     Returns: list of dicts (geo.admin.ch "results" array)
     """
-    url = "https://api3.geo.admin.ch/rest/services/ech/MapServer/identify"
+    url = settings.GEOADMIN_IDENTIFY_URL
     params = {
         "geometry": f"{coord_x},{coord_y}",
         "geometryType": "esriGeometryPoint",
@@ -42,13 +86,13 @@ async def get_canton_from_coordinates(coord_x: float, coord_y: float):
         "layers": "all:ch.swisstopo.swissboundaries3d-kanton-flaeche.fill",
         "tolerance": "0",
         "lang": "en",
+        "returnGeometry": "true" if geometry else "false",
     }
 
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.get(url, params=params)
-            resp.raise_for_status()
-            payload = resp.json()
+        resp = await http_client.get(url, params=params, timeout=10.0)
+        resp.raise_for_status()
+        payload = resp.json()
     except Exception as e:
         logger.error("Failed to fetch canton for (%.2f, %.2f): %s", coord_x, coord_y, e)
         raise HTTPException(500, detail=f"Failed to fetch canton: {e}")
@@ -61,6 +105,113 @@ async def get_canton_from_coordinates(coord_x: float, coord_y: float):
     return results
 
 
+# ============================================================
+# ESRI REST (query per layer, or one MapServer identify)
+# ============================================================
+def _esri_layer_ids(config: dict) -> list:
+    layer_ids = [layer.get("id") for layer in config["layers"]]
+    if any(layer_id is None for layer_id in layer_ids):
+        raise RuntimeError("Layer config missing 'id' for ESRI REST service")
+    return layer_ids
+
+
+async def _query_esri_layer(coord_x: float, coord_y: float, config: dict, layer_id):
+    esri_url = f"{config['query_url'].rstrip('/')}/{layer_id}/query"
+
+    params = {
+        "geometry": f"{coord_x},{coord_y}",
+        "geometryType": "esriGeometryPoint",
+        "spatialRel": "esriSpatialRelIntersects",
+        "outFields": "*",
+        "returnGeometry": "false",
+        "f": "json",
+    }
+
+    resp = await http_client.get(esri_url, params=params)
+    full_url = str(resp.request.url)
+    resp.raise_for_status()
+    return resp.content, full_url
+
+
+def parse_esri_query(content: bytes, layer_id) -> list:
+    """
+    Features of an ESRI /query answer, each tagged with its 'layerId'.
+    """
+    features = json.loads(content).get("features") or []
+    for feature in features:
+        feature["layerId"] = layer_id
+    return features
+
+
+async def fetch_esri_layers(coord_x: float, coord_y: float, config: dict):
+    """
+    Query every configured layer's /query endpoint concurrently.
+    Returns: ([(layer_id, raw answer), ...], full_url), to be decoded with
+    parse_esri_query
+    """
+    layer_ids = _esri_layer_ids(config)
+
+    results = await asyncio.gather(
+        *(
+            _query_esri_layer(coord_x, coord_y, config, layer_id)
+            for layer_id in layer_ids
+        ),
+        return_exceptions=True,
+    )
+
+    payloads = []
+    urls = []
+    for layer_id, result in zip(layer_ids, results):
+        if isinstance(result, BaseException):
+            raise result
+        content, url = result
+        payloads.append((layer_id, content))
+        urls.append(url)
+
+    return payloads, ", ".join(urls)
+
+
+async def fetch_esri_identify(coord_x: float, coord_y: float, config: dict):
+    """
+    Single MapServer /identify call across all configured layers
+    (enabled per canton with 'esri_identify': True).
+
+    Note: identify returns attributes keyed by field alias, so 'property_name'
+    must match the alias for cantons using this mode.
+    Returns: (raw answer, full_url), to be decoded with parse_esri_identify
+    """
+    layer_ids = _esri_layer_ids(config)
+    delta = config["bbox_delta"]
+
+    params = {
+        "geometry": f"{coord_x},{coord_y}",
+        "geometryType": "esriGeometryPoint",
+        "sr": "2056",
+        "layers": "all:" + ",".join(str(layer_id) for layer_id in layer_ids),
+        "tolerance": "0",
+        "mapExtent": f"{coord_x - delta},{coord_y - delta},{coord_x + delta},{coord_y + delta}",
+        "imageDisplay": "101,101,96",
+        "returnGeometry": "false",
+        "f": "json",
+    }
+
+    identify_url = f"{config['query_url'].rstrip('/')}/identify"
+    resp = await http_client.get(identify_url, params=params)
+    full_url = str(resp.request.url)
+    resp.raise_for_status()
+    return resp.content, full_url
+
+
+def parse_esri_identify(content: bytes) -> list:
+    """
+    Features ('attributes' and 'layerId') of an ESRI /identify answer.
+    """
+    return [
+        {"attributes": result.get("attributes") or {}, "layerId": result.get("layerId")}
+        for result in json.loads(content).get("results") or []
+    ]
+
+
 # ============================================================
 # FETCH WMS OR ESRI FEATURES
 # ============================================================
@@ -70,108 +221,143 @@ async def fetch_features_for_point(coord_x: float, coord_y: float, config: dict)
       - ESRI REST Feature Service (info_format='arcgis/json'), or
       - WMS GetFeatureInfo for other formats.
 
+    Calls go through the circuit breaker of the canton's query_url host.
+    While the circuit is open, returns at once with an error and a
+    "retry_after" hint (seconds).
+
     Returns:
         dict: {
             "features": [...],
             "full_url": str,
-            "error": Optional[str]
+            "error": Optional[str],
+            "retry_after": Optional[int]
         }
     """
+    breaker = circuit_breaker.for_url(config["query_url"])
+    token = breaker.allow() if settings.BREAKER_ENABLED else circuit_breaker.CALL
+    if token is None:
+        return {
+            "features": [],
+            "full_url": "",
+            "error": f"Service unavailable: circuit open for {breaker.name}",
+            "retry_after": breaker.retry_after(),
+        }
+
+    start = time.perf_counter()
+    result = None
+    try:
+        result = await _fetch_features(coord_x, coord_y, config)
+    finally:
+        if result is None:
+            breaker.release(token)
+        else:
+            breaker.record(
+                time.perf_counter() - start, result.pop("service_failed"), token
+            )
+    result["retry_after"] = None
+    return result
+
+
+async def _fetch_features(coord_x: float, coord_y: float, config: dict):
     info_format = config["info_format"].lower()
+    canton = config.get("name", "unknown")
     features = []
     full_url = ""
     error_message = None
+    # Only failures of the service itself count for the circuit breaker
+    service_failed = False
 
-    async with httpx.AsyncClient(timeout=20.0) as client:
-        try:
-            if "arcgis" in info_format:
-                for layer in config["layers"]:
-                    layer_id = layer.get("id")
-                    if layer_id is None:
-                        raise RuntimeError(
-                            "Layer config missing 'id' for ESRI REST service"
-                        )
-
-                    esri_url = f"{config['query_url'].rstrip('/')}/{layer_id}/query"
-
-                    params = {
-                        "geometry": f"{coord_x},{coord_y}",
-                        "geometryType": "esriGeometryPoint",
-                        "spatialRel": "esriSpatialRelIntersects",
-                        "outFields": "*",
-                        "returnGeometry": "false",
-                        "f": "json",
-                    }
-
-                    resp = await client.get(esri_url, params=params)
-                    full_url = str(resp.request.url)
-                    resp.raise_for_status()
-
-                    data = resp.json()
-                    features = data.get("features") or []
-
-            # ---------- WMS GetFeatureInfo ----------
+    try:
+        if "arcgis" in info_format:
+            start = time.perf_counter()
+            if config.get("esri_identify"):
+                content, full_url = await fetch_esri_identify(coord_x, coord_y, config)
             else:
-                delta = config["bbox_delta"]
-                width = 101
-                height = 101
-
-                minx, miny = coord_x - delta, coord_y - delta
-                maxx, maxy = coord_x + delta, coord_y + delta
-                bbox = f"{minx},{miny},{maxx},{maxy}"
-
-                layers_list = ",".join([layer["name"] for layer in config["layers"]])
-
-                i = int((coord_x - minx) / (maxx - minx) * width)
-                j = int((maxy - coord_y) / (maxy - miny) * height)
-
-                params_wms = {
-                    "SERVICE": "WMS",
-                    "VERSION": "1.3.0",
-                    "REQUEST": "GetFeatureInfo",
-                    "QUERY_LAYERS": layers_list,
-                    "LAYERS": layers_list,
-                    "INFO_FORMAT": config.get("info_format", "text/plain"),
-                    "I": str(i),
-                    "J": str(j),
-                    "CRS": "EPSG:2056",
-                    "WIDTH": str(width),
-                    "HEIGHT": str(height),
-                    "BBOX": bbox,
-                    "STYLES": config.get("style", ""),
-                    "FEATURE_COUNT": config.get("feature_count", 10),
-                }
+                payloads, full_url = await fetch_esri_layers(coord_x, coord_y, config)
+            timing.observe(canton, "upstream_fetch", time.perf_counter() - start)
 
-                query_url = config["query_url"]
-                try:
-                    resp = await client.get(query_url, params=params_wms)
-                    full_url = str(resp.request.url)
-                    resp.raise_for_status()
-                except Exception as e:
-                    error_message = f"WMS request failed: {e}"
-                    logger.error("%s — URL: %s", error_message, full_url)
-                    return {
-                        "features": [],
-                        "full_url": full_url,
-                        "error": error_message,
-                    }
+            # Decoding the ESRI JSON (json.loads) is part of the parse stage
+            start = time.perf_counter()
+            if config.get("esri_identify"):
+                features = parse_esri_identify(content)
+            else:
+                features = [
+                    feature
+                    for layer_id, content in payloads
+                    for feature in parse_esri_query(content, layer_id)
+                ]
+            timing.observe(canton, "parse", time.perf_counter() - start)
+
+        # ---------- WMS GetFeatureInfo ----------
+        else:
+            delta = config["bbox_delta"]
+            width = 101
+            height = 101
+
+            minx, miny = coord_x - delta, coord_y - delta
+            maxx, maxy = coord_x + delta, coord_y + delta
+            bbox = f"{minx},{miny},{maxx},{maxy}"
+
+            layers_list = ",".join([layer["name"] for layer in config["layers"]])
+
+            i = int((coord_x - minx) / (maxx - minx) * width)
+            j = int((maxy - coord_y) / (maxy - miny) * height)
+
+            params_wms = {
+                "SERVICE": "WMS",
+                "VERSION": "1.3.0",
+                "REQUEST": "GetFeatureInfo",
+                "QUERY_LAYERS": layers_list,
+                "LAYERS": layers_list,
+                "INFO_FORMAT": config.get("info_format", "text/plain"),
+                "I": str(i),
+                "J": str(j),
+                "CRS": "EPSG:2056",
+                "WIDTH": str(width),
+                "HEIGHT": str(height),
+                "BBOX": bbox,
+                "STYLES": config.get("style", ""),
+                "FEATURE_COUNT": config.get("feature_count", 10),
+            }
 
-                try:
-                    features = parse_wms_getfeatureinfo(
-                        resp.content, config["info_format"], config
-                    )
-                except Exception as e:
-                    error_message = f"Failed to parse WMS response: {e}"
-                    logger.error("%s — URL: %s", error_message, full_url)
+            query_url = config["query_url"]
+            start = time.perf_counter()
+            try:
+                resp = await http_client.get(query_url, params=params_wms)
+                full_url = str(resp.request.url)
+                resp.raise_for_status()
+            except Exception as e:
+                error_message = f"WMS request failed: {e}"
+                logger.error("%s — URL: %s", error_message, full_url)
+                return {
+                    "features": [],
+                    "full_url": full_url,
+                    "error": error_message,
+                    "service_failed": circuit_breaker.is_service_failure(e),
+                }
+            finally:
+                timing.observe(canton, "upstream_fetch", time.perf_counter() - start)
+
+            start = time.perf_counter()
+            try:
+                features = parse_wms_getfeatureinfo(
+                    resp.content, config["info_format"], config
+                )
+            except Exception as e:
+                error_message = f"Failed to parse WMS response: {e}"
+                logger.error("%s — URL: %s", error_message, full_url)
+            timing.observe(canton, "parse", time.perf_counter() - start)
 
-        except Exception as e:
-            error_message = f"Unexpected error in fetch_features_for_point: {e}"
-            logger.exception(error_message)
+    except Exception as e:
+        error_message = f"Unexpected error in fetch_features_for_point: {e}"
+        logger.exception(error_message)
+        service_failed = circuit_breaker.is_service_failure(e)
     # Always return structured result (even if empty)
     return {
         "features": features,
         "full_url": full_url,
         "error": error_message,
+        "service_failed": service_failed,
     }
 
 
@@ -180,12 +366,22 @@ async def fetch_features_for_point(coord_x: float, coord_y: float, config: dict)
 # ============================================================
 
 
+GML_NS = "http://www.opengis.net/gml"
+GML_FEATURE_MEMBER = f"{{{GML_NS}}}featureMember"
+GML_NAME = f"{{{GML_NS}}}name"
+GML_NAME_PATH = f".//{GML_NAME}"
+SKIPPED_MEMBER_TAGS = frozenset(("boundedby", "geometry", "polygon", "multipolygon"))
+SKIPPED_FEATURE_TAGS = frozenset(("boundedby", "geometry"))
+
+
+def _property_names(config: dict) -> frozenset:
+    return frozenset(layer.get("property_name") for layer in config.get("layers", []))
+
+
 def parse_wms_getfeatureinfo(content: bytes, info_format: str, config: dict):
     """
     Parser for differents geoservices outputs
     """
-
-    text = content.decode("utf-8", errors="ignore")
     info_format = (info_format or "").lower().strip()
 
     # ----------------------------------------------------------------------
@@ -193,7 +389,10 @@ def parse_wms_getfeatureinfo(content: bytes, info_format: str, config: dict):
     # ----------------------------------------------------------------------
     if "json" in info_format or "arcgis" in info_format:
         try:
-            data = json.loads(text)
+            try:
+                data = json.loads(content)
+            except UnicodeDecodeError:
+                data = json.loads(content.decode("utf-8", errors="ignore"))
         except Exception as e:
             raise HTTPException(500, f"Invalid JSON: {e}")
 
@@ -211,66 +410,130 @@ def parse_wms_getfeatureinfo(content: bytes, info_format: str, config: dict):
             return features
 
     # ----------------------------------------------------------------------
-    # GML / XML PARSING  (OWSLib-compatible)
+    # GML / XML PARSING
     # ----------------------------------------------------------------------
-    try:
-        root = etree.fromstring(text.encode("utf-8"))
-    except Exception:
-        try:
-            root = ET.fromstring(text)
-        except Exception as e:
-            raise HTTPException(500, f"Invalid XML/GML: {e}")
+    return parse_gml_features(content, _property_names(config), config["name"] == "ZH")
 
-    features = []
-    ns = {"gml": "http://www.opengis.net/gml"}
 
-    # ----------------------------------------------------------------------
-    # 1) Standard GML <gml:featureMember>
-    # ----------------------------------------------------------------------
-    for fm in root.findall(".//gml:featureMember", ns):
-        fdict = {}
-        for el in fm.iter():
-            tag = el.tag.split("}", 1)[-1]
-            if tag.lower() in ("boundedby", "geometry", "polygon", "multipolygon"):
-                continue
-            if el.text and el.text.strip():
-                fdict[tag] = el.text.strip()
-        if fdict:
-            features.append(fdict)
+# Reused for every response: no entity resolution, no network access
+GML_PARSER = None
 
-    # ----------------------------------------------------------------------
-    # 2) MapServer msGMLOutput   <*_feature>
-    # ----------------------------------------------------------------------
 
-    for elem in root.iter():
-        if re.search(r"_feature$", elem.tag):
-            fdict = {}
-            for child in elem:
-                tag = child.tag.split("}", 1)[-1]
-                if tag.lower() in ("boundedby", "geometry"):
-                    continue
-                val = child.text.strip() if child.text else None
-                if val:
-                    fdict[tag] = val
-            if fdict:
-                features.append(fdict)
+def _etree():
+    """
+    lxml.etree, imported on the first GML answer rather than at startup
+    (it is not needed by JSON cantons, nor on the Lambda cold-start path).
+    """
+    global GML_PARSER
+
+    from lxml import etree
+
+    if GML_PARSER is None:
+        GML_PARSER = etree.XMLParser(
+            resolve_entities=False, no_network=True, huge_tree=True
+        )
+    return etree
+
+
+def _gml_record(elements, skipped_tags: frozenset, property_names: frozenset):
+    """
+    Return the configured properties of a feature, or None if none of its
+    (non-skipped) elements carries any text.
+    """
+    record = {}
+    has_text = False
+    for el in elements:
+        local = el.tag.rpartition("}")[2]
+        if local.lower() in skipped_tags:
+            continue
+        text = el.text
+        if text and not text.isspace():
+            has_text = True
+            if local in property_names:
+                record[local] = text.strip()
+    return record if has_text else None
+
+
+def parse_gml_features(content: bytes, property_names: frozenset, name_fallback: bool):
+    """
+    Parse the raw GML bytes once and walk the tree once. Recognizes:
+      1) standard GML <gml:featureMember> (all descendants)
+      2) MapServer msGMLOutput <*_feature> (direct children)
+      3) optionally, the first <gml:name> when no feature was found (ZH)
+
+    Feature subtrees (and their geometries) are not walked by the outer
+    loop. Records only keep the configured property names; a record is
+    emitted when the feature carries any text, like the previous parser.
+    """
+    etree = _etree()
+    try:
+        root = etree.fromstring(content, GML_PARSER)
+    except etree.XMLSyntaxError as e:
+        raise HTTPException(500, f"Invalid XML/GML: {e}")
+
+    member_features = []
+    mapserver_features = []
+
+    stack = [root]
+    while stack:
+        el = stack.pop()
+        tag = el.tag
+        if not isinstance(tag, str):
+            continue
+
+        # ----------------------------------------------------------------------
+        # 1) Standard GML <gml:featureMember>
+        # ----------------------------------------------------------------------
+        if tag == GML_FEATURE_MEMBER:
+            record = _gml_record(
+                el.iter(etree.Element), SKIPPED_MEMBER_TAGS, property_names
+            )
+            if record is not None:
+                member_features.append(record)
+
+        # ----------------------------------------------------------------------
+        # 2) MapServer msGMLOutput   <*_feature>
+        # ----------------------------------------------------------------------
+        elif tag.endswith("_feature"):
+            record = _gml_record(
+                el.iterchildren(etree.Element), SKIPPED_FEATURE_TAGS, property_names
+            )
+            if record is not None:
+                mapserver_features.append(record)
+
+        else:
+            stack.extend(reversed(el))
+
+    features = member_features + mapserver_features
 
     # ZH geoservice is a special and unique case
     # It only returns a GML without atttibute but containing the layer that was found at location
-    if not features and config["name"] == "ZH":
-        name_elem = root.find(".//gml:name", ns)
+    if not features and name_fallback:
+        name_elem = root.find(GML_NAME_PATH)
         if name_elem is not None and name_elem.text and name_elem.text.strip():
-            fdict = {"name": name_elem.text.strip()}
-            features.append(fdict)
+            features.append({"name": name_elem.text.strip()})
     return features
 
 
+def _feature_value(feature, property_name: str):
+    # ESRI REST support
+    if isinstance(feature, dict):
+        attributes = feature.get("attributes")
+        if isinstance(attributes, dict):
+            return attributes.get(property_name)
+        return feature.get(property_name)
+    return feature
+
+
 def process_ground_category(
     ground_features: list,
-    config_layers: list,
+    config_layers: CompiledCanton | list,
 ):
     """
     Reclass canton response into normalized values.
+
+    `config_layers` is a compiled canton (see cantons_configuration.compiled)
+    or a raw list of layer configurations, compiled on the fly.
     """
     # -----------------------------------------------------------
     # No features → harmonized value = 4
@@ -281,6 +544,11 @@ def process_ground_category(
             "harmonized_value": 4,
         }
 
+    if isinstance(config_layers, CompiledCanton):
+        layers = config_layers.layers
+    else:
+        layers = compile_layers(config_layers)
+
     layer_results = []
 
     mapped_values = []
@@ -288,46 +556,38 @@ def process_ground_category(
     harmonized_value = None
 
     # For each canton, multiple layers are requested (single request to WMS / ESRI)
-    # The returned feature(s) are then compared with mapping values defined for:
+    # The returned feature(s) are then looked up in the compiled mapping of:
     #  - Each layer
-    #  - Each possible value in each layer
+    #  - Each possible value in each layer (raw and double-encoded forms)
     #  - Some geoservices associate one layer to one category. In this case, layer names are compared, not attribute values
-    for layer_cfg in config_layers:
-        layer_name = layer_cfg.get("name")
-        property_name = layer_cfg.get("property_name")
-        property_values = layer_cfg.get("property_values")
-
-        description = None
+    for layer in layers:
+        property_name = layer.property_name
+        value = None
 
         for feature in ground_features:
-            # ESRI REST support
-            if isinstance(feature, dict):
-                if "attributes" in feature and isinstance(feature["attributes"], dict):
-                    value = feature["attributes"].get(property_name)
-                else:
-                    value = feature.get(property_name)
-            else:
-                value = feature
+            value = _feature_value(feature, property_name)
 
-            value = normalize_string(value)
-            if property_values:
-                for item in property_values:
-                    # Match with values for layers that have a defined mapping
-                    if item.get("name") == value:
-                        mapped_values.append(item.get("target_harmonized_value"))
-                        source_values.append(item.get("desc"))
+            if layer.values is not None:
+                # Match with values for layers that have a defined mapping
+                try:
+                    matches = layer.values.get(value)
+                except TypeError:
+                    matches = None
+                if matches:
+                    for target_harmonized_value, desc in matches:
+                        mapped_values.append(target_harmonized_value)
+                        source_values.append(desc)
 
             # For some cantons, only the presence or absence of feature is used to define suitability
-            else:
-                if layer_cfg.get("property_name") == feature.get("layerName"):
-                    mapped_values.append(layer_cfg.get("target_harmonized_value"))
+            elif property_name == feature.get("layerName"):
+                mapped_values.append(layer.target_harmonized_value)
 
         # Helping dict useful to identify issues. Only "harmonized_value is useful for frontend application"
         layer_results.append(
             {
-                "layer": layer_name,
+                "layer": layer.name,
                 "property_name": property_name,
-                "value": value,
+                "value": normalize_string(value),
             }
         )
 
@@ -0,0 +1,155 @@
+import asyncio
+from urllib.parse import unquote, urlsplit
+
+# ============================================================
+# MINIMAL REDIS (RESP2) CLIENT
+# ============================================================
+# Just what the shared cache tier needs: pooled connections, pipelining,
+# GET / SET PX / MGET, AUTH and SELECT from the URL. Works against
+# redis-server, Valkey, KeyDB or any store speaking the Redis protocol.
+
+
+class RedisError(Exception):
+    """
+    Error reply from the server.
+    """
+
+
+def encode_command(*args) -> bytes:
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if not isinstance(arg, bytes):
+            arg = str(arg).encode("utf-8")
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader):
+    """
+    One reply; error replies are returned as RedisError instances.
+    """
+    line = await reader.readuntil(b"\r\n")
+    kind, body = line[:1], line[1:-2]
+    if kind == b"+":
+        return body.decode("utf-8")
+    if kind == b"-":
+        return RedisError(body.decode("utf-8"))
+    if kind == b":":
+        return int(body)
+    if kind == b"$":
+        length = int(body)
+        if length < 0:
+            return None
+        return (await reader.readexactly(length + 2))[:-2]
+    if kind == b"*":
+        length = int(body)
+        if length < 0:
+            return None
+        return [await read_reply(reader) for _ in range(length)]
+    raise ConnectionError(f"Unexpected Redis reply {line[:20]!r}")
+
+
+class RedisConnection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.loop = asyncio.get_running_loop()
+
+    async def execute(self, commands: list) -> list:
+        """
+        Send all commands at once (pipelining), then read the replies in order.
+        """
+        self.writer.write(b"".join(encode_command(*command) for command in commands))
+        await self.writer.drain()
+        replies = [await read_reply(self.reader) for _ in commands]
+        for reply in replies:
+            if isinstance(reply, RedisError):
+                raise reply
+        return replies
+
+    def close(self):
+        # Connections of a finished event loop are gone with it
+        if not self.loop.is_closed():
+            self.writer.close()
+
+
+class RedisClient:
+    """
+    Connection pool bound to the event loop it is used on.
+    """
+
+    def __init__(self, url: str, max_connections: int = 20, timeout: float = 0.1):
+        parts = urlsplit(url)
+        if parts.scheme not in ("redis", ""):
+            raise ValueError(f"Unsupported Redis URL scheme {parts.scheme!r}")
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 6379
+        self.username = unquote(parts.username) if parts.username else None
+        self.password = unquote(parts.password) if parts.password else None
+        self.db = int(parts.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._idle: list[RedisConnection] = []
+        self._semaphore = asyncio.Semaphore(max_connections)
+
+    async def _connect(self) -> RedisConnection:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        connection = RedisConnection(reader, writer)
+        setup = []
+        if self.password is not None:
+            setup.append(
+                ("AUTH", self.username, self.password)
+                if self.username
+                else ("AUTH", self.password)
+            )
+        if self.db:
+            setup.append(("SELECT", self.db))
+        if setup:
+            try:
+                await connection.execute(setup)
+            except BaseException:
+                connection.close()
+                raise
+        return connection
+
+    async def execute(self, *commands) -> list:
+        """
+        Run a pipeline of commands on one pooled connection.
+        """
+        async with self._semaphore:
+            connection = self._idle.pop() if self._idle else None
+            try:
+                async with asyncio.timeout(self.timeout):
+                    if connection is None:
+                        connection = await self._connect()
+                    replies = await connection.execute(list(commands))
+            except RedisError:
+                # Every reply was read: the connection can be reused
+                if connection is not None:
+                    self._idle.append(connection)
+                raise
+            except BaseException:
+                if connection is not None:
+                    connection.close()
+                raise
+            self._idle.append(connection)
+            return replies
+
+    async def get(self, key: str):
+        return (await self.execute(("GET", key)))[0]
+
+    async def mget(self, keys: list, chunk_size: int = 500) -> list:
+        """
+        Values of many keys, as MGETs of `chunk_size` keys in one pipeline.
+        """
+        if not keys:
+            return []
+        chunks = [keys[i : i + chunk_size] for i in range(0, len(keys), chunk_size)]
+        replies = await self.execute(*(("MGET", *chunk) for chunk in chunks))
+        return [value for reply in replies for value in reply]
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        await self.execute(("SET", key, value, "PX", max(1, int(ttl * 1000))))
+
+    def close(self):
+        while self._idle:
+            self._idle.pop().close()
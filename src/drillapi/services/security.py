@@ -2,6 +2,7 @@ from fastapi import Request, HTTPException, status, Depends
 from slowapi import Limiter
 from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
+from . import metrics
 from ..config import settings  # assuming ALLOWED_IPS is in your Settings
 
 # Limiter
@@ -10,6 +11,7 @@ limiter = Limiter(key_func=get_remote_address)
 
 # Rate limit handler
 async def rate_limit_handler(request: Request, exc: RateLimitExceeded):
+    metrics.RATE_LIMITED.inc()
     raise HTTPException(
         status_code=status.HTTP_429_TOO_MANY_REQUESTS,
         detail="Rate limit exceeded",
@@ -0,0 +1,55 @@
+import asyncio
+
+
+# ============================================================
+# SINGLE-FLIGHT REQUEST COALESCING
+# ============================================================
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls sharing a key into one in-flight task.
+
+    Every waiter gets the same result or exception. A waiter being cancelled
+    does not cancel the shared task, unless it was the last one waiting.
+    """
+
+    def __init__(self):
+        self._calls: dict = {}
+
+    def __len__(self):
+        return len(self._calls)
+
+    def _forget(self, key, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    async def do(self, key, fn):
+        """
+        Await `fn()` (a coroutine function without arguments), or join the
+        call already in flight for `key`.
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Every waiter went away: stop the upstream work
+                self._forget(key, call)
+                call.task.cancel()
+
+
+flights = SingleFlight()
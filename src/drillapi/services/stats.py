@@ -0,0 +1,26 @@
+import math
+
+
+def percentile(values, q: float):
+    """
+    Nearest-rank percentile (q in 0..100) of a sequence of numbers.
+    Returns None for an empty sequence.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(values) -> dict:
+    """
+    Count and p50/p95/p99/max of a sequence of durations.
+    """
+    return {
+        "count": len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else None,
+    }
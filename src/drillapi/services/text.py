@@ -0,0 +1,28 @@
+# ============================================================
+# STRING NORMALIZATION
+# ============================================================
+def normalize_string(value: str) -> str:
+    """
+    Fix common double-encoding issues from WMS or ESRI JSON responses.
+    Example: 'unzul\\u00e4ssig' → 'unzulässig'
+    """
+    if not isinstance(value, str):
+        return value
+    try:
+        # Try decoding strings that were double-encoded (latin1→utf8)
+        return value.encode("latin1").decode("utf-8")
+    except Exception:
+        return value
+
+
+def normalized_variants(value: str) -> tuple:
+    """
+    All raw strings that normalize_string() maps to `value`: the value itself
+    and its double-encoded (utf8→latin1) form, when they normalize back to it.
+    """
+    candidates = [value]
+    try:
+        candidates.append(value.encode("utf-8").decode("latin1"))
+    except Exception:
+        pass
+    return tuple(dict.fromkeys(c for c in candidates if normalize_string(c) == value))
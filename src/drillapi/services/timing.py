@@ -0,0 +1,85 @@
+from contextvars import ContextVar
+
+from . import metrics
+
+# ============================================================
+# PER-REQUEST STAGE TIMINGS (Server-Timing)
+# ============================================================
+# The route starts a recorder in its context; stages observed anywhere below
+# it (including the coalesced upstream task, which inherits the context) are
+# added to it. Outside of a recording request, stages only feed the metrics.
+
+STAGES = ("canton_lookup", "upstream_fetch", "parse", "classify")
+
+_current: ContextVar[dict | None] = ContextVar("drillapi_timings", default=None)
+
+
+def start() -> dict:
+    """
+    Start recording the stages of the current request.
+    """
+    timings = {}
+    _current.set(timings)
+    return timings
+
+
+def _entry(timings: dict, stage: str) -> dict:
+    entry = timings.get(stage)
+    if entry is None:
+        entry = {"duration_ms": 0.0, "cached": False}
+        timings[stage] = entry
+    return entry
+
+
+def observe(canton: str, stage: str, seconds: float):
+    """
+    Record a stage duration in the metrics and in the current request.
+    """
+    metrics.observe_stage(canton, stage, seconds)
+    timings = _current.get()
+    if timings is not None:
+        _entry(timings, stage)["duration_ms"] += seconds * 1000
+
+
+def mark_cached(*stages: str):
+    """
+    Flag stages of the current request as answered from cache.
+    """
+    timings = _current.get()
+    if timings is not None:
+        for stage in stages:
+            _entry(timings, stage)["cached"] = True
+
+
+def breakdown(timings: dict, total: float) -> dict:
+    """
+    Stage durations (ms) and cache flags, in pipeline order.
+    """
+    result = {
+        stage: {
+            "duration_ms": round(timings[stage]["duration_ms"], 3),
+            "cached": timings[stage]["cached"],
+        }
+        for stage in STAGES
+        if stage in timings
+    }
+    result["total_ms"] = round(total * 1000, 3)
+    return result
+
+
+def server_timing(timings: dict, total: float) -> str:
+    """
+    Server-Timing header value, e.g.
+    `canton-lookup;dur=0.4;desc="cache", ..., total;dur=131.2`.
+    """
+    entries = []
+    for stage in STAGES:
+        entry = timings.get(stage)
+        if entry is None:
+            continue
+        value = f"{stage.replace('_', '-')};dur={entry['duration_ms']:.3f}"
+        if entry["cached"]:
+            value += ';desc="cache"'
+        entries.append(value)
+    entries.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(entries)
@@ -0,0 +1,271 @@
+import asyncio
+import json
+import logging
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from fastapi import HTTPException
+
+from .cantons_configuration import cantons
+from .cantons_configuration.compiled import COMPILED_CANTONS
+from .config import settings
+from .services.ground_category import compute_ground_category, resolve_canton
+from .services import cache, http_client
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# CACHE WARMING
+# ============================================================
+# On startup (and every WARMUP_INTERVAL seconds), resolve the ground control
+# points of every active canton, the configured WARMUP_COORDINATES and the
+# most recently used cached coordinates. This fills the canton and drill
+# category caches and opens pooled connections (TCP + TLS) to geo.admin.ch
+# and every cantonal query_url host. /ready answers 503 until a run warmed
+# the shared HTTP client and resolved points (see warm_failure); failed runs
+# are retried every WARMUP_RETRY_INTERVAL seconds.
+
+_state = {
+    "ready": False,
+    "running": False,
+    "runs": 0,
+    "last_run": None,
+    "last_error": None,
+}
+_task: asyncio.Task | None = None
+
+
+def ground_control_points() -> list:
+    return [
+        (point[0], point[1])
+        for config in cantons.CANTONS["cantons_configurations"].values()
+        if config.get("active")
+        for point in config.get("ground_control_point", [])
+    ]
+
+
+def hot_coordinates(count: int) -> list:
+    """
+    Centres of the GetFeatureInfo pixels of the most recently used cached
+    drill categories (current configuration versions only).
+    """
+    configs = cantons.CANTONS["cantons_configurations"]
+    points = []
+    for key in cache.drill_categories.recent_keys(count):
+        code, version, snapped_x, snapped_y = key
+        compiled = COMPILED_CANTONS.get(code)
+        if code not in configs or compiled is None:
+            continue
+        if compiled.config_version != version:
+            continue
+        resolution = cache.pixel_size(configs[code])
+        points.append(((snapped_x + 0.5) * resolution, (snapped_y + 0.5) * resolution))
+    return points
+
+
+def load_hot_coordinates() -> list:
+    path = settings.WARMUP_HOT_FILE
+    if not path or not Path(path).exists():
+        return []
+    try:
+        return [tuple(point) for point in json.loads(Path(path).read_text())]
+    except Exception as e:
+        logger.warning("Hot coordinates file %s unusable: %s", path, e)
+        return []
+
+
+def save_hot_coordinates():
+    """
+    Keep the hot coordinates for the next start (WARMUP_HOT_FILE).
+    """
+    path = settings.WARMUP_HOT_FILE
+    if not path:
+        return
+    points = hot_coordinates(settings.WARMUP_HOT_KEYS)
+    if not points:
+        return
+    try:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(json.dumps(points))
+    except OSError as e:
+        logger.warning("Could not save hot coordinates to %s: %s", path, e)
+
+
+def warmup_hosts() -> list:
+    """
+    One URL per upstream host: geo.admin.ch and every active canton's query_url.
+    """
+    urls = {
+        urlsplit(settings.GEOADMIN_IDENTIFY_URL).netloc: settings.GEOADMIN_IDENTIFY_URL
+    }
+    for config in cantons.CANTONS["cantons_configurations"].values():
+        if config.get("active") and config.get("query_url"):
+            urls.setdefault(urlsplit(config["query_url"]).netloc, config["query_url"])
+    return list(urls.values())
+
+
+def warmup_points() -> list:
+    points = (
+        ground_control_points()
+        + [tuple(point) for point in settings.WARMUP_COORDINATES]
+        + hot_coordinates(settings.WARMUP_HOT_KEYS)
+        + load_hot_coordinates()
+    )
+    return list(dict.fromkeys(points))
+
+
+async def warm_shared_cache():
+    """
+    Open a connection to the shared cache tier: True if it answers PING,
+    None when CACHE_SHARED_URL is not set.
+    """
+    if not settings.CACHE_SHARED_URL:
+        return None
+    client = cache.shared_client()
+    if client is None:
+        return False
+    try:
+        await client.execute(("PING",))
+        return True
+    except cache.SHARED_ERRORS as e:
+        logger.warning("Shared cache unreachable during warm-up: %r", e)
+        return False
+
+
+async def warm(points: list) -> dict:
+    """
+    Pre-connect to every upstream host, then resolve the points concurrently
+    (bounded by BATCH_CONCURRENCY) through the normal lookup path, and report
+    what was warmed. Pre-connecting matters when the points are answered
+    from the persistent or shared cache tiers without an upstream request.
+    """
+    semaphore = asyncio.Semaphore(settings.BATCH_CONCURRENCY)
+    report = {"points": len(points), "ok": 0, "errors": 0, "cantons": set()}
+    connected = await asyncio.gather(
+        *(http_client.preconnect(url) for url in warmup_hosts())
+    )
+    report["hosts"] = sum(connected)
+    report["shared_cache"] = await warm_shared_cache()
+
+    async def warm_point(point):
+        async with semaphore:
+            try:
+                code_canton, canton_config = await resolve_canton(*point)
+                result = await compute_ground_category(
+                    *point, code_canton, canton_config
+                )
+            except HTTPException as e:
+                logger.info("Warm-up of %s skipped: %s", point, e.detail)
+                report["errors"] += 1
+                return
+            except Exception as e:
+                logger.warning("Warm-up of %s failed: %s", point, e)
+                report["errors"] += 1
+                return
+            report["cantons"].add(code_canton)
+            if result["result_detail"].get("detail"):
+                report["errors"] += 1
+            else:
+                report["ok"] += 1
+
+    await asyncio.gather(*(warm_point(point) for point in points))
+    report["cantons"] = sorted(report["cantons"])
+    return report
+
+
+def warm_failure(report: dict):
+    """
+    Why a warm-up run does not make the instance ready, or None.
+    """
+    if report.get("timeout"):
+        return f"Warm-up did not complete within {settings.WARMUP_TIMEOUT} s"
+    if not report["hosts"]:
+        return "No upstream host could be reached"
+    if report["shared_cache"] is False:
+        return "Shared cache unreachable"
+    if report["points"] and not report["ok"]:
+        return "No warm-up point could be resolved"
+    return None
+
+
+async def run_once() -> dict:
+    """
+    One warm-up run. Readiness is granted by the first run that warmed the
+    upstream connections and resolved points; once ready, later failed runs
+    are only reported.
+    """
+    _state["running"] = True
+    start = time.perf_counter()
+    points = warmup_points()
+    try:
+        report = await asyncio.wait_for(warm(points), settings.WARMUP_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.warning("Warm-up did not complete within %s s", settings.WARMUP_TIMEOUT)
+        report = {"points": len(points), "timeout": True}
+    finally:
+        _state["running"] = False
+
+    report["duration_s"] = round(time.perf_counter() - start, 3)
+    _state["runs"] += 1
+    _state["last_run"] = report
+    _state["last_error"] = report["error"] = warm_failure(report)
+    if report["error"] is None:
+        _state["ready"] = True
+    else:
+        logger.warning("Warm-up run failed: %s", report["error"])
+    logger.info("Warm-up run: %s", report)
+    save_hot_coordinates()
+    return report
+
+
+async def _loop():
+    while True:
+        try:
+            await run_once()
+        except Exception as e:
+            logger.warning("Warm-up failed: %s", e)
+            _state["last_error"] = f"Warm-up failed: {e}"
+        if not _state["ready"]:
+            await asyncio.sleep(settings.WARMUP_RETRY_INTERVAL)
+            continue
+        if settings.WARMUP_INTERVAL <= 0:
+            return
+        await asyncio.sleep(settings.WARMUP_INTERVAL)
+
+
+def start():
+    """
+    Start warming in the background (FastAPI lifespan), if enabled.
+    """
+    global _task
+
+    if settings.WARMUP_ENABLED and _task is None:
+        _task = asyncio.create_task(_loop())
+
+
+async def stop():
+    global _task
+
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+    if settings.WARMUP_ENABLED:
+        save_hot_coordinates()
+
+
+def is_ready() -> bool:
+    return _state["ready"] or not settings.WARMUP_ENABLED
+
+
+def snapshot() -> dict:
+    return {**_state, "ready": is_ready(), "enabled": settings.WARMUP_ENABLED}
+
+
+def reset():
+    _state.update(ready=False, running=False, runs=0, last_run=None, last_error=None)
@@ -1,7 +1,15 @@
 import pytest
 from fastapi.testclient import TestClient
 from drillapi.config import settings, Settings
+from drillapi import warmup
 from drillapi.app import app
+from drillapi.services import (
+    cache,
+    circuit_breaker,
+    harvest_store,
+    http_client,
+    metrics,
+)
 
 
 @pytest.fixture(autouse=True, scope="session")
@@ -21,3 +29,19 @@ def override_global_settings():
 @pytest.fixture(scope="session")
 def client():
     return TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def reset_state():
+    cache.clear()
+    circuit_breaker.reset()
+    http_client.reset_stats()
+    metrics.reset()
+    harvest_store.reset()
+    warmup.reset()
+    yield
+    cache.clear()
+    cache.close_shared_client()
+    circuit_breaker.reset()
+    http_client.reset_stats()
+    harvest_store.reset()
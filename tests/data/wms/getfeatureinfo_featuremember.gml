@@ -0,0 +1,34 @@
+<?xml version="1.0" encoding="UTF-8"?>
+<wfs:FeatureCollection xmlns:wfs="http://www.opengis.net/wfs" xmlns:gml="http://www.opengis.net/gml" xmlns:qgs="http://qgis.org/gml">
+  <gml:boundedBy>
+    <gml:Box srsName="EPSG:2056">
+      <gml:coordinates cs="," ts=" ">2680000,1250000 2681000,1251000</gml:coordinates>
+    </gml:Box>
+  </gml:boundedBy>
+  <gml:featureMember>
+    <qgs:erdwaermesonden-auflagen fid="erdwaermesonden-auflagen.42">
+      <gml:boundedBy>
+        <gml:Box srsName="EPSG:2056">
+          <gml:coordinates cs="," ts=" ">2680000,1250000 2681000,1251000</gml:coordinates>
+        </gml:Box>
+      </gml:boundedBy>
+      <qgs:geometry>
+        <gml:Polygon srsName="EPSG:2056">
+          <gml:outerBoundaryIs>
+            <gml:LinearRing>
+              <gml:coordinates cs="," ts=" ">2680000,1250000 2681000,1250000 2681000,1251000 2680000,1250000</gml:coordinates>
+            </gml:LinearRing>
+          </gml:outerBoundaryIs>
+        </gml:Polygon>
+      </qgs:geometry>
+      <qgs:objectid>42</qgs:objectid>
+      <qgs:zonen>Auflagen</qgs:zonen>
+    </qgs:erdwaermesonden-auflagen>
+  </gml:featureMember>
+  <gml:featureMember>
+    <qgs:waermenutzung-zone-b fid="waermenutzung-zone-b.7">
+      <qgs:objectid>7</qgs:objectid>
+      <qgs:name>Zone B (Schotter-Grundwasservorkommen, geeignet für Trinkwassergewinnung)</qgs:name>
+    </qgs:waermenutzung-zone-b>
+  </gml:featureMember>
+</wfs:FeatureCollection>
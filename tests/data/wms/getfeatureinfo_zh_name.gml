@@ -0,0 +1,6 @@
+<?xml version="1.0" encoding="UTF-8"?>
+<msGMLOutput xmlns:gml="http://www.opengis.net/gml">
+  <waermenutzung-zone-a_layer>
+    <gml:name>Zone A (Schutzzonen und Schutzareale)</gml:name>
+  </waermenutzung-zone-a_layer>
+</msGMLOutput>
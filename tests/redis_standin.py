@@ -0,0 +1,119 @@
+"""
+In-memory stand-in for redis-server (RESP2): PING, AUTH, SELECT, GET, SET
+(EX/PX), MGET, DEL and FLUSHDB, served from a background thread.
+"""
+
+import asyncio
+import threading
+import time
+
+from drillapi.services.redis_client import read_reply
+
+DISCONNECTS = (asyncio.IncompleteReadError, ConnectionError)
+
+
+def _encode(value) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(_encode(v) for v in value)
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+class RedisStandIn:
+    def __init__(self, password: str | None = None):
+        self.password = password
+        self.dbs: dict[int, dict] = {}
+        self.commands: list[str] = []
+        self._loop = asyncio.new_event_loop()
+        self._server = None
+        self.port = None
+
+    @property
+    def url(self) -> str:
+        auth = f":{self.password}@" if self.password else ""
+        return f"redis://{auth}127.0.0.1:{self.port}/0"
+
+    def start(self) -> "RedisStandIn":
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, "127.0.0.1", 0)
+            )
+            self.port = self._server.sockets[0].getsockname()[1]
+            ready.set()
+            self._loop.run_forever()
+
+        threading.Thread(target=run, daemon=True).start()
+        ready.wait()
+        return self
+
+    def stop(self):
+        async def shutdown():
+            self._server.close()
+            for task in asyncio.all_tasks():
+                if task is not asyncio.current_task():
+                    task.cancel()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def _get(self, db: dict, key: bytes):
+        entry = db.get(key)
+        if entry is None or (entry[1] is not None and entry[1] <= time.time()):
+            db.pop(key, None)
+            return None
+        return entry[0]
+
+    async def _handle(self, reader, writer):
+        db_index = 0
+        authenticated = self.password is None
+        try:
+            while True:
+                command = await read_reply(reader)
+                name, args = command[0].decode().upper(), command[1:]
+                self.commands.append(name)
+                db = self.dbs.setdefault(db_index, {})
+
+                if name == "AUTH":
+                    authenticated = args[-1].decode() == self.password
+                    reply = b"+OK\r\n" if authenticated else b"-WRONGPASS\r\n"
+                elif not authenticated:
+                    reply = b"-NOAUTH Authentication required.\r\n"
+                elif name == "PING":
+                    reply = b"+PONG\r\n"
+                elif name == "SELECT":
+                    db_index = int(args[0])
+                    reply = b"+OK\r\n"
+                elif name == "GET":
+                    reply = _encode(self._get(db, args[0]))
+                elif name == "MGET":
+                    reply = _encode([self._get(db, key) for key in args])
+                elif name == "SET":
+                    expires_at = None
+                    options = [a.decode().upper() for a in args[2:]]
+                    if "PX" in options:
+                        expires_at = (
+                            time.time() + int(options[options.index("PX") + 1]) / 1000
+                        )
+                    elif "EX" in options:
+                        expires_at = time.time() + int(options[options.index("EX") + 1])
+                    db[args[0]] = (args[1], expires_at)
+                    reply = b"+OK\r\n"
+                elif name == "DEL":
+                    reply = _encode(sum(db.pop(key, None) is not None for key in args))
+                elif name == "FLUSHDB":
+                    db.clear()
+                    reply = b"+OK\r\n"
+                else:
+                    reply = b"-ERR unknown command '%s'\r\n" % name.encode()
+                writer.write(reply)
+                await writer.drain()
+        except DISCONNECTS:
+            pass
+        finally:
+            writer.close()
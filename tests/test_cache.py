@@ -0,0 +1,129 @@
+import httpx
+import respx
+
+from drillapi.config import settings
+from drillapi.services import cache, persistent_cache
+
+
+def test_ttl_cache_lru_eviction_and_counters():
+    c = cache.TTLCache(max_entries=2, max_bytes=10_000)
+    c.set("a", 1, ttl=60)
+    c.set("b", 2, ttl=60)
+    assert c.get("a") == 1  # "b" becomes least recently used
+    c.set("c", 3, ttl=60)
+
+    assert c.get("b") is None
+    assert c.get("c") == 3
+    stats = c.stats()
+    assert stats["entries"] == 2
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+
+
+def test_ttl_cache_expiry_and_byte_limit(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+
+    c = cache.TTLCache(max_entries=100, max_bytes=20)
+    c.set("a", "x" * 5, ttl=10)
+    now[0] += 11
+    assert c.get("a") is None
+
+    c.set("a", "x" * 9, ttl=10)
+    c.set("b", "y" * 9, ttl=10)
+    assert "a" not in c
+    assert c.get("b") == "y" * 9
+    assert c.bytes <= 20
+
+
+def test_drill_category_key_snaps_to_wms_pixel():
+    config = {"bbox_delta": 10}
+    pixel = 20 / 101
+    x = (cache.snap(2574738.0, pixel) + 0.5) * pixel
+    key = cache.drill_category_key("JU", config, x, 1249285.0)
+    assert key == cache.drill_category_key("JU", config, x + pixel / 4, 1249285.0)
+    assert key != cache.drill_category_key("JU", config, x + pixel, 1249285.0)
+
+
+@respx.mock
+def test_repeated_lookup_served_from_cache(client):
+    with open("tests/data/geoadmin/canton_identify_ju.json", "rb") as f:
+        canton_json = f.read()
+    with open("tests/data/wms/getfeatureinfo_ju.gml", "rb") as f:
+        gml = f.read()
+
+    canton_route = respx.get(
+        "https://api3.geo.admin.ch/rest/services/ech/MapServer/identify"
+    ).mock(return_value=httpx.Response(200, content=canton_json))
+    wms_route = respx.get("https://geoservices.jura.ch/wms").mock(
+        return_value=httpx.Response(200, content=gml)
+    )
+
+    first = client.get("/v1/drill-category/2574738/1249285").json()
+    second = client.get("/v1/drill-category/2574738/1249285").json()
+
+    assert first["ground_category"] == second["ground_category"]
+    assert canton_route.call_count == 1
+    assert wms_route.call_count == 1
+    assert cache.drill_categories.stats()["hits"] == 1
+
+    # The canton outline is neither requested nor cached
+    assert canton_route.calls[0].request.url.params["returnGeometry"] == "false"
+    (cached,) = cache.canton_lookups.get(cache.canton_key(2574738, 1249285))
+    assert "geometry" not in cached
+    assert cache.canton_lookups.stats()["bytes"] < 10_000
+
+
+def test_persistent_tier_survives_restart(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "CACHE_PERSISTENT_PATH", tmp_path / "cache.sqlite3")
+    cache.close_persistent_store()
+    try:
+        key = ("JU", "v1", 10, 20)
+        before = cache.TieredCache("drill_category", 100, 10_000)
+        before.set(key, ({"harmonized_value": 2}, {"message": "Success"}), ttl=60)
+        cache.close_persistent_store()
+
+        # New process: empty memory tier, same file
+        after = cache.TieredCache("drill_category", 100, 10_000)
+        features, detail = after.get(key)
+        assert features == {"harmonized_value": 2}
+        assert after.stats()["persistent_hits"] == 1
+        assert after.get(key) is not None
+        assert after.stats()["hits"] == 1
+        # Namespaces are separate
+        assert cache.TieredCache("canton_lookup", 100, 10_000).get(key) is None
+    finally:
+        cache.close_persistent_store()
+
+
+def test_persistent_store_expiry_and_size_bound(tmp_path, monkeypatch):
+    store = persistent_cache.SQLiteStore(tmp_path / "cache.sqlite3", max_bytes=2000)
+    store.set("ns", "old", b'"x"', ttl=60)
+    now = [persistent_cache.time.time() + 61]
+    monkeypatch.setattr(persistent_cache.time, "time", lambda: now[0])
+    assert store.get("ns", "old") is None
+
+    for i in range(100):
+        store.set("ns", i, b'"' + b"y" * 98 + b'"', ttl=60)
+    assert store.bytes <= 2000
+    assert store.evictions > 0
+    # Oldest writes are evicted first
+    assert store.get("ns", 0) is None
+    assert store.get("ns", 99) == ("y" * 98, now[0] + 60)
+    store.close()
+
+
+def test_persistent_store_replace_and_clear_namespace(tmp_path):
+    store = persistent_cache.SQLiteStore(tmp_path / "cache.sqlite3", max_bytes=2000)
+    store.set("a", "key", b'"' + b"x" * 98 + b'"', ttl=60)
+    store.set("a", "key", b'"' + b"x" * 98 + b'"', ttl=60)
+    store.set("b", "key", b'"y"', ttl=60)
+    # A replaced row is not counted twice
+    assert store.bytes == 103
+
+    store.clear("a")
+    assert store.get("a", "key") is None
+    assert store.get("b", "key")[0] == "y"
+    assert store.bytes == 3
+    store.close()
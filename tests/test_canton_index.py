@@ -0,0 +1,76 @@
+import asyncio
+import json
+import random
+
+import httpx
+import respx
+
+from drillapi.config import settings
+from drillapi.services import cache, canton_index, geometry, processing
+
+SAMPLE = "tests/data/boundaries/cantons_sample.geojson"
+
+
+def test_locate_point_in_polygon_and_hole():
+    index = canton_index.CantonIndex.from_file(SAMPLE)
+
+    code, distance = index.locate(2574738, 1249285)
+    assert code == "JU"
+    assert round(distance) == 9285
+
+    # swissBOUNDARIES3D canton number is mapped to the AK code
+    assert index.locate(2582124, 1164966)[0] == "FR"
+
+    # Inside the FR hole and outside every polygon
+    assert index.locate(2577000, 1172000) == (None, None)
+    assert index.locate(2700000, 1200000) == (None, None)
+
+
+def test_edge_index_matches_full_scan():
+    with open("tests/data/geoadmin/canton_identify_fr.json") as f:
+        rings = json.load(f)["results"][0]["geometry"]["rings"]
+    edges = geometry.EdgeIndex(rings)
+    minx, miny, maxx, maxy = edges.bbox
+
+    rng = random.Random(1)
+    for _ in range(200):
+        x = rng.uniform(minx - 1000, maxx + 1000)
+        y = rng.uniform(miny - 1000, maxy + 1000)
+        assert edges.contains(x, y) == geometry.point_in_rings(x, y, rings)
+        distance = geometry.distance_to_rings(x, y, rings)
+        assert abs(edges.distance(x, y) - distance) < 1e-6
+        # Only searched up to the limit
+        assert edges.distance(x, y, 50) >= min(distance, 50)
+
+
+def test_local_lookup_falls_back_to_geoadmin_near_border(monkeypatch):
+    monkeypatch.setattr(settings, "CANTON_LOOKUP", "local")
+    monkeypatch.setattr(settings, "CANTON_BOUNDARIES_FILE", SAMPLE)
+    monkeypatch.setattr(settings, "CANTON_BORDER_BUFFER", 50.0)
+    canton_index.reset_index()
+
+    with open("tests/data/geoadmin/canton_identify_ju.json", "rb") as f:
+        canton_json = f.read()
+
+    async def run():
+        with respx.mock:
+            route = respx.get(
+                "https://api3.geo.admin.ch/rest/services/ech/MapServer/identify"
+            ).mock(return_value=httpx.Response(200, content=canton_json))
+            local = await processing.get_canton_from_coordinates(2574738, 1249285)
+            near_border = await processing.get_canton_from_coordinates(2574738, 1240010)
+            again = await processing.get_canton_from_coordinates(2574738, 1249285)
+            assert again == local
+            return local, near_border, route.call_count
+
+    try:
+        local, near_border, remote_calls = asyncio.run(run())
+    finally:
+        canton_index.reset_index()
+
+    assert local[0]["attributes"]["ak"] == "JU"
+    assert local[0]["source"] == "local"
+    assert near_border[0]["attributes"]["ak"] == "JU"
+    assert remote_calls == 1
+    # Repeated points are answered by the canton cache
+    assert cache.canton_lookups.stats()["hits"] == 1
@@ -0,0 +1,56 @@
+import httpx
+import respx
+
+
+def mock_ju_services():
+    with open("tests/data/geoadmin/canton_identify_ju.json", "rb") as f:
+        canton_json = f.read()
+    with open("tests/data/wms/getfeatureinfo_ju.gml", "rb") as f:
+        gml = f.read()
+
+    respx.get("https://api3.geo.admin.ch/rest/services/ech/MapServer/identify").mock(
+        return_value=httpx.Response(200, content=canton_json)
+    )
+    return respx.get("https://geoservices.jura.ch/wms").mock(
+        return_value=httpx.Response(200, content=gml)
+    )
+
+
+@respx.mock
+def test_checker_json_report(client):
+    wms_route = mock_ju_services()
+
+    response = client.get("/checker/ju?format=json")
+
+    assert response.status_code == 200
+    report = response.json()
+    assert report["canton"] == "JU"
+    assert len(report["results"]) == 6
+    assert wms_route.call_count == 6
+    assert all("duration_ms" in r for r in report["results"])
+
+    summary = report["summary"]["JU"]
+    assert summary["count"] == 6
+    # The fixture always answers "Autorisé", only the first control point matches
+    assert summary["failures"] == 5
+    assert summary["p50"] <= summary["p95"] <= summary["max"]
+
+
+@respx.mock
+def test_checker_html_is_streamed(client):
+    mock_ju_services()
+
+    response = client.get("/checker/JU")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/html")
+    assert response.text.count("<details") == 6
+    assert "Summary" in response.text
+
+
+def test_checker_unknown_canton(client):
+    response = client.get("/checker/XX")
+
+    assert response.status_code == 200
+    assert "Canton &#39;XX&#39; not found or inactive." in response.text
+    assert "No results available." in response.text
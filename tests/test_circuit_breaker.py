@@ -0,0 +1,124 @@
+import asyncio
+
+import httpx
+import respx
+
+from drillapi.config import settings
+from drillapi.services import circuit_breaker, processing
+
+
+def test_breaker_opens_half_opens_and_closes(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(settings, "BREAKER_MIN_CALLS", 4)
+    monkeypatch.setattr(settings, "BREAKER_FAILURE_RATE", 0.5)
+    monkeypatch.setattr(settings, "BREAKER_OPEN_SECONDS", 30.0)
+
+    breaker = circuit_breaker.CircuitBreaker("wms.example.test")
+    breaker.record(0.1, failed=False)
+    breaker.record(0.1, failed=True)
+    breaker.record(99.0, failed=False)  # slow calls count as failures
+    assert breaker.state == circuit_breaker.CLOSED
+    breaker.record(0.1, failed=True)
+
+    assert breaker.state == circuit_breaker.OPEN
+    assert not breaker.allow()
+    assert breaker.retry_after() == 30
+
+    now[0] += 31
+    trial = breaker.allow()  # single half-open trial
+    assert trial is not None
+    assert breaker.allow() is None
+    breaker.record(0.1, failed=False, token=trial)
+    assert breaker.state == circuit_breaker.CLOSED
+
+
+def test_only_the_trial_decides_when_half_open(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    breaker = circuit_breaker.CircuitBreaker("wms.example.test")
+    # A slow call let through before the circuit opened
+    early = breaker.allow()
+    breaker._open(now[0])
+    now[0] += settings.BREAKER_OPEN_SECONDS
+
+    trial = breaker.allow()
+    breaker.record(0.1, failed=False, token=early)
+    breaker.release(early)
+    assert breaker.state == circuit_breaker.HALF_OPEN
+    assert breaker.allow() is None
+
+    breaker.record(0.1, failed=True, token=trial)
+    assert breaker.state == circuit_breaker.OPEN
+
+
+@respx.mock
+def test_open_circuit_fast_fails_with_retry_after(client, monkeypatch):
+    monkeypatch.setattr(settings, "BREAKER_MIN_CALLS", 2)
+
+    with open("tests/data/geoadmin/canton_identify_ju.json", "rb") as f:
+        canton_json = f.read()
+    respx.get("https://api3.geo.admin.ch/rest/services/ech/MapServer/identify").mock(
+        return_value=httpx.Response(200, content=canton_json)
+    )
+    wms_route = respx.get("https://geoservices.jura.ch/wms").mock(
+        return_value=httpx.Response(500)
+    )
+
+    for y in (1249285, 1249290):
+        payload = client.get(f"/v1/drill-category/2574738/{y}").json()
+        assert payload["status"] == "success"
+        assert payload["ground_category"]["harmonized_value"] == 4
+
+    response = client.get("/v1/drill-category/2574738/1249295")
+    payload = response.json()
+
+    assert wms_route.call_count == 2
+    assert payload["status"] == "unavailable"
+    assert payload["result_detail"]["retry_after"] > 0
+    assert response.headers["retry-after"] == str(
+        payload["result_detail"]["retry_after"]
+    )
+    assert circuit_breaker.snapshot()["geoservices.jura.ch"]["state"] == "open"
+
+
+def test_only_service_failures_open_the_circuit(monkeypatch):
+    monkeypatch.setattr(settings, "BREAKER_MIN_CALLS", 2)
+    query_url = "https://esri.example.test/arcgis/rest/services/Geo/MapServer"
+    config = {
+        "info_format": "arcgis/json",
+        "esri_identify": True,
+        "query_url": query_url,
+        "bbox_delta": 10,
+        "layers": [{"id": 1}],
+    }
+
+    async def run(response):
+        with respx.mock:
+            respx.get(f"{query_url}/identify").mock(return_value=response)
+            return await processing.fetch_features_for_point(2582124, 1164966, config)
+
+    # Malformed answers of a healthy host are errors, not service failures
+    for _ in range(3):
+        result = asyncio.run(run(httpx.Response(200, content=b"<html>")))
+        assert result["error"] is not None
+    breaker = circuit_breaker.for_url(query_url)
+    assert breaker.state == circuit_breaker.CLOSED
+
+    # 3 failures of 6 calls
+    monkeypatch.setattr(settings, "BREAKER_FAILURE_RATE", 0.5)
+    for _ in range(3):
+        asyncio.run(run(httpx.Response(500)))
+    assert breaker.state == circuit_breaker.OPEN
+
+
+def test_cancelled_trial_is_released(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    breaker = circuit_breaker.CircuitBreaker("wms.example.test")
+    breaker._open(now[0])
+    now[0] += settings.BREAKER_OPEN_SECONDS
+
+    breaker.release(breaker.allow())
+    assert breaker.state == circuit_breaker.HALF_OPEN
+    assert breaker.allow() is not None
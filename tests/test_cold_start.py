@@ -0,0 +1,52 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+# Generous bound: catches a heavy dependency creeping onto the import path
+# without failing on slow CI machines. The measured value is recorded.
+COLD_START_BUDGET = 3.0
+
+MEASURE = """
+import json, sys, time
+start = time.perf_counter()
+import drillapi.lambda_handler
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "modules": sorted(sys.modules)}))
+"""
+
+
+def measure_import():
+    env = {**os.environ, "PYTHONPATH": str(SRC)}
+    output = subprocess.run(
+        [sys.executable, "-c", MEASURE],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def test_lambda_handler_cold_start(record_property):
+    result = measure_import()
+    record_property("lambda_import_seconds", round(result["seconds"], 3))
+
+    modules = set(result["modules"])
+    for heavy in ("jinja2", "lxml", "owslib", "drillapi.routes.checker"):
+        assert heavy not in modules, f"{heavy} imported on the Lambda cold start"
+    assert result["seconds"] < COLD_START_BUDGET
+
+
+def test_lambda_app_has_no_html_routes():
+    from fastapi.testclient import TestClient
+    from drillapi.app import create_app
+
+    client = TestClient(create_app(include_html=False))
+
+    assert client.get("/v1/cantons").status_code == 200
+    assert client.get("/").status_code == 404
+    assert client.get("/checker").status_code == 404
@@ -1,6 +1,11 @@
 from typing import List, Optional, Union
 from pydantic import BaseModel, HttpUrl, field_validator, ValidationError, conlist
+import pytest
 from drillapi.cantons_configuration.cantons import CANTONS
+from drillapi.cantons_configuration.compiled import (
+    COMPILED_CANTONS,
+    compile_canton,
+)
 
 
 class PropertyValue(BaseModel):
@@ -59,5 +64,37 @@ def test_cantons_configuration_integrity():
         region = Cantonconfig(**canton_data)
 
 
+def test_cantons_configuration_compiles():
+    """
+    Every canton is compiled at import into lookup tables with a version id.
+    """
+    assert set(COMPILED_CANTONS) == set(CANTONS["cantons_configurations"])
+    for code, compiled in COMPILED_CANTONS.items():
+        assert compiled.code == code
+        assert len(compiled.layers) == len(
+            CANTONS["cantons_configurations"][code]["layers"]
+        )
+        assert len(compiled.config_version) == 12
+
+
+def test_compile_rejects_invalid_layers():
+    with pytest.raises(ValueError, match="Canton XX"):
+        compile_canton("XX", {"layers": [{"name": "a", "property_name": "p"}]})
+
+    with pytest.raises(ValueError, match="invalid property value"):
+        compile_canton(
+            "XX",
+            {
+                "layers": [
+                    {
+                        "name": "a",
+                        "property_name": "p",
+                        "property_values": [{"name": "v"}],
+                    }
+                ]
+            },
+        )
+
+
 if __name__ == "__main__":
     test_cantons_configuration_integrity()
@@ -1,8 +1,12 @@
+import asyncio
 import pytest
 import respx
 import httpx
 from fastapi.testclient import TestClient
 from drillapi.app import app
+from drillapi.services import processing, timing
+from drillapi.cantons_configuration.cantons import CANTONS
+from drillapi.cantons_configuration.compiled import COMPILED_CANTONS
 
 
 @pytest.fixture
@@ -97,3 +101,246 @@ def test_drill_category_esri_json(client):
     assert payload["ground_category"]["harmonized_value"] == 1
     assert "full_url" in payload["result_detail"]
     assert payload["result_detail"]["detail"] is None
+
+
+@respx.mock
+def test_drill_category_batch_dedupes_and_keeps_order(client):
+    with open("tests/data/geoadmin/canton_identify_ju.json", "rb") as f:
+        canton_json = f.read()
+    with open("tests/data/wms/getfeatureinfo_ju.gml", "rb") as f:
+        gml = f.read()
+
+    canton_route = respx.get(
+        "https://api3.geo.admin.ch/rest/services/ech/MapServer/identify", params=None
+    ).mock(return_value=httpx.Response(200, content=canton_json))
+    wms_route = respx.get("https://geoservices.jura.ch/wms", params=None).mock(
+        return_value=httpx.Response(200, content=gml)
+    )
+
+    coordinates = [
+        {"coord_x": 2574738, "coord_y": 1249285},
+        {"coord_x": 2576624, "coord_y": 1252365},
+        {"coord_x": 2574738, "coord_y": 1249285},
+    ]
+    response = client.post(
+        "/v1/drill-category/batch", json={"coordinates": coordinates}
+    )
+
+    assert response.status_code == 200
+    payload = response.json()
+    assert [(r["coord_x"], r["coord_y"]) for r in payload["results"]] == [
+        (c["coord_x"], c["coord_y"]) for c in coordinates
+    ]
+    assert all(r["status"] == "success" for r in payload["results"])
+    assert payload["results"][0]["ground_category"]["harmonized_value"] == 1
+    assert "canton_config" not in payload["results"][0]
+    assert list(payload["canton_configs"]) == ["JU"]
+    assert canton_route.call_count == 2
+    assert wms_route.call_count == 2
+
+
+def test_drill_category_batch_rejects_out_of_range(client):
+    response = client.post(
+        "/v1/drill-category/batch",
+        json={"coordinates": [{"coord_x": 2000000, "coord_y": 1200000}]},
+    )
+    assert response.status_code == 422
+
+
+def test_esri_multi_layer_queries_are_merged():
+    query_url = "https://esri.example.test/arcgis/rest/services/Geo/MapServer"
+    config = {
+        "info_format": "arcgis/json",
+        "query_url": query_url,
+        "bbox_delta": 10,
+        "layers": [{"id": 1}, {"id": 2}],
+    }
+
+    async def run():
+        with respx.mock:
+            for layer_id, value in ((1, "a"), (2, "b")):
+                respx.get(f"{query_url}/{layer_id}/query").mock(
+                    return_value=httpx.Response(
+                        200, json={"features": [{"attributes": {"v": value}}]}
+                    )
+                )
+            return await processing.fetch_features_for_point(2582124, 1164966, config)
+
+    result = asyncio.run(run())
+
+    assert result["error"] is None
+    assert result["features"] == [
+        {"attributes": {"v": "a"}, "layerId": 1},
+        {"attributes": {"v": "b"}, "layerId": 2},
+    ]
+
+
+def test_esri_identify_single_call():
+    query_url = "https://esri.example.test/arcgis/rest/services/Geo/MapServer"
+    config = {
+        "info_format": "arcgis/json",
+        "esri_identify": True,
+        "query_url": query_url,
+        "bbox_delta": 10,
+        "layers": [{"id": 1}, {"id": 2}],
+    }
+
+    async def run():
+        timings = timing.start()
+        with respx.mock:
+            route = respx.get(f"{query_url}/identify").mock(
+                return_value=httpx.Response(
+                    200,
+                    json={"results": [{"layerId": 2, "attributes": {"v": "b"}}]},
+                )
+            )
+            result = await processing.fetch_features_for_point(2582124, 1164966, config)
+            return result, route, timings
+
+    result, route, timings = asyncio.run(run())
+
+    assert route.call_count == 1
+    assert route.calls.last.request.url.params["layers"] == "all:1,2"
+    assert result["features"] == [{"attributes": {"v": "b"}, "layerId": 2}]
+    # Decoding the JSON answer is timed as parsing, not as the fetch
+    assert {"upstream_fetch", "parse"} <= set(timings)
+
+
+def test_process_ground_category_matches_double_encoded_values():
+    layers = [
+        {
+            "name": "layer",
+            "property_name": "status",
+            "property_values": [
+                {"name": "zulässig", "desc": "ok", "target_harmonized_value": 1},
+                {"name": "unzulässig", "desc": "no", "target_harmonized_value": 3},
+            ],
+        }
+    ]
+    features = [
+        {"status": "zulÃ¤ssig"},
+        {"attributes": {"status": "unzulässig"}},
+    ]
+
+    result = processing.process_ground_category(features, layers)
+
+    assert result["harmonized_value"] == 3
+    assert result["source_values"] == "ok,no"
+    assert result["layer_results"][0]["value"] == "unzulässig"
+
+
+def test_process_ground_category_presence_layers():
+    result = processing.process_ground_category(
+        [{"layerName": "Erdwärmenutzung zulässig mit Auflagen"}],
+        COMPILED_CANTONS["LU"],
+    )
+
+    assert result["harmonized_value"] == 2
+    assert result["source_values"] == ""
+
+
+def test_parse_gml_feature_member_keeps_configured_properties():
+    config = CANTONS["cantons_configurations"]["ZH"]
+    with open("tests/data/wms/getfeatureinfo_featuremember.gml", "rb") as f:
+        content = f.read()
+
+    features = processing.parse_wms_getfeatureinfo(
+        content, config["info_format"], config
+    )
+
+    assert features == [
+        {"zonen": "Auflagen"},
+        {
+            "name": "Zone B (Schotter-Grundwasservorkommen, geeignet für Trinkwassergewinnung)"
+        },
+    ]
+
+
+def test_parse_gml_mapserver_and_zh_name_fallback():
+    ju = CANTONS["cantons_configurations"]["JU"]
+    with open("tests/data/wms/getfeatureinfo_ju.gml", "rb") as f:
+        features = processing.parse_wms_getfeatureinfo(f.read(), ju["info_format"], ju)
+    assert features == [{"limitation_forage": "Autorisé"}]
+
+    zh = CANTONS["cantons_configurations"]["ZH"]
+    with open("tests/data/wms/getfeatureinfo_zh_name.gml", "rb") as f:
+        features = processing.parse_wms_getfeatureinfo(f.read(), zh["info_format"], zh)
+    assert features == [{"name": "Zone A (Schutzzonen und Schutzareale)"}]
+
+
+def mock_ju_services():
+    with open("tests/data/geoadmin/canton_identify_ju.json", "rb") as f:
+        canton_json = f.read()
+    with open("tests/data/wms/getfeatureinfo_ju.gml", "rb") as f:
+        gml = f.read()
+
+    respx.get("https://api3.geo.admin.ch/rest/services/ech/MapServer/identify").mock(
+        return_value=httpx.Response(200, content=canton_json)
+    )
+    respx.get("https://geoservices.jura.ch/wms").mock(
+        return_value=httpx.Response(200, content=gml)
+    )
+
+
+@respx.mock
+def test_drill_category_compact_profile(client):
+    mock_ju_services()
+
+    response = client.get("/v1/drill-category/2574738/1249285?profile=compact")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "coord_x": 2574738,
+        "coord_y": 1249285,
+        "canton": "JU",
+        "harmonized_value": 1,
+        "source_values": "Autorisé",
+        "config_version": COMPILED_CANTONS["JU"].config_version,
+        "status": "success",
+    }
+
+    response = client.get(
+        "/v1/drill-category/2574738/1249285",
+        headers={"Accept": "application/vnd.drillapi.compact+json"},
+    )
+    assert response.headers["content-type"] == "application/vnd.drillapi.compact+json"
+    assert "canton_config" not in response.json()
+
+
+@respx.mock
+def test_drill_category_fields_projection(client):
+    mock_ju_services()
+
+    response = client.get(
+        "/v1/drill-category/2574738/1249285?profile=compact&fields=canton,harmonized_value"
+    )
+    assert response.json() == {"canton": "JU", "harmonized_value": 1}
+
+    response = client.get("/v1/drill-category/2574738/1249285?fields=canton,nope")
+    assert response.status_code == 400
+    assert "nope" in response.json()["detail"]
+
+
+@respx.mock
+def test_drill_category_server_timing(client):
+    mock_ju_services()
+
+    first = client.get("/v1/drill-category/2574738/1249285")
+    second = client.get("/v1/drill-category/2574738/1249285?debug=timing")
+
+    names = [part.split(";")[0] for part in first.headers["server-timing"].split(", ")]
+    assert names == ["canton-lookup", "upstream-fetch", "parse", "classify", "total"]
+    assert 'desc="cache"' not in first.headers["server-timing"]
+    assert "timing" not in first.json()["result_detail"]
+
+    assert "canton-lookup;dur=" in second.headers["server-timing"]
+    breakdown = second.json()["result_detail"]["timing"]
+    assert breakdown["canton_lookup"]["cached"] is True
+    assert breakdown["upstream_fetch"] == {"duration_ms": 0.0, "cached": True}
+    assert breakdown["classify"]["cached"] is True
+    assert breakdown["total_ms"] >= 0
+    assert second.json()["result_detail"]["full_url"]
+
+    # The cached result_detail is not altered by the debug breakdown
+    third = client.get("/v1/drill-category/2574738/1249285")
+    assert "timing" not in third.json()["result_detail"]
@@ -0,0 +1,208 @@
+import asyncio
+import base64
+import time
+
+import httpx
+import pytest
+import respx
+
+from drillapi.cantons_configuration.cantons import CANTONS
+from drillapi.config import settings
+from drillapi.routes import grid
+from drillapi.services import cache, ground_category
+
+GEOADMIN_URL = "https://api3.geo.admin.ch/rest/services/ech/MapServer/identify"
+JU_WMS = "https://geoservices.jura.ch/wms"
+BBOX = "2574000,1245000,2580000,1251000"
+JU = CANTONS["cantons_configurations"]["JU"]
+
+
+def _square(x, y, size):
+    return {
+        "type": "Polygon",
+        "coordinates": [
+            [[x, y], [x + size, y], [x + size, y + size], [x, y + size], [x, y]]
+        ],
+    }
+
+
+WFS_ANSWER = {
+    "type": "FeatureCollection",
+    "features": [
+        {
+            "type": "Feature",
+            "properties": {"limitation_forage": "Interdit"},
+            "geometry": _square(2574000, 1249000, 1000),
+        },
+        {
+            "type": "Feature",
+            "properties": {"limitation_forage": "Autorisé"},
+            "geometry": _square(2576000, 1245000, 2000),
+        },
+    ],
+}
+
+
+def _canton_json():
+    with open("tests/data/geoadmin/canton_identify_ju.json", "rb") as f:
+        return f.read()
+
+
+@pytest.fixture
+def ju_area_fetch(monkeypatch):
+    typenames = {layer["name"]: layer["name"] for layer in JU["layers"]}
+    monkeypatch.setitem(
+        JU, "area_fetch", {"format": "wfs", "url": JU_WMS, "typenames": typenames}
+    )
+
+
+def _grid(payload):
+    data = base64.b64decode(payload["data"])
+    width = payload["width"]
+    return [
+        list(data[row * width : (row + 1) * width]) for row in range(payload["height"])
+    ]
+
+
+@respx.mock
+def test_grid_from_area_fetch(client, ju_area_fetch):
+    geoadmin = respx.get(GEOADMIN_URL).mock(
+        return_value=httpx.Response(200, content=_canton_json())
+    )
+    wms = respx.get(JU_WMS).mock(return_value=httpx.Response(200, json=WFS_ANSWER))
+
+    response = client.get(f"/v1/drill-category/grid?bbox={BBOX}&resolution=1000")
+
+    assert response.status_code == 200
+    payload = response.json()
+    assert (payload["width"], payload["height"]) == (6, 6)
+    assert payload["transform"] == [1000, 0, 2574000, 0, -1000, 1251000]
+    assert payload["cantons"]["JU"]["cells"] == 36
+    assert payload["cantons"]["JU"]["source"] == "area"
+    # One canton lookup and one WFS request for the 36 cells
+    assert geoadmin.call_count == 1
+    assert wms.call_count == 1
+    assert wms.calls.last.request.url.params["REQUEST"] == "GetFeature"
+
+    grid = _grid(payload)
+    assert grid[1][0] == 3
+    assert grid[4][2:4] == [1, 1] and grid[5][2:4] == [1, 1]
+    assert sum(row.count(4) for row in grid) == 31
+
+    # The cells are cached like point answers
+    config = CANTONS["cantons_configurations"]["JU"]
+    key = cache.drill_category_key("JU", config, 2574500, 1250500)
+    assert cache.drill_categories.get(key)[1] == {
+        "message": "Success",
+        "full_url": None,
+        "detail": None,
+    }
+    again = client.get(f"/v1/drill-category/grid?bbox={BBOX}&resolution=1000")
+    assert again.json()["cantons"]["JU"] == {
+        "cells": 36,
+        "source": "cache",
+        "cached": 36,
+        "stale": 0,
+    }
+    assert wms.call_count == 1
+
+
+@respx.mock
+def test_grid_samples_points_when_area_layer_is_empty(client, ju_area_fetch):
+    empty = {"type": "FeatureCollection", "features": []}
+    with open("tests/data/wms/getfeatureinfo_ju.gml", "rb") as f:
+        gml = f.read()
+
+    def wms_answer(request):
+        if request.url.params["REQUEST"] == "GetFeature":
+            return httpx.Response(200, json=empty)
+        return httpx.Response(
+            200, content=gml, headers={"Content-Type": "application/vnd.ogc.gml"}
+        )
+
+    respx.get(GEOADMIN_URL).mock(
+        return_value=httpx.Response(200, content=_canton_json())
+    )
+    respx.get(JU_WMS).mock(side_effect=wms_answer)
+
+    response = client.get(
+        "/v1/drill-category/grid?bbox=2574000,1245000,2576000,1246000&resolution=1000"
+    )
+
+    # No polygon is not category 4 everywhere
+    assert response.json()["cantons"]["JU"]["source"] == "points"
+    assert _grid(response.json()) == [[1, 1]]
+
+
+@respx.mock
+def test_grid_falls_back_to_points(client, monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_ENABLED", False)
+    with open("tests/data/wms/getfeatureinfo_ju.gml", "rb") as f:
+        gml = f.read()
+
+    def wms_answer(request):
+        if request.url.params["REQUEST"] == "GetFeature":
+            return httpx.Response(400, text="WFS not supported")
+        return httpx.Response(
+            200, content=gml, headers={"Content-Type": "application/vnd.ogc.gml"}
+        )
+
+    respx.get(GEOADMIN_URL).mock(
+        return_value=httpx.Response(200, content=_canton_json())
+    )
+    wms = respx.get(JU_WMS).mock(side_effect=wms_answer)
+
+    response = client.get(
+        "/v1/drill-category/grid?bbox=2574000,1245000,2576000,1246000&resolution=1000"
+    )
+
+    payload = response.json()
+    assert payload["cantons"]["JU"] == {
+        "cells": 2,
+        "source": "points",
+        "cached": 0,
+        "stale": 0,
+        "errors": 0,
+    }
+    assert _grid(payload) == [[1, 1]]
+    # JU has no area_fetch service: no GetFeature request
+    assert wms.call_count == 2
+
+
+def test_grid_refreshes_stale_cells():
+    points = [(2574500, 1245500), (2575500, 1245500), (2576500, 1245500)]
+    ages = [-60, 60, settings.CACHE_STALE_WHILE_REVALIDATE + 60]
+    for point, age in zip(points, ages):
+        cache.drill_categories.set(
+            cache.drill_category_key("JU", JU, *point),
+            ({"harmonized_value": 3}, {"detail": None}, time.time() - age),
+            ttl=10 * 86400,
+        )
+    with open("tests/data/wms/getfeatureinfo_ju.gml", "rb") as f:
+        gml = f.read()
+
+    async def run():
+        with respx.mock:
+            wms = respx.get(JU_WMS).mock(return_value=httpx.Response(200, content=gml))
+            answer = await grid.sample_canton("JU", points, asyncio.Semaphore(5))
+            await asyncio.gather(*ground_category._revalidations.values())
+            return answer, wms.call_count
+
+    (values, info), wms_calls = asyncio.run(run())
+
+    # Fresh and recently expired cells are served, the expired one refreshed;
+    # the one past the stale window is sampled again
+    assert values == [3, 3, 1]
+    assert (info["source"], info["cached"], info["stale"]) == ("points", 2, 1)
+    assert wms_calls == 2
+
+
+def test_grid_rejects_invalid_or_too_large_requests(client):
+    assert (
+        client.get("/v1/drill-category/grid?bbox=1,2,3&resolution=10").status_code
+        == 400
+    )
+    assert (
+        client.get(f"/v1/drill-category/grid?bbox={BBOX}&resolution=10").status_code
+        == 413
+    )
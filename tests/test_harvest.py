@@ -0,0 +1,144 @@
+import asyncio
+import json
+
+import httpx
+import respx
+
+from drillapi import harvest
+from drillapi.config import settings
+from drillapi.services import canton_index, harvest_store
+
+SAMPLE = "tests/data/boundaries/cantons_sample.geojson"
+JU_LAYER = "ju.env_18_03_geothermie_limitation_forages_sondes_geothermiques"
+
+
+def _square(x, y, size):
+    return {
+        "type": "Polygon",
+        "coordinates": [
+            [[x, y], [x + size, y], [x + size, y + size], [x, y + size], [x, y]]
+        ],
+    }
+
+
+WFS_ANSWER = {
+    "type": "FeatureCollection",
+    "features": [
+        {
+            "type": "Feature",
+            "properties": {"limitation_forage": "Interdit"},
+            "geometry": _square(2574000, 1249000, 1000),
+        },
+        {
+            "type": "Feature",
+            "properties": {"limitation_forage": "Autorisé"},
+            "geometry": _square(2570000, 1245000, 2000),
+        },
+        {
+            "type": "Feature",
+            "properties": {"limitation_forage": "Interdit"},
+            "geometry": {"type": "Point", "coordinates": [2574500, 1249500]},
+        },
+    ],
+}
+
+
+def _harvest_ju(monkeypatch, tmp_path, answer=WFS_ANSWER):
+    monkeypatch.setattr(settings, "HARVEST_DIR", tmp_path)
+    monkeypatch.setattr(settings, "CANTON_BOUNDARIES_FILE", SAMPLE)
+    canton_index.reset_index()
+
+    async def run():
+        with respx.mock:
+            route = respx.get("https://geoservices.jura.ch/wms").mock(
+                return_value=httpx.Response(200, json=answer)
+            )
+            summary = await harvest.harvest(["JU"])
+            return summary, route.calls.last.request.url.params
+
+    try:
+        return asyncio.run(run())
+    finally:
+        canton_index.reset_index()
+
+
+def test_harvest_writes_store_with_precomputed_values(monkeypatch, tmp_path):
+    summary, params = _harvest_ju(monkeypatch, tmp_path)
+
+    assert summary == {"JU": 2}
+    assert params["REQUEST"] == "GetFeature"
+    assert params["TYPENAMES"] == JU_LAYER
+    # Queried over the canton extent from the boundary index
+    minx, miny, maxx, maxy = map(float, params["BBOX"].split(",")[:4])
+    assert minx <= 2574738 <= maxx and miny <= 1249285 <= maxy
+
+    data = json.loads((tmp_path / "JU.geojson").read_text(encoding="utf-8"))
+    assert data["drillapi"]["canton"] == "JU"
+    assert [f["properties"]["matches"] for f in data["features"]] == [
+        [[3, "Interdit"]],
+        [[1, "Autorisé"]],
+    ]
+
+
+def test_drill_category_served_from_harvest(client, monkeypatch, tmp_path):
+    _harvest_ju(monkeypatch, tmp_path)
+    monkeypatch.setattr(settings, "DRILL_CATEGORY_SOURCE", "harvest")
+    harvest_store.reset()
+
+    with open("tests/data/geoadmin/canton_identify_ju.json", "rb") as f:
+        canton_json = f.read()
+
+    with respx.mock:
+        respx.get(
+            "https://api3.geo.admin.ch/rest/services/ech/MapServer/identify"
+        ).mock(return_value=httpx.Response(200, content=canton_json))
+        wms = respx.get("https://geoservices.jura.ch/wms").mock(
+            return_value=httpx.Response(500)
+        )
+        inside = client.get("/v1/drill-category/2574738/1249285").json()
+        outside = client.get("/v1/drill-category/2580000/1240000").json()
+
+    assert wms.call_count == 0
+    assert inside["ground_category"]["harmonized_value"] == 3
+    assert inside["ground_category"]["source_values"] == "Interdit"
+    assert inside["result_detail"]["source"] == "harvest"
+    assert outside["ground_category"]["harmonized_value"] == 4
+
+
+def test_stale_harvest_store_is_ignored(monkeypatch, tmp_path):
+    _harvest_ju(monkeypatch, tmp_path)
+    path = tmp_path / "JU.geojson"
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["drillapi"]["config_version"] = "outdated"
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+    harvest_store.reset()
+    assert harvest_store.get_store("JU") is None
+    assert harvest_store.get_store("ZH") is None
+
+
+def test_store_written_while_running_is_picked_up(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "HARVEST_DIR", tmp_path)
+    assert harvest_store.get_store("JU") is None
+
+    _harvest_ju(monkeypatch, tmp_path)
+    assert harvest_store.get_store("JU").size == 2
+
+
+def test_harvest_fails_without_the_configured_property(monkeypatch, tmp_path):
+    # e.g. a property only present as gml:name in GetFeatureInfo answers
+    answer = {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "properties": {"name": "Interdit"},
+                "geometry": _square(2574000, 1249000, 1000),
+            }
+        ],
+    }
+    summary, _ = _harvest_ju(monkeypatch, tmp_path, answer)
+
+    assert summary["JU"].startswith("error: Layer")
+    assert "limitation_forage" in summary["JU"]
+    assert not (tmp_path / "JU.geojson").exists()
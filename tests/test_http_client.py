@@ -0,0 +1,140 @@
+import asyncio
+
+import httpx
+import respx
+
+from drillapi.config import settings
+from drillapi.services import http_client
+
+URL = "https://wms.example.test/wms"
+
+
+def test_client_is_reused_within_event_loop():
+    async def run():
+        first = http_client.get_client()
+        second = http_client.get_client()
+        await http_client.shutdown()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first is second
+    assert first.is_closed
+
+
+def test_client_sends_gzip_accept_encoding():
+    async def run():
+        with respx.mock:
+            route = respx.get("https://example.test/wms").mock(
+                return_value=httpx.Response(200, text="ok")
+            )
+            resp = await http_client.get("https://example.test/wms", params={"a": 1})
+            await http_client.shutdown()
+            return resp, route.calls.last.request
+
+    resp, request = asyncio.run(run())
+    assert resp.status_code == 200
+    assert "gzip" in request.headers["accept-encoding"]
+    assert request.url.params["a"] == "1"
+
+
+def test_transient_errors_are_retried_within_budget():
+    async def run():
+        with respx.mock:
+            route = respx.get(URL).mock(
+                side_effect=[httpx.Response(503), httpx.Response(200, text="ok")]
+            )
+            resp = await http_client.get(URL)
+            await http_client.shutdown()
+            return resp, route.call_count
+
+    resp, calls = asyncio.run(run())
+    assert resp.status_code == 200
+    assert calls == 2
+    assert http_client.upstream_stats()["hosts"]["wms.example.test"]["retries"] == 1
+
+
+def test_exhausted_retry_budget_stops_retries(monkeypatch):
+    monkeypatch.setattr(settings, "UPSTREAM_RETRY_BUDGET_MIN", 0)
+    http_client.reset_stats()
+
+    async def run():
+        with respx.mock:
+            route = respx.get(URL).mock(return_value=httpx.Response(503))
+            resp = await http_client.get(URL)
+            await http_client.shutdown()
+            return resp, route.call_count
+
+    resp, calls = asyncio.run(run())
+    assert resp.status_code == 503
+    assert calls == 1
+    assert http_client.retry_budget.exhausted == 1
+
+
+def test_timeout_adapts_to_observed_latency(monkeypatch):
+    monkeypatch.setattr(settings, "UPSTREAM_LATENCY_MIN_SAMPLES", 5)
+    tracker = http_client.LatencyTracker()
+    assert tracker.timeout(20.0) == 20.0
+    assert tracker.hedge_delay() is None
+
+    for _ in range(10):
+        tracker.observe(0.5)
+
+    assert tracker.timeout(20.0) == 0.5 * settings.UPSTREAM_TIMEOUT_MULTIPLIER
+    assert tracker.timeout(1.2) == 1.2
+    assert tracker.hedge_delay() == 0.5
+
+
+def test_slow_primary_is_hedged(monkeypatch):
+    monkeypatch.setattr(settings, "UPSTREAM_LATENCY_MIN_SAMPLES", 1)
+    monkeypatch.setattr(settings, "UPSTREAM_HEDGE_MIN_DELAY", 0.01)
+
+    calls = []
+
+    async def respond(request):
+        calls.append(request)
+        if len(calls) == 1:
+            await asyncio.sleep(1)
+            return httpx.Response(200, text="slow")
+        return httpx.Response(200, text="fast")
+
+    async def run():
+        tracker = http_client._tracker("wms.example.test")
+        tracker.observe(0.01)
+        with respx.mock:
+            respx.get(URL).mock(side_effect=respond)
+            resp = await http_client.get(URL)
+            await http_client.shutdown()
+            return resp, tracker
+
+    resp, tracker = asyncio.run(run())
+    assert resp.text == "fast"
+    assert len(calls) == 2
+    assert tracker.hedges == 1
+    assert tracker.hedge_wins == 1
+
+
+def test_non_adaptive_requests_keep_their_timeout(monkeypatch):
+    monkeypatch.setattr(settings, "UPSTREAM_LATENCY_MIN_SAMPLES", 1)
+    monkeypatch.setattr(settings, "UPSTREAM_HEDGE_MIN_DELAY", 0.01)
+
+    calls = []
+
+    async def respond(request):
+        calls.append(request)
+        await asyncio.sleep(0.1)
+        return httpx.Response(200, text="area")
+
+    async def run():
+        tracker = http_client._tracker("wms.example.test")
+        tracker.observe(0.01)
+        with respx.mock:
+            respx.get(URL).mock(side_effect=respond)
+            resp = await http_client.get(URL, timeout=5.0, adaptive=False)
+            await http_client.shutdown()
+            return resp, tracker
+
+    resp, tracker = asyncio.run(run())
+    # Not cut off at the point queries' p99, not hedged, not sampled
+    assert resp.text == "area"
+    assert len(calls) == 1
+    assert (tracker.requests, tracker.hedges, len(tracker.samples)) == (0, 0, 1)
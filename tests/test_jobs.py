@@ -0,0 +1,185 @@
+import json
+import time
+
+import httpx
+import pytest
+import respx
+from fastapi.testclient import TestClient
+
+from drillapi import jobs
+from drillapi.app import app, create_app
+from drillapi.config import settings
+
+GEOADMIN_URL = "https://api3.geo.admin.ch/rest/services/ech/MapServer/identify"
+JU_WMS = "https://geoservices.jura.ch/wms"
+
+CSV = "id;coord_x;coord_y\na;2574738;1249285\nb;2576624;1252365\nc;2574738;1249285\n"
+
+
+@pytest.fixture
+def upstreams(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "JOBS_DIR", tmp_path / "jobs")
+    monkeypatch.setattr(settings, "JOBS_CHUNK_SIZE", 2)
+    with open("tests/data/geoadmin/canton_identify_ju.json", "rb") as f:
+        canton_json = f.read()
+    with open("tests/data/wms/getfeatureinfo_ju.gml", "rb") as f:
+        gml = f.read()
+
+    with respx.mock:
+        respx.get(GEOADMIN_URL).mock(
+            return_value=httpx.Response(200, content=canton_json)
+        )
+        respx.get(JU_WMS).mock(return_value=httpx.Response(200, content=gml))
+        yield
+
+
+@pytest.fixture
+def jobs_client(upstreams):
+    with TestClient(app) as c:
+        yield c
+
+
+def _wait_finished(client, job_id):
+    for _ in range(200):
+        progress = client.get(f"/v1/jobs/{job_id}").json()
+        if progress["status"] in jobs.FINISHED:
+            return progress
+        time.sleep(0.02)
+    raise AssertionError(f"Job {job_id} did not finish: {progress}")
+
+
+def test_parse_points_csv_and_geojson():
+    assert jobs.parse_points(CSV.encode(), "csv") == [
+        [2574738, 1249285, "a"],
+        [2576624, 1252365, "b"],
+        [2574738, 1249285, "c"],
+    ]
+    geojson = {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "id": 7,
+                "geometry": {"type": "Point", "coordinates": [2574738, 1249285]},
+            },
+            {
+                "type": "Feature",
+                "properties": {"id": "x"},
+                "geometry": {"type": "Point", "coordinates": [2576624, 1252365]},
+            },
+        ],
+    }
+    assert jobs.parse_points(json.dumps(geojson).encode(), "geojson") == [
+        [2574738, 1249285, 7],
+        [2576624, 1252365, "x"],
+    ]
+
+    with pytest.raises(jobs.JobInputError, match="Row 3: coord_y"):
+        jobs.parse_points(b"coord_x,coord_y\n2574738,1249285\n2574738,999\n", "csv")
+    with pytest.raises(jobs.JobInputError, match="coordinate columns"):
+        jobs.parse_points(b"lat,lon\n47,7\n", "csv")
+
+
+def test_job_runs_and_streams_results(jobs_client):
+    response = jobs_client.post(
+        "/v1/jobs", content=CSV, headers={"Content-Type": "text/csv"}
+    )
+    assert response.status_code == 202
+    job_id = response.json()["id"]
+    assert response.headers["location"].endswith(f"/v1/jobs/{job_id}")
+
+    progress = _wait_finished(jobs_client, job_id)
+    assert progress["status"] == "completed"
+    assert (progress["done"], progress["total"], progress["errors"]) == (3, 3, 0)
+
+    lines = jobs_client.get(f"/v1/jobs/{job_id}/results").text.splitlines()
+    results = [json.loads(line) for line in lines]
+    assert [(r["index"], r["id"]) for r in results] == [(0, "a"), (1, "b"), (2, "c")]
+    assert all(r["status"] == "success" for r in results)
+    assert results[0]["ground_category"]["harmonized_value"] == 1
+
+    collection = jobs_client.get(
+        f"/v1/jobs/{job_id}/results?format=geojson&follow=true"
+    ).json()
+    assert [f["id"] for f in collection["features"]] == ["a", "b", "c"]
+    assert collection["features"][1]["geometry"]["coordinates"] == [2576624, 1252365]
+
+
+def test_job_resumes_after_restart(upstreams):
+    # A job interrupted after its first chunk, with a partly written second one
+    points = jobs.parse_points(CSV.encode(), "csv")
+    job = jobs.Job.create(points, "csv")
+    first = b"".join(
+        jobs._result_line(i, point, {"status": "success"})
+        for i, point in enumerate(points[:2])
+    )
+    job.results_path.write_bytes(first + b'{"index": 2, "id"')
+    job.state.update(status="running", done=2, results_bytes=len(first))
+    job.save()
+
+    # Started with the app
+    with TestClient(app) as client:
+        progress = _wait_finished(client, job.id)
+        results = client.get(f"/v1/jobs/{job.id}/results").text.splitlines()
+
+    assert progress["status"] == "completed"
+    results = [json.loads(line) for line in results]
+    assert [r["index"] for r in results] == [0, 1, 2]
+    assert results[2]["id"] == "c"
+    assert results[2]["ground_category"]["harmonized_value"] == 1
+
+
+def test_job_rejects_bad_uploads(jobs_client):
+    response = jobs_client.post(
+        "/v1/jobs", content="x", headers={"Content-Type": "text/plain"}
+    )
+    assert response.status_code == 415
+
+    response = jobs_client.post(
+        "/v1/jobs",
+        content='{"type": "FeatureCollection", "features": []}',
+        headers={"Content-Type": "application/geo+json"},
+    )
+    assert response.status_code == 400
+    assert jobs_client.get("/v1/jobs/0123").status_code == 404
+
+
+def test_job_rejects_oversized_uploads(jobs_client, monkeypatch):
+    monkeypatch.setattr(settings, "JOBS_MAX_UPLOAD_BYTES", 32)
+    headers = {"Content-Type": "text/csv"}
+
+    # Announced by Content-Length
+    response = jobs_client.post("/v1/jobs", content=CSV, headers=headers)
+    assert response.status_code == 413
+
+    # Streamed without length
+    def chunks():
+        yield CSV[:20].encode()
+        yield CSV[20:].encode()
+
+    response = jobs_client.post("/v1/jobs", content=chunks(), headers=headers)
+    assert response.status_code == 413
+    assert not list((settings.JOBS_DIR).glob("*"))
+
+
+def test_expired_jobs_are_cleaned_up(upstreams):
+    points = jobs.parse_points(CSV.encode(), "csv")
+    expired, recent, running = (jobs.Job.create(points, "csv") for _ in range(3))
+    expired.state.update(status="completed", finished_at=time.time() - 10)
+    recent.state.update(status="completed", finished_at=time.time())
+    for job in (expired, recent):
+        job.save()
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(settings, "JOBS_RETENTION", 5)
+        assert jobs.cleanup() == 1
+    assert not expired.path.exists()
+    assert recent.path.exists() and running.path.exists()
+
+
+def test_lambda_app_has_no_jobs():
+    client = TestClient(create_app(include_jobs=False))
+    response = client.post(
+        "/v1/jobs", content=CSV, headers={"Content-Type": "text/csv"}
+    )
+    assert response.status_code == 404
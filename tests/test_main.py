@@ -104,3 +104,38 @@ def test_get_available_cantons_endpoint():
     # Optionally, ensure no duplicates and result matches filter_active_cantons
     expected = sorted(list(filter_active_cantons(get_cantons_data()).keys()))
     assert sorted(data) == expected
+
+
+def test_cantons_responses_are_compressed_and_etagged():
+    response = client.get("/v1/cantons", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["cache-control"].startswith("public, max-age=")
+    assert "ZH" in response.json()
+
+    etag = response.headers["etag"]
+    response = client.get(
+        "/v1/cantons", headers={"Accept-Encoding": "gzip", "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.content == b""
+
+    # The gzip ETag does not validate another representation
+    response = client.get(
+        "/v1/cantons", headers={"Accept-Encoding": "identity", "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+    # Identity representation has its own strong ETag, same version matches
+    response = client.get("/v1/cantons/ZH", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] != etag
+    response = client.get(
+        "/v1/cantons/ZH",
+        headers={
+            "Accept-Encoding": "identity",
+            "If-None-Match": response.headers["etag"],
+        },
+    )
+    assert response.status_code == 304
@@ -0,0 +1,59 @@
+import respx
+
+from drillapi.services import metrics
+from test_drill_suitability import mock_ju_services
+
+
+def test_histogram_exposition_is_cumulative():
+    histogram = metrics.Histogram(
+        "test_duration_seconds", "Test histogram", ("stage",), (0.1, 1.0)
+    )
+    metrics.registry.remove(histogram)
+    child = histogram.labels("parse")
+    assert histogram.labels("parse") is child
+
+    for value in (0.05, 0.5, 5.0):
+        child.observe(value)
+
+    lines = histogram.render()
+    assert 'test_duration_seconds_bucket{stage="parse",le="0.1"} 1' in lines
+    assert 'test_duration_seconds_bucket{stage="parse",le="1"} 2' in lines
+    assert 'test_duration_seconds_bucket{stage="parse",le="+Inf"} 3' in lines
+    assert 'test_duration_seconds_count{stage="parse"} 3' in lines
+    assert 'test_duration_seconds_sum{stage="parse"} 5.55' in lines
+
+
+def test_label_values_are_escaped():
+    counter = metrics.Counter("test_total", "Test counter", ("host",))
+    metrics.registry.remove(counter)
+    counter.labels('a"b\\c').inc(2)
+
+    assert counter.render()[-1] == 'test_total{host="a\\"b\\\\c"} 2'
+
+
+@respx.mock
+def test_metrics_endpoint_covers_hot_paths(client):
+    mock_ju_services()
+    assert client.get("/v1/drill-category/2574738/1249285").status_code == 200
+    assert client.get("/v1/drill-category/2574738/1249285").status_code == 200
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    for stage in ("canton_lookup", "upstream_fetch", "parse", "classify"):
+        assert (
+            f'drillapi_stage_duration_seconds_count{{canton="JU",stage="{stage}"}}'
+            in body
+        )
+    assert (
+        'drillapi_upstream_responses_total{host="geoservices.jura.ch",status="200"} 1'
+        in body
+    )
+    assert 'drillapi_cache_hits_total{cache="drill_category"} 1' in body
+    assert (
+        'drillapi_http_requests_total{route="/v1/drill-category/{coord_x}/{coord_y}"'
+        ',status="200"} 2' in body
+    )
+    assert "drillapi_http_requests_in_flight 1" in body
@@ -0,0 +1,130 @@
+import asyncio
+import socket
+
+import httpx
+import pytest
+import respx
+
+from drillapi.config import settings
+from drillapi.services import cache, redis_client
+from redis_standin import RedisStandIn
+
+GEOADMIN_URL = "https://api3.geo.admin.ch/rest/services/ech/MapServer/identify"
+
+
+@pytest.fixture
+def redis_server():
+    server = RedisStandIn(password="secret").start()
+    yield server
+    server.stop()
+
+
+def test_resp_client_pipeline_auth_and_expiry(redis_server):
+    async def run():
+        client = redis_client.RedisClient(redis_server.url, timeout=2)
+        await client.set("a", b"1", ttl=60)
+        await client.set("b", b"\r\n binary \x00", ttl=60)
+        await client.set("short", b"x", ttl=0.01)
+        await asyncio.sleep(0.05)
+        values = await client.mget(["a", "missing", "b", "short"], chunk_size=2)
+
+        with pytest.raises(redis_client.RedisError):
+            await client.execute(("NOPE",))
+        # The connection is still usable after an error reply
+        still = await client.get("a")
+        client.close()
+
+        anonymous = redis_client.RedisClient(
+            f"redis://127.0.0.1:{redis_server.port}", timeout=2
+        )
+        with pytest.raises(redis_client.RedisError, match="NOAUTH"):
+            await anonymous.get("a")
+        anonymous.close()
+        return values, still
+
+    values, still = asyncio.run(run())
+    assert values == [b"1", None, b"\r\n binary \x00", None]
+    assert still == b"1"
+    assert redis_server.commands.count("MGET") == 2
+
+
+def test_shared_tier_between_workers(redis_server, monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_SHARED_URL", redis_server.url)
+
+    async def run():
+        key = ("JU", "v1", 1, 2)
+        worker_a = cache.TieredCache("drill_category", 100, 10_000)
+        worker_b = cache.TieredCache("drill_category", 100, 10_000)
+        await worker_a.aset(key, ({"harmonized_value": 1}, {}), ttl=60)
+
+        found = await worker_b.aget_many([key, ("JU", "v1", 3, 4)])
+        # Now in worker B's memory tier
+        local = worker_b.get(key)
+        return found, local, worker_b.stats()
+
+    found, local, stats = asyncio.run(run())
+    assert found == {("JU", "v1", 1, 2): [{"harmonized_value": 1}, {}]}
+    assert local == [{"harmonized_value": 1}, {}]
+    assert stats["shared_hits"] == 1
+
+
+@respx.mock
+def test_drill_category_served_from_shared_tier(client, redis_server, monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_SHARED_URL", redis_server.url)
+    with open("tests/data/geoadmin/canton_identify_ju.json", "rb") as f:
+        respx.get(GEOADMIN_URL).mock(return_value=httpx.Response(200, content=f.read()))
+    with open("tests/data/wms/getfeatureinfo_ju.gml", "rb") as f:
+        wms = respx.get("https://geoservices.jura.ch/wms").mock(
+            return_value=httpx.Response(200, content=f.read())
+        )
+
+    first = client.get("/v1/drill-category/2574738/1249285").json()
+    # Another worker: empty memory tier, same shared store
+    cache.drill_categories._data.clear()
+    cache.canton_lookups._data.clear()
+    second = client.get("/v1/drill-category/2574738/1249285").json()
+
+    assert second["ground_category"] == first["ground_category"]
+    assert wms.call_count == 1
+    assert cache.drill_categories.stats()["shared_hits"] == 1
+
+    # Batch: the cached answers of all points are read in two MGETs
+    client.get("/v1/drill-category/2574800/1249300")
+    cache.drill_categories._data.clear()
+    cache.canton_lookups._data.clear()
+    redis_server.commands.clear()
+    batch = client.post(
+        "/v1/drill-category/batch",
+        json={
+            "coordinates": [
+                {"coord_x": 2574738, "coord_y": 1249285},
+                {"coord_x": 2574800, "coord_y": 1249300},
+            ]
+        },
+    ).json()
+    assert [r["status"] for r in batch["results"]] == ["success", "success"]
+    assert [c for c in redis_server.commands if c != "AUTH"] == ["MGET", "MGET"]
+    assert wms.call_count == 2
+
+
+@respx.mock
+def test_unavailable_shared_tier_falls_back_to_local(client, monkeypatch):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    monkeypatch.setattr(settings, "CACHE_SHARED_URL", f"redis://127.0.0.1:{port}")
+    with open("tests/data/geoadmin/canton_identify_ju.json", "rb") as f:
+        respx.get(GEOADMIN_URL).mock(return_value=httpx.Response(200, content=f.read()))
+    with open("tests/data/wms/getfeatureinfo_ju.gml", "rb") as f:
+        wms = respx.get("https://geoservices.jura.ch/wms").mock(
+            return_value=httpx.Response(200, content=f.read())
+        )
+
+    for _ in range(2):
+        response = client.get("/v1/drill-category/2574738/1249285")
+        assert response.status_code == 200
+
+    assert wms.call_count == 1
+    # First failure turns the shared tier off for CACHE_SHARED_RETRY_AFTER
+    assert cache.canton_lookups.stats()["shared_errors"] == 1
+    assert cache.drill_categories.stats()["shared_errors"] == 0
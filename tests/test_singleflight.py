@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from drillapi.services.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_task():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"value": 1}
+
+    async def run():
+        flights = SingleFlight()
+        results = await asyncio.gather(*(flights.do("k", fetch) for _ in range(5)))
+        return flights, results
+
+    flights, results = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert len(flights) == 0
+
+
+def test_errors_fan_out_to_every_waiter():
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def run():
+        flights = SingleFlight()
+        return await asyncio.gather(
+            flights.do("k", fail), flights.do("k", fail), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert [str(r) for r in results] == ["upstream down", "upstream down"]
+
+
+def test_task_cancelled_only_when_all_waiters_leave():
+    async def run():
+        flights = SingleFlight()
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def slow():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return "done"
+
+        first = asyncio.ensure_future(flights.do("k", slow))
+        second = asyncio.ensure_future(flights.do("k", slow))
+        await started.wait()
+
+        first.cancel()
+        await asyncio.sleep(0)
+        assert not cancelled.is_set()
+
+        second.cancel()
+        await asyncio.wait_for(cancelled.wait(), 1)
+        with pytest.raises(asyncio.CancelledError):
+            await second
+        return len(flights)
+
+    assert asyncio.run(run()) == 0
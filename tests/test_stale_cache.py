@@ -0,0 +1,94 @@
+import asyncio
+import time
+
+import httpx
+import respx
+
+from drillapi.cantons_configuration.cantons import CANTONS
+from drillapi.config import settings
+from drillapi.services import cache, ground_category
+
+JU = CANTONS["cantons_configurations"]["JU"]
+JU_WMS = "https://geoservices.jura.ch/wms"
+POINT = (2574738, 1249285)
+
+
+def _seed(harmonized_value: int, staleness: float):
+    key = cache.drill_category_key("JU", JU, *POINT)
+    cache.drill_categories.set(
+        key,
+        (
+            {"harmonized_value": harmonized_value},
+            {"message": "Success"},
+            time.time() - staleness,
+        ),
+        ttl=10 * 86400,
+    )
+
+
+def _gml():
+    with open("tests/data/wms/getfeatureinfo_ju.gml", "rb") as f:
+        return f.read()
+
+
+def test_stale_answer_served_while_revalidating():
+    _seed(3, staleness=60)
+
+    async def run():
+        with respx.mock:
+            wms = respx.get(JU_WMS).mock(
+                return_value=httpx.Response(200, content=_gml())
+            )
+            stale = await ground_category.compute_ground_category(*POINT, "JU", JU)
+            again = await ground_category.compute_ground_category(*POINT, "JU", JU)
+            await asyncio.gather(*ground_category._revalidations.values())
+            fresh = await ground_category.compute_ground_category(*POINT, "JU", JU)
+            return stale, again, fresh, wms.call_count
+
+    stale, again, fresh, wms_calls = asyncio.run(run())
+
+    assert stale["ground_category"]["harmonized_value"] == 3
+    assert stale["result_detail"]["stale"] is True
+    assert stale["result_detail"]["stale_reason"] == "revalidating"
+    assert again["result_detail"]["stale"] is True
+    # One background refresh for both stale reads
+    assert wms_calls == 1
+    assert fresh["ground_category"]["harmonized_value"] == 1
+    assert "stale" not in fresh["result_detail"]
+
+
+def test_stale_answer_served_if_upstream_fails():
+    _seed(3, staleness=settings.CACHE_STALE_WHILE_REVALIDATE + 60)
+
+    async def run():
+        with respx.mock:
+            respx.get(JU_WMS).mock(return_value=httpx.Response(500))
+            return await ground_category.compute_ground_category(*POINT, "JU", JU)
+
+    result = asyncio.run(run())
+    assert result["status"] == "success"
+    assert result["ground_category"]["harmonized_value"] == 3
+    assert result["result_detail"]["stale_reason"] == "upstream_error"
+
+
+def test_answers_past_stale_if_error_are_not_served():
+    _seed(3, staleness=settings.CACHE_STALE_IF_ERROR + 60)
+
+    async def run():
+        with respx.mock:
+            respx.get(JU_WMS).mock(return_value=httpx.Response(500))
+            return await ground_category.compute_ground_category(*POINT, "JU", JU)
+
+    result = asyncio.run(run())
+    assert result["ground_category"]["harmonized_value"] == 4
+    assert "stale" not in result["result_detail"]
+    assert result["result_detail"]["detail"]
+
+
+def test_freshness_states():
+    now = time.time()
+    assert cache.freshness(None) == ("missing", None)
+    assert cache.freshness(({}, {}, now + 10), now)[0] == "fresh"
+    assert cache.freshness(({}, {}, now - 10), now) == ("revalidate", 10)
+    expired = now - settings.CACHE_STALE_WHILE_REVALIDATE - 1
+    assert cache.freshness(({}, {}, expired), now)[0] == "expired"
@@ -0,0 +1,86 @@
+import asyncio
+
+import httpx
+import respx
+
+from drillapi import warmup
+from drillapi.cantons_configuration.cantons import CANTONS
+from drillapi.config import settings
+from drillapi.services import cache
+
+GEOADMIN_URL = "https://api3.geo.admin.ch/rest/services/ech/MapServer/identify"
+
+
+def _mock_upstreams():
+    with open("tests/data/geoadmin/canton_identify_ju.json", "rb") as f:
+        respx.get(GEOADMIN_URL).mock(return_value=httpx.Response(200, content=f.read()))
+    with open("tests/data/wms/getfeatureinfo_ju.gml", "rb") as f:
+        respx.get("https://geoservices.jura.ch/wms").mock(
+            return_value=httpx.Response(200, content=f.read())
+        )
+    return respx.route(method="HEAD").mock(return_value=httpx.Response(405))
+
+
+def test_warmup_fills_caches_and_preconnects(client, monkeypatch):
+    monkeypatch.setattr(settings, "WARMUP_ENABLED", True)
+    monkeypatch.setattr(settings, "WARMUP_COORDINATES", [[2576624, 1252365]])
+    monkeypatch.setattr(warmup, "ground_control_points", lambda: [(2574738, 1249285)])
+
+    assert client.get("/ready").status_code == 503
+
+    async def run():
+        with respx.mock:
+            head = _mock_upstreams()
+            report = await warmup.run_once()
+            return report, head.call_count
+
+    report, preconnects = asyncio.run(run())
+
+    assert report["points"] == 2
+    assert report["ok"] == 2
+    assert report["cantons"] == ["JU"]
+    # geo.admin.ch plus one host per active canton
+    assert preconnects == report["hosts"] == len(warmup.warmup_hosts())
+    assert len(cache.drill_categories) == 2
+
+    ready = client.get("/ready")
+    assert ready.status_code == 200
+    assert ready.json()["last_run"]["ok"] == 2
+
+
+def test_failed_warmup_keeps_instance_out_of_service(client, monkeypatch):
+    monkeypatch.setattr(settings, "WARMUP_ENABLED", True)
+    monkeypatch.setattr(warmup, "ground_control_points", lambda: [(2574738, 1249285)])
+
+    async def run():
+        with respx.mock:
+            respx.route().mock(side_effect=httpx.ConnectError("unreachable"))
+            return await warmup.run_once()
+
+    report = asyncio.run(run())
+
+    assert (report["hosts"], report["ok"]) == (0, 0)
+    ready = client.get("/ready")
+    assert ready.status_code == 503
+    assert ready.json()["last_error"] == "No upstream host could be reached"
+
+
+def test_hot_coordinates_kept_across_restarts(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "WARMUP_HOT_FILE", tmp_path / "hot.json")
+    config = CANTONS["cantons_configurations"]["JU"]
+    key = cache.drill_category_key("JU", config, 2574738, 1249285)
+    cache.drill_categories.set(key, ({"harmonized_value": 1}, {}, 0), ttl=60)
+
+    ((x, y),) = warmup.hot_coordinates(10)
+    # Centre of the GetFeatureInfo pixel holding the point
+    assert cache.drill_category_key("JU", config, x, y) == key
+    assert abs(x - 2574738) < cache.pixel_size(config)
+
+    warmup.save_hot_coordinates()
+    cache.clear()
+    assert warmup.load_hot_coordinates() == [(x, y)]
+    assert (x, y) in warmup.warmup_points()
+
+
+def test_ready_without_warmup(client):
+    assert client.get("/ready").status_code == 200